@@ -0,0 +1,51 @@
+"""
+Compare commit latency of the default SQLite engine against the tuned profile.
+
+Usage:
+    python -m benchmarks.bench_db_commit [--commits N]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from src.db.database import Database
+from src.db.saved_items_repository import SavedItemsRepository
+
+
+def measure_commits(tuned: bool, commits: int) -> list:
+    """Return per-commit latencies in milliseconds for a fresh database file."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = Database(db_path=os.path.join(tmp_dir, 'bench.db'), tuned=tuned)
+        db.create_tables()
+        session = db.get_session()
+        repo = SavedItemsRepository(session)
+
+        latencies = []
+        for i in range(commits):
+            start = time.perf_counter()
+            repo.add_item(str(i), f"https://www.yad2.co.il/realestate/item/{i}")
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        session.close()
+        db.dispose()
+        return latencies
+
+def report(label: str, latencies: list) -> None:
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{label:<10} mean {statistics.mean(latencies):7.3f} ms  "
+          f"median {statistics.median(latencies):7.3f} ms  p95 {p95:7.3f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--commits', type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"Committing {args.commits} single-row transactions")
+    report("default", measure_commits(tuned=False, commits=args.commits))
+    report("tuned", measure_commits(tuned=True, commits=args.commits))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Measure single fuzzy street lookups with the n-gram index against a linear
+rapidfuzz scan as the street list grows.
+
+Usage:
+    python -m benchmarks.bench_fuzzy_index [--lookups N]
+"""
+import argparse
+import random
+import time
+
+from rapidfuzz import fuzz, process
+
+from src.address.fuzzy_index import NGramIndex
+from src.address.matcher import STREET_MATCH_THRESHOLD
+
+from .bench_street_matching import random_street, with_typo
+
+
+def time_lookups(lookup, queries: list) -> float:
+    """Return the mean lookup time in microseconds."""
+    start = time.perf_counter()
+    for query in queries:
+        lookup(query)
+    return (time.perf_counter() - start) / len(queries) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--lookups', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'streets':>8} {'linear us':>10} {'index us':>10} {'candidates':>11} {'build s':>8}")
+    for size in (50, 500, 5000, 50000):
+        streets = list({random_street(rng) for _ in range(size)})
+        queries = [with_typo(rng, rng.choice(streets)) if i % 2 else random_street(rng) for i in range(args.lookups)]
+
+        start = time.perf_counter()
+        index = NGramIndex(streets, threshold=STREET_MATCH_THRESHOLD)
+        build_time = time.perf_counter() - start
+
+        def linear_lookup(query, choices=streets):
+            return process.extractOne(query, choices, scorer=fuzz.ratio, score_cutoff=STREET_MATCH_THRESHOLD)
+
+        linear = time_lookups(linear_lookup, queries)
+        indexed = time_lookups(index.best_match, queries)
+        candidates = sum(len(index.candidates(q)) for q in queries) / len(queries)
+        print(f"{len(streets):>8} {linear:>10.1f} {indexed:>10.1f} {candidates:>11.1f} {build_time:>8.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Measure how street name normalization resolves Yad2-style spellings ("שד' רוטשילד",
+"רח׳ הרצל", "בן-גוריון"): the exact-hit rate and lookup time of the old str.replace
+chain against the shared normalization pipeline in src.address.utils.
+
+Usage:
+    python -m benchmarks.bench_normalization [--items N] [--streets N]
+"""
+import argparse
+import random
+import time
+
+from src.address.fuzzy_index import NGramIndex
+from src.address.matcher import STREET_MATCH_THRESHOLD
+from src.address.utils import normalize_street_name
+
+from .bench_street_matching import random_street
+
+# Street type prefix as stored in the streets file, and the ways Yad2 writes it
+PREFIX_VARIANTS = {
+    '': ['', "רח' ", 'רח׳ ', 'רחוב '],
+    'שדרות ': ['שדרות ', "שד' ", 'שד׳ ', 'שד. '],
+}
+
+
+def legacy_normalize(text: str) -> str:
+    """The str.replace chain AddressMatcher used before the shared pipeline."""
+    normalized = text.replace('"', '').replace('\'', '')
+    normalized = normalized.replace('\"', '').replace('"', '')
+    return normalized.strip()
+
+def yad2_spelling(rng: random.Random, prefix: str, name: str) -> str:
+    if ' ' in name and rng.random() < 0.3:
+        name = name.replace(' ', '-', 1)
+    return rng.choice(PREFIX_VARIANTS[prefix]) + name
+
+def measure(normalize, canonical: list, queries: list) -> dict:
+    keys = {normalize(street) for street in canonical}
+    index = NGramIndex(keys, threshold=STREET_MATCH_THRESHOLD)
+    counts = {'exact': 0, 'fuzzy': 0, 'miss': 0}
+
+    start = time.perf_counter()
+    for query in queries:
+        normalized = normalize(query)
+        if normalized in keys:
+            counts['exact'] += 1
+        elif index.best_match(normalized):
+            counts['fuzzy'] += 1
+        else:
+            counts['miss'] += 1
+    counts['us'] = (time.perf_counter() - start) / len(queries) * 1e6
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', type=int, default=10000)
+    parser.add_argument('--streets', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    streets = [(rng.choice(list(PREFIX_VARIANTS)), random_street(rng)) for _ in range(args.streets)]
+    canonical = [prefix + name for prefix, name in streets]
+    queries = [yad2_spelling(rng, *rng.choice(streets)) for _ in range(args.items)]
+
+    print(f"{len(queries)} Yad2-style spellings of {len(canonical)} streets")
+    print(f"{'normalization':>14} {'exact':>7} {'fuzzy':>7} {'miss':>7} {'us/lookup':>10}")
+    for label, normalize in (('legacy', legacy_normalize), ('pipeline', normalize_street_name)):
+        counts = measure(normalize, canonical, queries)
+        print(
+            f"{label:>14} {counts['exact'] / len(queries):>7.1%} {counts['fuzzy'] / len(queries):>7.1%} "
+            f"{counts['miss'] / len(queries):>7.1%} {counts['us']:>10.1f}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Measure the all-URLs crawl run stage by stage in sequence against the staged pipeline in
+src.processor.pipeline, with sleeps standing in for page loads, enrichment and Gmail sends.
+
+Usage:
+    python -m benchmarks.bench_pipeline [--urls N] [--items N] [--page-load S] [--email S]
+"""
+import argparse
+import time
+
+from src.processor.pipeline import Handoff, Pipeline, Stage
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--urls', type=int, default=4)
+    parser.add_argument('--items', type=int, default=5, help="Approved listings per search page")
+    parser.add_argument('--page-load', type=float, default=0.2, help="Seconds per search page load")
+    parser.add_argument('--enrich', type=float, default=0.1, help="Seconds to open a listing")
+    parser.add_argument('--match', type=float, default=0.02, help="Seconds to store and match a page")
+    parser.add_argument('--email', type=float, default=0.1, help="Seconds per email")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    for _ in range(args.urls):
+        time.sleep(args.page_load)
+        time.sleep(args.match)
+        for _ in range(args.items):
+            time.sleep(args.enrich)
+            time.sleep(args.email)
+    sequential = time.perf_counter() - start
+
+    browser = Handoff()
+
+    def fetch(url, emit):
+        lease = browser.take()
+        time.sleep(args.page_load)
+        emit((url, lease))
+
+    def match(batch, emit):
+        time.sleep(args.match)
+        emit(batch)
+
+    def triage(batch, emit):
+        _, lease = batch
+        for item in range(args.items):
+            time.sleep(args.enrich)
+            emit(item)
+        lease.release()
+
+    def notify(item, emit):
+        time.sleep(args.email)
+        emit(item)
+
+    pipeline = Pipeline([
+        Stage('fetch', fetch), Stage('match', match), Stage('triage', triage), Stage('notify', notify, queue_size=20)
+    ])
+    pipeline.run(range(args.urls))
+
+    browser_time = args.urls * (args.page_load + args.match + args.items * args.enrich)
+    print(f"{args.urls} search pages, {args.items} approved listings each")
+    print(f"  sequential   {sequential:6.2f}s")
+    print(f"  pipeline     {pipeline.elapsed:6.2f}s  (browser alone {browser_time:.2f}s)")
+    for metrics in pipeline.metrics:
+        print(f"    {metrics.name:<8} {metrics.utilization(pipeline.elapsed):4.0%} busy, "
+              f"max queue {metrics.max_queue_depth}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Compare batch street matching (AddressMatcher.match_streets) with the per-item
+is_street_allowed loop on a synthetic street list.
+
+Usage:
+    python -m benchmarks.bench_street_matching [--items N] [--streets N]
+"""
+import argparse
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from src.address import AddressMatcher
+from src.yad2.models import FeedItem, Location, PropertySpecs
+
+HEBREW_LETTERS = 'אבגדהוזחטיכלמנסעפצקרשת'
+CITY = 'תל אביב'
+
+
+def random_street(rng: random.Random) -> str:
+    words = [''.join(rng.choice(HEBREW_LETTERS) for _ in range(rng.randint(3, 7))) for _ in range(rng.randint(1, 3))]
+    return ' '.join(words)
+
+def with_typo(rng: random.Random, street: str) -> str:
+    pos = rng.randrange(len(street))
+    return street[:pos] + rng.choice(HEBREW_LETTERS) + street[pos + 1:]
+
+def build_matcher(streets: list, tmp_dir: str) -> AddressMatcher:
+    data = [{
+        'city': CITY,
+        'neighborhoods': [{'neighborhood': 'Synthetic', 'streets': [{'name': name} for name in streets]}]
+    }]
+    path = Path(tmp_dir) / 'streets.json'
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+    return AddressMatcher(str(path))
+
+def build_items(rng: random.Random, streets: list, count: int) -> list:
+    """A third exact hits, a third typos and a third unknown streets, with house numbers."""
+    items = []
+    for i in range(count):
+        kind = i % 3
+        if kind == 0:
+            street = rng.choice(streets)
+        elif kind == 1:
+            street = with_typo(rng, rng.choice(streets))
+        else:
+            street = random_street(rng)
+        items.append(FeedItem(
+            item_id=str(i),
+            url=f"https://www.yad2.co.il/realestate/item/{i}",
+            price=None,
+            location=Location(city=CITY, street=f"{street} {rng.randint(1, 120)}"),
+            specs=PropertySpecs(),
+            is_saved=False,
+            is_agency=False,
+        ))
+    return items
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', type=int, default=10000)
+    parser.add_argument('--streets', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    streets = list({random_street(rng) for _ in range(args.streets)})
+    items = build_items(rng, streets, args.items)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        matcher = build_matcher(streets, tmp_dir)
+        print(f"Matching {len(items)} items against {len(streets)} streets")
+
+        start = time.perf_counter()
+        loop_results = [matcher.is_street_allowed(item.location.street, item.location.city) for item in items]
+        loop_time = time.perf_counter() - start
+        print(f"per-item loop  {loop_time:8.3f} s")
+
+        start = time.perf_counter()
+        batch_results = matcher.match_streets(items)
+        batch_time = time.perf_counter() - start
+        print(f"match_streets  {batch_time:8.3f} s  ({loop_time / batch_time:.1f}x)")
+
+    mismatches = sum(1 for a, b in zip(loop_results, batch_results) if a != b)
+    print(f"allowed: {sum(m.is_allowed for m in batch_results)}, mismatches vs loop: {mismatches}")
+
+if __name__ == "__main__":
+    main()
@@ -93,7 +93,7 @@ try:
         # Include all required modules
         '--collect-all=selenium',
         '--collect-all=webdriver_manager',
-        '--collect-all=fuzzywuzzy',
+        '--collect-all=rapidfuzz',
         '--collect-all=google_auth_oauthlib',
         '--collect-all=googleapiclient',
         '--collect-all=python-dotenv',
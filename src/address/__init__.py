@@ -1,3 +1,4 @@
+from .geo import GeoCheck
 from .matcher import AddressMatcher, StreetMatch
 
-__all__ = ['AddressMatcher', 'StreetMatch'] 
\ No newline at end of file
+__all__ = ['AddressMatcher', 'GeoCheck', 'StreetMatch']
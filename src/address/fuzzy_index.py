@@ -0,0 +1,183 @@
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+# Below this size a linear rapidfuzz scan is faster than filtering through the index
+LINEAR_SCAN_MAX_SIZE = 200
+
+
+class NGramIndex:
+    """
+    Character n-gram inverted index for fuzz.ratio lookups.
+
+    fuzz.ratio is a normalized Indel similarity, so a score of at least `threshold` bounds
+    the edit distance between two strings. By the q-gram lemma, two strings within edit
+    distance d share at least max(len) - n + 1 - n*d n-grams (counted with multiplicity),
+    which also rules out strings whose length is too different. Only strings that pass this
+    bound are scored, so nothing that could reach the threshold is ever filtered out.
+
+    Each n-gram occurrence is indexed as (gram, k) for its k-th occurrence, which turns the
+    multiset intersection into a plain count that numpy can compute in one bincount.
+    """
+
+    def __init__(self, strings: Iterable[str] = (), threshold: float = 85, n: int = 2):
+        self.threshold = threshold
+        self.n = n
+        self._reset()
+        for string in strings:
+            self.add(string)
+
+    def _reset(self) -> None:
+        self._strings: List[str] = []
+        self._ids: Dict[str, int] = {}  # Live strings; ids follow insertion order
+        self._lengths: List[int] = []
+        self._postings: Dict[Tuple[str, int], List[int]] = {}
+        self._shared_postings: Set[Tuple[str, int]] = set()  # Posting lists still shared with the source of a copy()
+        self._arrays: Dict[Tuple[str, int], np.ndarray] = {}
+        self._lengths_array: Optional[np.ndarray] = None
+        self._alive_array: Optional[np.ndarray] = None
+
+    def copy(self) -> 'NGramIndex':
+        """
+        Copy the index so it can be updated while this one keeps serving lookups.
+        Posting lists are shared until the copy adds to them.
+        """
+        clone = NGramIndex.__new__(NGramIndex)
+        clone.__dict__.update(self.__dict__)
+        clone._strings = list(self._strings)
+        clone._ids = dict(self._ids)
+        clone._lengths = list(self._lengths)
+        clone._postings = dict(self._postings)
+        clone._shared_postings = set(self._postings)
+        clone._arrays = dict(self._arrays)
+        clone._alive_array = None
+        clone._lengths_array = None
+        return clone
+
+    def __getstate__(self) -> dict:
+        # numpy arrays are derived caches, rebuilt lazily on first lookup
+        state = self.__dict__.copy()
+        state.update(_arrays={}, _lengths_array=None, _alive_array=None, _shared_postings=set())
+        return state
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, string: str) -> bool:
+        return string in self._ids
+
+    def __iter__(self):
+        return iter(self._ids)
+
+    def _tokens(self, string: str) -> List[Tuple[str, int]]:
+        seen = Counter()
+        tokens = []
+        for i in range(len(string) - self.n + 1):
+            gram = string[i:i + self.n]
+            tokens.append((gram, seen[gram]))
+            seen[gram] += 1
+        return tokens
+
+    def add(self, string: str) -> None:
+        if string in self._ids:
+            return
+        string_id = len(self._strings)
+        self._strings.append(string)
+        self._lengths.append(len(string))
+        self._ids[string] = string_id
+        for token in self._tokens(string):
+            if token in self._shared_postings:
+                self._shared_postings.discard(token)
+                self._postings[token] = list(self._postings[token])
+            self._postings.setdefault(token, []).append(string_id)
+            self._arrays.pop(token, None)
+        self._lengths_array = None
+        self._alive_array = None
+
+    def remove(self, string: str) -> None:
+        """Remove a string. Its postings stay behind as tombstones until the index is compacted."""
+        if self._ids.pop(string, None) is None:
+            return
+        self._alive_array = None
+        if len(self._ids) < len(self._strings) // 2:
+            self._compact()
+
+    def _compact(self) -> None:
+        live = list(self._ids)
+        self._reset()
+        for string in live:
+            self.add(string)
+
+    def _prepare(self) -> None:
+        if self._lengths_array is None:
+            self._lengths_array = np.array(self._lengths, dtype=np.int32)
+        if self._alive_array is None:
+            alive = np.zeros(len(self._strings), dtype=bool)
+            alive[list(self._ids.values())] = True
+            self._alive_array = alive
+
+    def _posting_array(self, token: Tuple[str, int]) -> Optional[np.ndarray]:
+        array = self._arrays.get(token)
+        if array is None:
+            postings = self._postings.get(token)
+            if postings is None:
+                return None
+            array = self._arrays[token] = np.array(postings, dtype=np.int32)
+        return array
+
+    def candidates(self, query: str) -> List[str]:
+        """Return the indexed strings that may score at least the threshold, in insertion order."""
+        if not self._strings:
+            return []
+        self._prepare()
+
+        arrays = [array for array in map(self._posting_array, self._tokens(query)) if array is not None]
+        if arrays:
+            common = np.bincount(np.concatenate(arrays), minlength=len(self._strings))
+        else:
+            common = np.zeros(len(self._strings), dtype=np.int64)
+
+        query_len = len(query)
+        lengths = self._lengths_array
+        max_distance = np.floor((1 - self.threshold / 100) * (query_len + lengths) + 1e-9)
+        required = np.maximum(query_len, lengths) - self.n + 1 - self.n * max_distance
+        within_length = np.abs(lengths - query_len) <= max_distance
+
+        matches = np.flatnonzero(self._alive_array & within_length & (common >= required))
+        return [self._strings[i] for i in matches]
+
+    def best_match(self, query: str) -> Optional[Tuple[str, float]]:
+        """Find the best scoring string at or above the threshold, the first inserted one on a tie."""
+        if query in self._ids:
+            return query, 100.0
+        choices = self._ids.keys() if len(self._ids) <= LINEAR_SCAN_MAX_SIZE else self.candidates(query)
+        best = process.extractOne(query, choices, scorer=fuzz.ratio, score_cutoff=self.threshold)
+        return (best[0], best[1]) if best else None
+
+    def best_matches(self, queries: Sequence[str]) -> List[Optional[Tuple[str, float]]]:
+        """
+        best_match for many queries, scored against every string in one rapidfuzz cdist call.
+
+        Scores are computed in double precision and ties go to the first inserted string, the
+        same as best_match, so both always pick the same string.
+        """
+        choices = list(self._ids)
+        if not queries or not choices:
+            return [None] * len(queries)
+        scores = process.cdist(
+            queries, choices, scorer=fuzz.ratio, score_cutoff=self.threshold, dtype=np.float64, workers=-1
+        )
+        # argmax returns the first of equal scores, in insertion order like extractOne
+        best_choices = scores.argmax(axis=1)
+        results: List[Optional[Tuple[str, float]]] = []
+        for row, query in enumerate(queries):
+            score = scores[row, best_choices[row]]
+            if query in self._ids:
+                results.append((query, 100.0))
+            elif score >= self.threshold:
+                results.append((choices[best_choices[row]], float(score)))
+            else:
+                results.append(None)
+        return results
@@ -0,0 +1,166 @@
+"""
+Point-in-polygon lookups for neighborhoods and street constraints.
+
+Polygons are stored with the streets config as lists of [latitude, longitude] points:
+
+    {"neighborhood": "רמת אביב", "polygon": [[32.11, 34.79], ...], "streets": [
+        {"name": "ברודצקי", "constraint": "צפונית לרחוב אינשטיין", "constraint_polygon": [[32.115, 34.80], ...]}
+    ]}
+
+A uniform grid maps every cell to the polygons whose bounding box overlaps it, so a
+lookup only runs the exact ray casting test on the few polygons near the point.
+"""
+import math
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Set, Tuple
+
+Point = Tuple[float, float]  # (latitude, longitude)
+
+# About 550m x 470m in Israel, a few cells per neighborhood
+GRID_CELL_SIZE = 0.005
+# Points closer than this to a polygon edge are too close to call automatically
+BOUNDARY_MARGIN_METERS = 30
+_METERS_PER_DEGREE = 111_320
+
+
+class GeoCheck(Enum):
+    INSIDE = 'inside'
+    OUTSIDE = 'outside'
+    UNKNOWN = 'unknown'  # No polygon, no coordinates, or too close to the edge
+
+
+class Polygon:
+    def __init__(self, points: Sequence[Sequence[float]]):
+        if len(points) < 3:
+            raise ValueError(f"A polygon needs at least 3 points, got {len(points)}")
+        self.points: List[Point] = [(float(lat), float(lon)) for lat, lon in points]
+        lats = [lat for lat, _ in self.points]
+        lons = [lon for _, lon in self.points]
+        self.bbox = (min(lats), min(lons), max(lats), max(lons))
+
+    def _edges(self) -> Iterable[Tuple[Point, Point]]:
+        return zip(self.points, self.points[1:] + self.points[:1])
+
+    def contains(self, lat: float, lon: float) -> bool:
+        """Ray casting test, counting edge crossings of a ray going east from the point."""
+        min_lat, min_lon, max_lat, max_lon = self.bbox
+        if not (min_lat <= lat <= max_lat and min_lon <= lon <= max_lon):
+            return False
+        inside = False
+        for (lat1, lon1), (lat2, lon2) in self._edges():
+            if (lat1 > lat) != (lat2 > lat):
+                crossing_lon = lon1 + (lat - lat1) * (lon2 - lon1) / (lat2 - lat1)
+                if lon < crossing_lon:
+                    inside = not inside
+        return inside
+
+    def distance_to_edge(self, lat: float, lon: float) -> float:
+        """Approximate distance in meters from the point to the nearest edge."""
+        # Equirectangular projection around the point, accurate enough at neighborhood scale
+        lon_scale = math.cos(math.radians(lat))
+        best = math.inf
+        for (lat1, lon1), (lat2, lon2) in self._edges():
+            ax, ay = (lon1 - lon) * lon_scale, lat1 - lat
+            bx, by = (lon2 - lon) * lon_scale, lat2 - lat
+            dx, dy = bx - ax, by - ay
+            length = dx * dx + dy * dy
+            t = 0.0 if length == 0 else max(0.0, min(1.0, -(ax * dx + ay * dy) / length))
+            best = min(best, math.hypot(ax + t * dx, ay + t * dy))
+        return best * _METERS_PER_DEGREE
+
+    def check(self, lat: float, lon: float, margin: float = BOUNDARY_MARGIN_METERS) -> GeoCheck:
+        if margin > 0 and self.distance_to_edge(lat, lon) < margin:
+            return GeoCheck.UNKNOWN
+        return GeoCheck.INSIDE if self.contains(lat, lon) else GeoCheck.OUTSIDE
+
+
+class GridIndex:
+    """Uniform grid over polygon bounding boxes."""
+
+    def __init__(self, cell_size: float = GRID_CELL_SIZE):
+        self.cell_size = cell_size
+        self._cells: Dict[Tuple[int, int], List[Hashable]] = {}
+        self._polygons: Dict[Hashable, Polygon] = {}
+
+    def __len__(self) -> int:
+        return len(self._polygons)
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return math.floor(lat / self.cell_size), math.floor(lon / self.cell_size)
+
+    def insert(self, key: Hashable, polygon: Polygon) -> None:
+        self._polygons[key] = polygon
+        min_lat, min_lon, max_lat, max_lon = polygon.bbox
+        (row_from, col_from), (row_to, col_to) = self._cell(min_lat, min_lon), self._cell(max_lat, max_lon)
+        for row in range(row_from, row_to + 1):
+            for col in range(col_from, col_to + 1):
+                self._cells.setdefault((row, col), []).append(key)
+
+    def get(self, key: Hashable) -> Optional[Polygon]:
+        return self._polygons.get(key)
+
+    def nearby(self, lat: float, lon: float) -> List[Hashable]:
+        """Keys of the polygons whose bounding box reaches the point's cell or the 8 around it."""
+        row, col = self._cell(lat, lon)
+        keys = {}
+        for d_row in (-1, 0, 1):
+            for d_col in (-1, 0, 1):
+                keys.update(dict.fromkeys(self._cells.get((row + d_row, col + d_col), ())))
+        return list(keys)
+
+    def query(self, lat: float, lon: float) -> List[Hashable]:
+        """Keys of the polygons containing the point."""
+        return [key for key in self._cells.get(self._cell(lat, lon), ()) if self._polygons[key].contains(lat, lon)]
+
+
+@dataclass
+class GeoIndex:
+    # (normalized city, neighborhood) -> polygon
+    neighborhoods: GridIndex = field(default_factory=GridIndex)
+    # (normalized city, street name) -> area where the street's constraint holds
+    constraints: Dict[Tuple[str, str], Polygon] = field(default_factory=dict)
+    # Normalized cities with at least one neighborhood polygon
+    mapped_cities: Set[str] = field(default_factory=set)
+
+    def __bool__(self) -> bool:
+        return bool(len(self.neighborhoods) or self.constraints)
+
+    def neighborhoods_at(self, city: str, lat: float, lon: float) -> List[str]:
+        return [neighborhood for key_city, neighborhood in self.neighborhoods.query(lat, lon) if key_city == city]
+
+    def check_neighborhoods(self, city: str, lat: float, lon: float) -> GeoCheck:
+        """
+        Check whether the point is inside any of the city's neighborhoods.
+        OUTSIDE only if the city is mapped and the point is clear of every neighborhood's edge.
+        """
+        if city not in self.mapped_cities:
+            return GeoCheck.UNKNOWN
+        # The boundary margin is much smaller than a cell, so the surrounding cells cover it
+        checks = {
+            self.neighborhoods.get(key).check(lat, lon)
+            for key in self.neighborhoods.nearby(lat, lon) if key[0] == city
+        }
+        for result in (GeoCheck.INSIDE, GeoCheck.UNKNOWN):
+            if result in checks:
+                return result
+        return GeoCheck.OUTSIDE
+
+    def check_constraint(self, city: str, street_name: str, lat: float, lon: float) -> GeoCheck:
+        polygon = self.constraints.get((city, street_name))
+        return polygon.check(lat, lon) if polygon else GeoCheck.UNKNOWN
+
+
+def build_geo_index(cities_data: List[dict], normalize_city: Callable[[str], str]) -> GeoIndex:
+    """Collect the neighborhood and constraint polygons from the parsed streets JSON."""
+    geo = GeoIndex()
+    for city_data in cities_data:
+        city = normalize_city(city_data['city'])
+        for neighborhood in city_data['neighborhoods']:
+            if neighborhood.get('polygon'):
+                geo.neighborhoods.insert((city, neighborhood['neighborhood']), Polygon(neighborhood['polygon']))
+                geo.mapped_cities.add(city)
+            for street in neighborhood['streets']:
+                if street.get('constraint_polygon'):
+                    geo.constraints[(city, street['name'])] = Polygon(street['constraint_polygon'])
+    return geo
@@ -1,92 +1,283 @@
 import json
 import logging
+import os
+import threading
+from collections import Counter
 from dataclasses import dataclass
-from typing import Optional
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
 
-from fuzzywuzzy import fuzz
+from rapidfuzz import fuzz
 
+from .fuzzy_index import NGramIndex
+from .geo import GeoCheck, build_geo_index
+from .match_cache import MatchCache
+from .street_index import (
+    StreetIndex,
+    build_city_streets,
+    build_street_index,
+    get_index_path,
+    hash_source,
+    load_artifact,
+    save_artifact,
+    update_street_index,
+)
+from .utils import normalize_hebrew_text, normalize_street_name
 
-@dataclass
+if TYPE_CHECKING:
+    from src.yad2.models import FeedItem
+
+STREET_MATCH_THRESHOLD = 85
+CITY_MATCH_THRESHOLD = 90
+MATCH_CACHE_SIZE = 4096
+
+
+@dataclass(frozen=True)
 class StreetMatch:
     is_allowed: bool
     constraint: Optional[str] = None
     neighborhood: Optional[str] = None
     city: Optional[str] = None
+    street: Optional[str] = None  # Street name as written in the streets file
+
+@dataclass(frozen=True)
+class _Snapshot:
+    """Everything a lookup reads, replaced as a whole when the streets are reloaded."""
+    index: StreetIndex
+    # Resolved city names, including fuzzy resolutions and misses (None)
+    city_aliases: Dict[str, Optional[str]]
+    # Memoized results keyed by normalized (street, city)
+    match_cache: MatchCache[StreetMatch]
 
 class AddressMatcher:
-    def __init__(self, json_file_path: str):
-        """Initialize the AddressMatcher with a JSON file containing allowed streets."""
+    def __init__(
+        self,
+        json_file_path: str,
+        cache_size: int = MATCH_CACHE_SIZE,
+        index_path: Optional[str] = None,
+        rebuild: bool = False,
+    ):
+        """
+        Initialize the AddressMatcher with a JSON file containing allowed streets.
+
+        Args:
+            json_file_path: Path of the supported streets JSON
+            cache_size: Maximum number of memoized street matches
+            index_path: Compiled street index artifact, defaults to get_index_path(json_file_path)
+            rebuild: Rebuild the artifact even if it is up to date
+        """
         self.logger = logging.getLogger(__name__)
-        self._load_streets(json_file_path)
+        self.cache_size = cache_size
+        # How uncached lookups were resolved: exact key hit, fuzzy match or miss
+        self._match_counts = Counter(exact=0, fuzzy=0, miss=0)
+        self.json_file_path = json_file_path
+        self.index_path = index_path or get_index_path(json_file_path)
+        # Serializes reloads; lookups never take it and read whichever snapshot is current
+        self._reload_lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._stop_watching = threading.Event()
+        self._load_streets(json_file_path, rebuild)
+
+    @property
+    def cache_stats(self) -> Dict[str, float]:
+        """Hit/miss statistics of the street match memo."""
+        return self._snapshot.match_cache.stats
+
+    @property
+    def match_stats(self) -> Dict[str, float]:
+        """How uncached street lookups were resolved, with the share of exact hits."""
+        counts = dict(self._match_counts)
+        total = sum(counts.values())
+        counts['exact_rate'] = counts['exact'] / total if total else 0.0
+        return counts
+
+    @property
+    def street_lookup(self) -> Dict[str, Dict[str, dict]]:
+        """Normalized city -> {normalized street -> entry}."""
+        return self._snapshot.index.streets
 
-    def _load_streets(self, json_file_path: str) -> None:
-        """Load and parse the streets JSON file."""
+    @property
+    def fuzzy_index(self) -> Dict[str, NGramIndex]:
+        return self._snapshot.index.fuzzy
+
+    def _load_streets(self, json_file_path: str, rebuild: bool = False) -> None:
+        """
+        Load the street index, from the compiled artifact when it matches the JSON file,
+        otherwise by parsing the JSON and writing a fresh artifact.
+        """
         try:
-            with open(json_file_path, 'r', encoding='utf-8') as f:
-                self.cities_data = json.load(f)
-            
-            # Create a flat lookup dictionary for faster searching
-            self.street_lookup = {}
-            for city_data in self.cities_data:
-                city_name = city_data['city']
-                for neighborhood in city_data['neighborhoods']:
-                    neighborhood_name = neighborhood['neighborhood']
-                    for street in neighborhood['streets']:
-                        street_name = street['name']
-                        normalized_street = self._normalize_street_name(street_name)
-                        normalized_city = self._normalize_text(city_name)
-                        # Create a composite key of city and street
-                        key = f"{normalized_city}:{normalized_street}"
-                        
-                        self.street_lookup[key] = {
-                            'name': street_name,
-                            'constraint': street.get('constraint'),
-                            'neighborhood': neighborhood_name,
-                            'city': city_name
-                        }
+            self._source_mtime = os.stat(json_file_path).st_mtime_ns
+            with open(json_file_path, 'rb') as f:
+                raw = f.read()
+            source_hash = hash_source(raw, STREET_MATCH_THRESHOLD)
+
+            index = None if rebuild else load_artifact(self.index_path, source_hash)
+            if index is None:
+                index = build_street_index(
+                    json.loads(raw.decode('utf-8')),
+                    normalize_city=self._normalize_text,
+                    normalize_street=self._normalize_street_name,
+                    threshold=STREET_MATCH_THRESHOLD,
+                    source_hash=source_hash,
+                )
+                self._save_index(index)
+            self._swap_index(index)
         except Exception as e:
             self.logger.error(f"Failed to load streets file: {e}")
             raise
 
+    def _save_index(self, index: StreetIndex) -> None:
+        try:
+            save_artifact(index, self.index_path)
+        except OSError as e:
+            self.logger.warning(f"Failed to write street index {self.index_path}: {str(e)}")
+
+    def _swap_index(self, index: StreetIndex) -> None:
+        """
+        Publish a new index with an empty memo. Assigning the snapshot is atomic and lookups
+        read it once, so they see either the old streets or the new ones, never a mix.
+        """
+        self._snapshot = _Snapshot(
+            index=index,
+            city_aliases={city: city for city in index.streets},
+            match_cache=MatchCache(self.cache_size),
+        )
+
+    def reload(self) -> bool:
+        """
+        Apply changes in the streets file, if any, without restarting.
+
+        Only the cities whose streets changed get a new fuzzy index, built by adding and
+        removing the changed streets. Lookups running meanwhile keep using the old index.
+
+        Returns:
+            bool: True if the streets changed
+        """
+        with self._reload_lock:
+            try:
+                mtime = os.stat(self.json_file_path).st_mtime_ns
+                if mtime == self._source_mtime:
+                    return False
+                with open(self.json_file_path, 'rb') as f:
+                    raw = f.read()
+                source_hash = hash_source(raw, STREET_MATCH_THRESHOLD)
+                if source_hash == self._snapshot.index.source_hash:
+                    self._source_mtime = mtime
+                    return False
+
+                cities_data = json.loads(raw.decode('utf-8'))
+                streets = build_city_streets(
+                    cities_data,
+                    normalize_city=self._normalize_text,
+                    normalize_street=self._normalize_street_name,
+                )
+                geo = build_geo_index(cities_data, normalize_city=self._normalize_text)
+                # Only after a successful parse, a half written file is retried on the next poll
+                self._source_mtime = mtime
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                # Keep serving the current streets, e.g. while the file is half written
+                self.logger.warning(f"Failed to reload streets file: {str(e)}")
+                return False
+
+            index, diff = update_street_index(self._snapshot.index, streets, STREET_MATCH_THRESHOLD, source_hash, geo)
+            self._swap_index(index)
+            self._save_index(index)
+
+        self.logger.info(
+            f"Reloaded streets: {len(diff.added)} added, {len(diff.removed)} removed, {len(diff.changed)} changed"
+        )
+        return True
+
+    def start_watching(self, interval: float = 2.0) -> None:
+        """Poll the streets file in a background thread and reload it when it changes."""
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._stop_watching.clear()
+        self._watcher = threading.Thread(
+            target=self._watch, args=(interval,), name="streets-watcher", daemon=True
+        )
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        self._stop_watching.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def _watch(self, interval: float) -> None:
+        while not self._stop_watching.wait(interval):
+            try:
+                self.reload()
+            except Exception as e:
+                self.logger.error(f"Failed to reload streets: {str(e)}")
+
     def _normalize_text(self, text: str) -> str:
         """Normalize any text for comparison."""
-        # Remove quotes and special characters
-        normalized = text.replace('"', '').replace('\'', '')
-        # Remove Hebrew abbreviation marks
-        normalized = normalized.replace('\"', '').replace('"', '')
-        return normalized.strip()  # Remove just whitespace, no lower() for Hebrew
+        return normalize_hebrew_text(text)  # No lower() for Hebrew
 
     def _normalize_street_name(self, street_name: str) -> str:
-        """Normalize a street name for comparison."""
-        return self._normalize_text(street_name)
+        """Normalize a street name for comparison, expanding abbreviations like "שד'"."""
+        return normalize_street_name(street_name)
+
+    def _resolve_city(self, snapshot: '_Snapshot', normalized_city: str) -> Optional[str]:
+        """
+        Map a city name to a city key in the lookup.
+        Falls back to fuzzy matching for variants like "תל אביב יפו" vs "תל אביב".
+        """
+        if normalized_city in snapshot.city_aliases:
+            return snapshot.city_aliases[normalized_city]
+
+        best_ratio = 0
+        best_city = None
+        for city in snapshot.index.streets:
+            ratio = fuzz.token_set_ratio(normalized_city, city)
+            if ratio > best_ratio and ratio >= CITY_MATCH_THRESHOLD:
+                best_ratio = ratio
+                best_city = city
+
+        if best_city:
+            self.logger.debug(f"Resolved city {normalized_city} to {best_city}")
+        snapshot.city_aliases[normalized_city] = best_city
+        return best_city
 
-    def _find_best_match(self, street_name: str, city: str) -> Optional[dict]:
+    def _find_best_match(self, snapshot: '_Snapshot', normalized_input: str, normalized_city: str) -> Optional[dict]:
         """Find the best matching street using fuzzy matching within the specified city."""
-        normalized_input = self._normalize_street_name(street_name)
-        normalized_city = self._normalize_text(city)
-        
-        # Create the composite key for exact match
-        exact_key = f"{normalized_city}:{normalized_input}"
-        
+        city_key = self._resolve_city(snapshot, normalized_city)
+        if city_key is None:
+            self._match_counts['miss'] += 1
+            return None
+
+        city_streets = snapshot.index.streets[city_key]
+
         # Try exact match first
-        if exact_key in self.street_lookup:
-            return self.street_lookup[exact_key]
+        if normalized_input in city_streets:
+            self._match_counts['exact'] += 1
+            return city_streets[normalized_input]
 
-        # If no exact match, try fuzzy matching
-        best_ratio = 0
-        best_match = None
+        # If no exact match, score only the city's streets that can reach the threshold
+        best = snapshot.index.fuzzy[city_key].best_match(normalized_input)
+        self._match_counts['fuzzy' if best else 'miss'] += 1
+        return city_streets[best[0]] if best else None
 
-        # Filter potential matches by city first
-        city_keys = [k for k in self.street_lookup.keys() if k.startswith(f"{normalized_city}:")]
-        
-        for key in city_keys:
-            _, street_part = key.split(":", 1)
-            ratio = fuzz.ratio(normalized_input, street_part)
-            if ratio > best_ratio and ratio >= 85:
-                best_ratio = ratio
-                best_match = self.street_lookup[key]
+    @staticmethod
+    def _strip_house_number(street_name: str) -> str:
+        """Extract just the street name if the address includes a number."""
+        parts = street_name.split()
+        for i in range(len(parts)-1, -1, -1):
+            if not parts[i].isdigit():
+                return ' '.join(parts[:i+1])
+        return street_name
 
-        return best_match
+    @staticmethod
+    def _to_street_match(match: Optional[dict]) -> StreetMatch:
+        if not match:
+            return StreetMatch(is_allowed=False)
+        return StreetMatch(
+            is_allowed=True,
+            constraint=match.get('constraint'),
+            neighborhood=match['neighborhood'],
+            city=match['city'],
+            street=match['name']
+        )
 
     def is_street_allowed(self, street_name: str, city: str) -> StreetMatch:
         """
@@ -103,21 +294,106 @@ class AddressMatcher:
             - neighborhood: The neighborhood name if the street is found
             - city: The city name if the street is found
         """
-        # Extract just the street name if address includes number
-        parts = street_name.split()
-        for i in range(len(parts)-1, -1, -1):
-            if not parts[i].isdigit():
-                street_name = ' '.join(parts[:i+1])
-                break
+        snapshot = self._snapshot
+        key = self._cache_key(street_name, city)
+        cached = snapshot.match_cache.get(key)
+        if cached is not None:
+            return cached
 
-        match = self._find_best_match(street_name, city)
+        match = self._find_best_match(snapshot, *key)
         if not match:
             self.logger.debug(f"Street not found: {street_name} in city: {city}")
-            return StreetMatch(is_allowed=False)
+        street_match = self._to_street_match(match)
+        snapshot.match_cache.put(key, street_match)
+        return street_match
 
-        return StreetMatch(
-            is_allowed=True,
-            constraint=match.get('constraint'),
-            neighborhood=match['neighborhood'],
-            city=match['city']
-        ) 
\ No newline at end of file
+    def _cache_key(self, street_name: str, city: str) -> Tuple[str, str]:
+        return self._normalize_street_name(self._strip_house_number(street_name)), self._normalize_text(city)
+
+    def match_streets(self, items: Sequence['FeedItem']) -> List[StreetMatch]:
+        """
+        Match the streets of many feed items at once.
+
+        Items are grouped by city and every distinct street name that isn't an exact hit is
+        scored against that city's streets in a single vectorized rapidfuzz cdist call, through
+        the city's fuzzy index. The index ranks them the same way for is_street_allowed, ties
+        included, so results are the same as calling it for each item, and share its memo.
+
+        Returns:
+            A StreetMatch per item, in the same order as items
+        """
+        snapshot = self._snapshot
+        results: List[Optional[StreetMatch]] = [None] * len(items)
+        keys = [self._cache_key(item.location.street, item.location.city) for item in items]
+
+        # city key -> normalized street -> indexes of the items on that street
+        pending: Dict[str, Dict[str, List[int]]] = {}
+        for idx, (street, city) in enumerate(keys):
+            cached = snapshot.match_cache.get((street, city))
+            if cached is not None:
+                results[idx] = cached
+                continue
+            city_key = self._resolve_city(snapshot, city)
+            if city_key is None:
+                results[idx] = StreetMatch(is_allowed=False)
+                snapshot.match_cache.put((street, city), results[idx])
+                self._match_counts['miss'] += 1
+                continue
+            pending.setdefault(city_key, {}).setdefault(street, []).append(idx)
+
+        for city_key, streets in pending.items():
+            city_streets = snapshot.index.streets[city_key]
+            matches = {street: city_streets[street] for street in streets if street in city_streets}
+            self._match_counts['exact'] += len(matches)
+
+            misses = [street for street in streets if street not in matches]
+            if misses and city_streets:
+                for street, best in zip(misses, snapshot.index.fuzzy[city_key].best_matches(misses)):
+                    if best:
+                        matches[street] = city_streets[best[0]]
+                        self._match_counts['fuzzy'] += 1
+            self._match_counts['miss'] += len(streets) - len(matches)
+
+            for street, indexes in streets.items():
+                street_match = self._to_street_match(matches.get(street))
+                for idx in indexes:
+                    results[idx] = street_match
+                    snapshot.match_cache.put(keys[idx], street_match)
+
+        return results
+
+    def check_location(self, item: 'FeedItem', match: StreetMatch) -> GeoCheck:
+        """
+        Check a listing's coordinates against the polygons in the streets file.
+
+        For a supported street with a constraint, checks the area where the constraint
+        holds. For an unsupported street, checks whether the listing is in one of the
+        city's neighborhoods anyway. A supported street without a constraint is INSIDE.
+
+        Returns:
+            UNKNOWN when there are no coordinates or polygon to decide by, or the listing
+            is too close to a polygon's edge to decide automatically
+        """
+        if match.is_allowed and not match.constraint:
+            return GeoCheck.INSIDE
+        lat, lon = item.location.latitude, item.location.longitude
+        if lat is None or lon is None:
+            return GeoCheck.UNKNOWN
+
+        snapshot = self._snapshot
+        geo = snapshot.index.geo
+        if match.is_allowed:
+            return geo.check_constraint(self._normalize_text(match.city), match.street, lat, lon)
+        city_key = self._resolve_city(snapshot, self._normalize_text(item.location.city))
+        if city_key is None:
+            return GeoCheck.UNKNOWN
+        return geo.check_neighborhoods(city_key, lat, lon)
+
+    def neighborhoods_at(self, item: 'FeedItem') -> List[str]:
+        """Neighborhoods from the streets file whose polygon contains the listing."""
+        lat, lon = item.location.latitude, item.location.longitude
+        snapshot = self._snapshot
+        city_key = self._resolve_city(snapshot, self._normalize_text(item.location.city))
+        if lat is None or lon is None or city_key is None:
+            return []
+        return snapshot.index.geo.neighborhoods_at(city_key, lat, lon)
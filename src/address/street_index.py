@@ -0,0 +1,216 @@
+"""
+Compiled lookup structures for AddressMatcher and their on-disk artifact.
+
+The artifact lets the matcher skip JSON parsing, normalization and fuzzy index building
+at startup. It is a small fixed header followed by a pickled StreetIndex:
+
+    magic (6 bytes) | format version (uint16) | source hash (32 bytes) | payload
+
+The source hash covers the streets JSON, the normalization tables in utils and the fuzzy
+match threshold, which the pickled fuzzy indexes keep, so changing any of them rebuilds
+the index.
+
+Compile it ahead of time with:
+    python -m src.address.street_index consts/supported_streets.json
+"""
+import argparse
+import hashlib
+import logging
+import os
+import pickle
+import struct
+import sys
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .fuzzy_index import NGramIndex
+from .geo import GeoIndex, build_geo_index
+from .utils import normalization_digest
+
+ARTIFACT_MAGIC = b'Y2SIDX'
+# Bump whenever normalization or the payload layout changes
+ARTIFACT_VERSION = 4
+_HEADER = struct.Struct('<6sH32s')
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StreetIndex:
+    # normalized city -> {normalized street -> entry}
+    streets: Dict[str, Dict[str, dict]]
+    # normalized city -> approximate-match index over its normalized streets
+    fuzzy: Dict[str, NGramIndex]
+    source_hash: bytes = b''
+    # Neighborhood and constraint polygons, empty unless the streets file has them
+    geo: GeoIndex = field(default_factory=GeoIndex)
+
+
+@dataclass
+class StreetIndexDiff:
+    added: List[Tuple[str, str]] = field(default_factory=list)  # (city, street) keys
+    removed: List[Tuple[str, str]] = field(default_factory=list)
+    changed: List[Tuple[str, str]] = field(default_factory=list)  # Same key, new constraint or neighborhood
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+
+def hash_source(raw: bytes, threshold: float) -> bytes:
+    """Hash of the streets JSON, and the normalization tables and fuzzy threshold the index was built with."""
+    build_params = f"threshold={float(threshold)!r}\n".encode('utf-8')
+    return hashlib.sha256(normalization_digest() + build_params + raw).digest()
+
+def build_city_streets(
+    cities_data: List[dict],
+    normalize_city: Callable[[str], str],
+    normalize_street: Callable[[str], str],
+) -> Dict[str, Dict[str, dict]]:
+    """Build the normalized city -> {normalized street -> entry} lookup from the parsed streets JSON."""
+    streets: Dict[str, Dict[str, dict]] = {}
+    for city_data in cities_data:
+        city_name = city_data['city']
+        city_streets = streets.setdefault(normalize_city(city_name), {})
+        for neighborhood in city_data['neighborhoods']:
+            neighborhood_name = neighborhood['neighborhood']
+            for street in neighborhood['streets']:
+                street_name = street['name']
+                entry = {
+                    'name': street_name,
+                    'constraint': street.get('constraint'),
+                    'neighborhood': neighborhood_name,
+                    'city': city_name
+                }
+                city_streets[normalize_street(street_name)] = entry
+                # Alternative spellings resolve to the same entry as exact hits
+                for alias in street.get('aliases', []):
+                    city_streets.setdefault(normalize_street(alias), entry)
+    return streets
+
+def build_street_index(
+    cities_data: List[dict],
+    normalize_city: Callable[[str], str],
+    normalize_street: Callable[[str], str],
+    threshold: float,
+    source_hash: bytes = b'',
+) -> StreetIndex:
+    """Build the per-city lookup table and fuzzy index from the parsed streets JSON."""
+    streets = build_city_streets(cities_data, normalize_city, normalize_street)
+    fuzzy = {city: NGramIndex(city_streets, threshold=threshold) for city, city_streets in streets.items()}
+    geo = build_geo_index(cities_data, normalize_city)
+    return StreetIndex(streets=streets, fuzzy=fuzzy, source_hash=source_hash, geo=geo)
+
+def update_street_index(
+    index: StreetIndex,
+    streets: Dict[str, Dict[str, dict]],
+    threshold: float,
+    source_hash: bytes = b'',
+    geo: Optional[GeoIndex] = None,
+) -> Tuple[StreetIndex, StreetIndexDiff]:
+    """
+    Build a new StreetIndex for an updated lookup table, reusing what didn't change.
+
+    The given index is never modified, so readers holding it keep a consistent view.
+    Unchanged cities share their lookup and fuzzy index with it, and a changed city's
+    fuzzy index is a copy with only the added and removed streets applied. The polygons
+    are small and are replaced as a whole by `geo`.
+
+    Returns:
+        The new index and the streets that were added, removed or changed
+    """
+    diff = StreetIndexDiff()
+    fuzzy: Dict[str, NGramIndex] = {}
+    for city, city_streets in streets.items():
+        old_streets = index.streets.get(city)
+        if old_streets is None:
+            diff.added.extend((city, street) for street in city_streets)
+            fuzzy[city] = NGramIndex(city_streets, threshold=threshold)
+            continue
+
+        added = [street for street in city_streets if street not in old_streets]
+        removed = [street for street in old_streets if street not in city_streets]
+        diff.added.extend((city, street) for street in added)
+        diff.removed.extend((city, street) for street in removed)
+        diff.changed.extend(
+            (city, street) for street, entry in city_streets.items()
+            if street in old_streets and old_streets[street] != entry
+        )
+
+        if added or removed:
+            city_index = index.fuzzy[city].copy()
+            for street in removed:
+                city_index.remove(street)
+            for street in added:
+                city_index.add(street)
+            fuzzy[city] = city_index
+        else:
+            fuzzy[city] = index.fuzzy[city]
+
+    for city, old_streets in index.streets.items():
+        if city not in streets:
+            diff.removed.extend((city, street) for street in old_streets)
+
+    new_index = StreetIndex(streets=streets, fuzzy=fuzzy, source_hash=source_hash, geo=geo or GeoIndex())
+    return new_index, diff
+
+def get_index_path(json_file_path: str) -> str:
+    """Get the artifact path for a streets file, in the user's app dir when running compiled."""
+    file_name = os.path.splitext(os.path.basename(json_file_path))[0] + '.idx'
+    if getattr(sys, 'frozen', False):
+        app_dir = os.path.join(os.path.expanduser('~'), '.Yad2Scraper')
+        os.makedirs(app_dir, exist_ok=True)
+        return os.path.join(app_dir, file_name)
+    return os.path.join(os.path.dirname(os.path.abspath(json_file_path)), file_name)
+
+def save_artifact(index: StreetIndex, index_path: str) -> None:
+    """Write the artifact atomically, so a concurrent reader never sees a partial file."""
+    tmp_path = f"{index_path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(ARTIFACT_MAGIC, ARTIFACT_VERSION, index.source_hash))
+        pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, index_path)
+
+def load_artifact(index_path: str, expected_hash: bytes) -> Optional[StreetIndex]:
+    """
+    Load an artifact.
+
+    Returns:
+        The StreetIndex, or None if the file is missing, from another format version,
+        or was compiled from a different version of the streets JSON or normalization tables
+    """
+    try:
+        with open(index_path, 'rb') as f:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                return None
+            magic, version, source_hash = _HEADER.unpack(header)
+            if magic != ARTIFACT_MAGIC or version != ARTIFACT_VERSION or source_hash != expected_hash:
+                logger.info(f"Street index {index_path} is stale, rebuilding")
+                return None
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Failed to load street index {index_path}: {str(e)}")
+        return None
+
+def compile_streets(json_file_path: str, index_path: Optional[str] = None) -> str:
+    """Compile a streets JSON file into an artifact. Returns the artifact path."""
+    # Imported here to avoid a circular import, the matcher owns normalization
+    from .matcher import AddressMatcher
+
+    index_path = index_path or get_index_path(json_file_path)
+    AddressMatcher(json_file_path, index_path=index_path, rebuild=True)
+    return index_path
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile supported streets into a street index artifact")
+    parser.add_argument('json_file', help="Path of supported_streets.json")
+    parser.add_argument('--output', help="Artifact path, defaults to the JSON path with an .idx extension")
+    args = parser.parse_args()
+
+    index_path = compile_streets(args.json_file, args.output)
+    print(f"Wrote {index_path}")
+
+if __name__ == "__main__":
+    main()
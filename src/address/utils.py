@@ -1,17 +1,65 @@
+import hashlib
+from typing import Dict, Optional
+
+# Quotes and Hebrew abbreviation marks: geresh/gershayim (׳ ״) and the ASCII and
+# typographic quotes Yad2 uses in their place, plus trailing abbreviation dots
+_REMOVED_CHARS = '"\'`׳״‘’“”.'
+# Hyphens, the Hebrew maqaf and dashes separate words ("תל אביב-יפו")
+_SPACE_CHARS = '-־‐–—_,/'
+# Niqqud and cantillation marks (U+0591-U+05C7), except the maqaf (U+05BE)
+_DIACRITICS = ''.join(chr(c) for c in range(0x0591, 0x05C8) if c != 0x05BE)
+
+_TRANSLATION_TABLE = str.maketrans(
+    {**{c: None for c in _REMOVED_CHARS + _DIACRITICS}, **{c: ' ' for c in _SPACE_CHARS}}
+)
+
+# Street type abbreviations, applied after quotes are removed ("שד'" -> "שד").
+# An empty expansion drops the word, "רח' הרצל" and "הרצל" are the same street.
+STREET_ABBREVIATIONS: Dict[str, str] = {
+    'שד': 'שדרות',
+    'שדר': 'שדרות',
+    'רח': '',
+    'רחוב': '',
+    'סמ': 'סמטת',
+    'סמט': 'סמטת',
+    'כיכ': 'כיכר',
+    'ככר': 'כיכר',
+    'פרופ': 'פרופסור',
+}
+
+
 def normalize_hebrew_text(text: str) -> str:
     """
     Normalize Hebrew text by removing special characters and diacritics.
-    
+
     Args:
         text: The Hebrew text to normalize
-        
+
     Returns:
         Normalized text string
     """
-    # Remove quotes and special characters
-    normalized = text.replace('"', '').replace('\'', '')
-    # Remove Hebrew abbreviation marks
-    normalized = normalized.replace('\"', '').replace('"', '')
-    # Remove any double spaces
-    normalized = ' '.join(normalized.split())
-    return normalized.strip() 
\ No newline at end of file
+    # split() also collapses the spaces left by the translation
+    return ' '.join(text.translate(_TRANSLATION_TABLE).split())
+
+def normalize_street_name(street_name: str, abbreviations: Optional[Dict[str, str]] = None) -> str:
+    """
+    Normalize a street name and expand street type abbreviations.
+
+    Args:
+        street_name: The street name to normalize
+        abbreviations: Abbreviation table, defaults to STREET_ABBREVIATIONS
+
+    Returns:
+        Normalized street name
+    """
+    abbreviations = STREET_ABBREVIATIONS if abbreviations is None else abbreviations
+    words = normalize_hebrew_text(street_name).split()
+    # Only the leading word is a street type, "שד" later in the name is part of it
+    if len(words) > 1 and words[0] in abbreviations:
+        words[0] = abbreviations[words[0]]
+    return ' '.join(word for word in words if word)
+
+def normalization_digest() -> bytes:
+    """Digest of the translation and abbreviation tables, changes whenever normalization does."""
+    tables = repr((sorted(_TRANSLATION_TABLE.items()), sorted(STREET_ABBREVIATIONS.items())))
+    return hashlib.sha256(tables.encode('utf-8')).digest()
@@ -1,44 +1,168 @@
 import logging
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Collection, Dict, List, Optional, Tuple
 
 from src.address import AddressMatcher
-from src.cli.input_handler import display_feed_stats, get_valid_url
+from src.cli.input_handler import (
+    display_deferred_crawls,
+    display_favorites_reconciliation,
+    display_feed_stats,
+    display_pipeline_metrics,
+    display_recategorize_result,
+    display_run_overlap,
+    get_valid_url,
+)
 from src.db.database import Database
+from src.db.listings_repository import ListingsRepository
+from src.db.price_history_repository import PriceHistoryRepository
 from src.db.saved_items_repository import SavedItemsRepository
+from src.db.sync_state_repository import SyncStateRepository
+from src.db.work_queue_repository import TASK_ITEM, TASK_NOTIFY, TASK_URL, WorkQueueRepository
+from src.db.write_behind import WriteBehindQueue
 from src.mail_sender.init_credentials import init_gmail_credentials
+from src.processor.budget import CrawlBudget, Deadline
+from src.processor.dedup import RunRegistry
+from src.processor.favorites import reconcile_favorites
 from src.processor.feed_processor import categorize_feed_items, process_feed_items
+from src.processor.models import DeferredCrawl
+from src.processor.pipeline import Handoff, Lease, Pipeline, Stage
+from src.processor.priority import build_scorer
+from src.processor.recategorize import recategorize_listings
+from src.processor.triage import DEFAULT_RULES, TriageRules
+from src.processor.watermark import MAX_CRAWL_PAGES, CrawlWatermark, load_watermark, save_watermark
 from src.utils.console import prompt_yes_no
 from src.utils.text_formatter import format_hebrew
 from src.yad2.client import Yad2Client
+from src.yad2.models import FeedItem, FeedPage
+
+# Sync state key of the favorites badge count and saved items checksum after the last sync
+FAVORITES_SYNC_KEY = 'favorites'
+
+# Approved listings waiting for their email; the browser moves on while they are sent
+NOTIFY_QUEUE_SIZE = 20
+
+# Why a search URL is deferred when its page shows a CAPTCHA nobody is there to solve
+CAPTCHA_REASON = "captcha"
+
+
+@dataclass
+class _Crawl:
+    """Pagination of one search URL."""
+    name: str
+    url: str  # The search URL, of the first page
+    watermark: CrawlWatermark
+    total_pages: Optional[int] = None  # Looked up once a page has listings we haven't handled
+    page: int = 1  # The next page to read
+    done: bool = False
+    deferred: Optional[str] = None  # Why the crawl ran out of budget before its last page
+    deferred_items: List[str] = field(default_factory=list)  # Listings left unenriched
+    started_at: Optional[float] = None  # time.monotonic() when its first page was requested
+    pages_read: int = 0
+    enrichments: int = 0
+
+    @property
+    def label(self) -> str:
+        return self.name + (f" page {self.page}" if self.page > 1 else "")
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at if self.started_at is not None else 0.0
+
+    def defer(self, reason: str, page: Optional[int] = None) -> None:
+        """Stop the crawl, leaving it for a later run from page, by default the next page."""
+        if self.deferred is None:
+            self.deferred = reason
+            self.page = page or self.page
+        self.done = True
+
+
+@dataclass
+class _FeedBatch:
+    """Search pages' listings, holding the browser until they are all handled."""
+    name: str
+    items: List[FeedItem]
+    lease: Lease
+    # Search URL -> IDs of every card on its page, including cards of listings already
+    # handled in this run, which were left unparsed
+    page_ids: Dict[str, List[str]]
+    crawls: List[_Crawl]  # Checkpointed once the batch is handled
+    tabs: List[str] = field(default_factory=list)  # Tabs showing the pages, closed once handled
 
 
 class Yad2ScraperApp:
-    def __init__(self, client: Yad2Client, address_matcher: AddressMatcher, search_urls: dict):
+    def __init__(
+        self,
+        client: Yad2Client,
+        address_matcher: AddressMatcher,
+        search_urls: dict,
+        rules: Optional[TriageRules] = None,
+        parallel_tabs: int = 1,
+        budget: Optional[CrawlBudget] = None,
+        deadline_seconds: Optional[float] = None
+    ):
         # Initialize database
         self.db = Database()
         self.db.create_tables()
-        self.saved_items_repo = SavedItemsRepository(self.db.get_session())
+        session = self.db.get_session()
+        # Writes are committed on a background thread so scraping never waits for disk syncs
+        self.db_writer = WriteBehindQueue(self.db.get_session).start()
+        self.saved_items_repo = SavedItemsRepository(session, self.db_writer)
+        self.listings_repo = ListingsRepository(session, self.db_writer)
+        self.price_history_repo = PriceHistoryRepository(session, self.db_writer)
+        self.sync_state_repo = SyncStateRepository(session, self.db_writer)
+        self.work_queue = WorkQueueRepository(session, self.db_writer)
         
         # Initialize client
         self.client = client
         self.client.saved_items_repo = self.saved_items_repo  # Set the repo on the existing client
+        self.client.listings_repo = self.listings_repo
         self.address_matcher = address_matcher
         self.search_urls = search_urls
         self.feed_items = None
+        self.rules = rules or TriageRules(DEFAULT_RULES)
+        self.auto = False
+        self.parallel_tabs = max(1, parallel_tabs)  # Search URLs loaded side by side by Go to all URLs
+        self.budget = budget or CrawlBudget()  # Of each search URL in Go to all URLs
+        self.deadline_seconds = deadline_seconds  # Of a whole Go to all URLs run
+        self.escalated_items: List[FeedItem] = []
 
-    def run(self) -> None:
-        """Run the main application loop."""
+    def run(self, resume: bool = False) -> None:
+        """Run the main application loop, after resuming an interrupted Go to all URLs run if resume is set."""
         print("Yad2 Apartment Scraper")
         print("=====================")
         
-        while True:
-            try:
-                if not self._process_menu_choice():
-                    break
-            except Exception as e:
-                logging.error(f"Error: {str(e)}", exc_info=True)
-                print(f"Error: {format_hebrew(str(e))}")
-                if not prompt_yes_no("\nWould you like to continue?"):
-                    break
+        try:
+            if resume and not self._run_action(lambda: self._handle_go_to_all_urls(resume=True)):
+                return
+            while self._run_action(self._process_menu_choice):
+                pass
+        finally:
+            self.close()
+
+    def _run_action(self, action: Callable[[], Optional[bool]]) -> bool:
+        """Run a menu action, logging an error instead of ending the app. Returns False if should exit."""
+        try:
+            return action() is not False
+        except Exception as e:
+            logging.error(f"Error: {str(e)}", exc_info=True)
+            print(f"Error: {format_hebrew(str(e))}")
+            return prompt_yes_no("\nWould you like to continue?")
+
+    def run_auto(self, resume: bool = False) -> None:
+        """Go through all search URLs without prompts, leaving undecided listings for a manual run."""
+        self.auto = True
+        try:
+            self._handle_go_to_all_urls(resume)
+            print(f"\n{len(self.escalated_items)} listings left for manual review")
+            for item in self.escalated_items:
+                print(f"  {format_hebrew(item.location.street)}, {format_hebrew(item.location.city)} - {item.url}")
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """Flush pending database writes."""
+        self.db_writer.close()
 
     def _process_menu_choice(self) -> bool:
         """Process user menu choice. Returns False if should exit."""
@@ -49,9 +173,10 @@ class Yad2ScraperApp:
         print("4. Store saved items")
         print("5. Go to all URLs")
         print("6. Refresh Gmail credentials")
-        print("7. Exit")
+        print("7. Re-categorize stored listings")
+        print("8. Exit")
         
-        choice = input("\nEnter your choice (1-7): ").strip()
+        choice = input("\nEnter your choice (1-8): ").strip()
         
         if choice == '1':
             self._handle_new_url()
@@ -66,34 +191,64 @@ class Yad2ScraperApp:
         elif choice == '6':
             self._handle_refresh_credentials()
         elif choice == '7':
+            self._handle_recategorize()
+        elif choice == '8':
             print("Goodbye!")
             return False
         else:
-            print("Invalid choice. Please enter a number between 1 and 7.")
+            print("Invalid choice. Please enter a number between 1 and 8.")
         
         return True
 
-    def _handle_store_saved_items(self) -> None:
-        """Handle storing saved items from Yad2 to local DB."""
+    def _handle_store_saved_items(self) -> bool:
+        """Handle storing saved items from Yad2 to local DB. Returns True if they were stored."""
         print("\nNavigating to saved items page...")
         if not self.client.navigate_to_saved_items():
             print("Failed to navigate to saved items page")
-            return
+            return False
         
         items = self.client.get_saved_items()
         if not items:
             print("No items found on the saved items page")
-            return
+            return False
         
-        count = 0
-        for item_id, url in items:  # Now we know items are tuples
-            try:
-                self.saved_items_repo.add_item(item_id, url)
-                count += 1
-            except Exception as e:
-                logging.error(f"Failed to store item {item_id}: {str(e)}")
+        try:
+            self.saved_items_repo.add_items(items)
+        except Exception as e:
+            logging.error(f"Failed to store {len(items)} saved items: {str(e)}")
+            print("Failed to store saved items in the database")
+            return False
         
-        print(f"\nStored {count} items in the database")
+        print(f"\nStored {len(items)} items in the database")
+        self._record_favorites_state()
+        return True
+
+    def _sync_saved_items(self) -> bool:
+        """
+        Store saved items from Yad2, unless nothing changed since the last sync: the favorites
+        badge shows the same count and the saved items in the DB are the same.
+
+        Returns:
+            bool: True if the DB is known to be in sync with the favorites
+        """
+        count = self.client.get_favorites_count()
+        last_state = self.sync_state_repo.get(FAVORITES_SYNC_KEY)
+        if count is not None and last_state == {'count': count, 'checksum': self.saved_items_repo.checksum()}:
+            print(f"\nFavorites unchanged ({count} saved items), skipping the saved items page")
+            logging.info("Favorites badge and saved items unchanged since the last sync")
+            return True
+        return self._handle_store_saved_items()
+
+    def _record_favorites_state(self) -> None:
+        """Remember the badge count and saved items as in sync, for _sync_saved_items."""
+        count = self.client.get_favorites_count()
+        if count is None:
+            logging.info("Favorites count unknown, the next run will sync saved items")
+            return
+        try:
+            self.sync_state_repo.set(FAVORITES_SYNC_KEY, {'count': count, 'checksum': self.saved_items_repo.checksum()})
+        except Exception as e:
+            logging.error(f"Failed to store favorites sync state: {str(e)}")
 
     def _handle_new_url(self) -> None:
         url = get_valid_url()
@@ -107,39 +262,488 @@ class Yad2ScraperApp:
         self.feed_items = None
 
 
-    def _handle_go_to_all_urls(self) -> None:
-        self._handle_store_saved_items()
-        for name, url in self.search_urls.items():
-            print(f"Navigating to URL {name}...")
-            self.client.navigate_to(url)
-            self._handle_get_feed()
-            self._handle_process_feed()
-        print("Done going through all URLs!")
-        return False
+    def _handle_go_to_all_urls(self, resume: bool = False) -> None:
+        """
+        Go through every search URL as a pipeline: fetch -> match -> triage -> notify.
+
+        The browser is shared by fetching and triage, and saving a listing clicks it on its
+        search page, so a search page is only left once its listings are handled. That also
+        keeps the database session to one stage at a time. Emails are sent on their own
+        thread while the browser moves on to the next search page.
+
+        Each search URL is paginated until a page holds a listing handled by an earlier
+        run, per its crawl watermark, or MAX_CRAWL_PAGES. Its first crawl, without a
+        watermark yet, only reads the first page and seeds the watermark from it.
+
+        With parallel_tabs > 1, search URLs are crawled in groups of that many: the group's
+        pages load side by side in tabs and their listings are handled as one batch, so a
+        group takes about as long to load as its slowest page.
+
+        Progress is kept in the work queue: where each search URL's crawl is, the listings
+        handled and the emails not sent yet. With resume set, an interrupted run continues
+        from there instead of starting over. Interrupting a run stops every stage at its
+        next page or prompt; the pages being handled then are read again on resume.
+
+        A search URL that runs out of its budget, is reached after the run's deadline, or
+        shows a CAPTCHA while running unattended, is deferred: left in the work queue from
+        the first page it didn't finish. The run is unattended in auto mode or with a deadline;
+        the rest of the session still waits for CAPTCHAs to be solved.
+        """
+        previous_unattended = self.client.unattended
+        # Nobody is there to solve a CAPTCHA in auto mode, and waiting for one would overrun the
+        # deadline; pages showing one are deferred instead
+        self.client.unattended = self.auto or self.deadline_seconds is not None
+        try:
+            self._go_to_all_urls(resume)
+        finally:
+            self.client.unattended = previous_unattended
+
+    def _go_to_all_urls(self, resume: bool) -> None:
+        """The body of _handle_go_to_all_urls."""
+        deadline = Deadline(self.deadline_seconds)
+        registry = RunRegistry()
+        crawls_started: List[_Crawl] = []
+        entries = self._queue_run(resume, registry)
+        if resume and not entries:
+            self._finish_run()
+            return
+        in_sync = self._sync_saved_items()
+        # Loaded once, every batch's listings are scored against the same medians
+        medians = self._load_medians()
+        browser = Handoff()
+
+        def stopped() -> bool:
+            # The pipeline closes the browser's handoff when the run is interrupted
+            return browser.closed
+
+        def start(entries) -> List[_Crawl]:
+            # Watermarks are read through the session triage uses, so only while holding the browser
+            lease = browser.take()
+            if lease is None:
+                return []
+            try:
+                crawls = [self._start_crawl(*entry) for entry in entries]
+            finally:
+                lease.release()
+            crawls_started.extend(crawls)
+            return crawls
+
+        def fetch(entry, emit) -> None:
+            crawls = start([entry])
+            if not crawls:
+                return
+            crawl = crawls[0]
+            while not crawl.done:
+                lease = browser.take()
+                if lease is None:
+                    break
+                if crawl.done:
+                    # Deferred by triage while waiting for the browser
+                    lease.release()
+                    break
+                if not self._can_read_page(crawl, deadline):
+                    self._checkpoint([crawl])
+                    lease.release()
+                    break
+                try:
+                    print(f"Navigating to URL {crawl.label}...")
+                    self.client.navigate_to(self._crawl_page_url(crawl))
+                    url, feed_page = crawl.url, self._read_crawl_page(crawl, registry, stopped)
+                except Exception:
+                    lease.release()
+                    raise
+                if stopped():
+                    # Interrupted while reading the page, a resumed run reads it again
+                    lease.release()
+                    break
+                if feed_page.items:
+                    page_ids = {url: [item.item_id for item in feed_page.items] + feed_page.skipped_ids}
+                    emit(_FeedBatch(crawl.name, feed_page.items, lease, page_ids, [crawl]))
+                else:
+                    # Listings handled under other URLs count as handled for this one too
+                    self._advance_watermark(url, feed_page.skipped_ids)
+                    self._checkpoint([crawl])
+                    lease.release()
+
+        def fetch_in_tabs(entries, emit) -> None:
+            crawls = start(entries)
+            while any(not crawl.done for crawl in crawls):
+                lease = browser.take()
+                if lease is None:
+                    break
+                waiting = [crawl for crawl in crawls if not crawl.done]
+                active = [crawl for crawl in waiting if self._can_read_page(crawl, deadline)]
+                self._checkpoint([crawl for crawl in waiting if crawl.deferred])
+                if not active:
+                    lease.release()
+                    break
+                tabs = []
+                try:
+                    print(f"Opening {', '.join(crawl.label for crawl in active)} in tabs...")
+                    tabs = self.client.open_tabs([self._crawl_page_url(crawl) for crawl in active])
+                    pages = []
+                    for crawl, tab in zip(active, tabs):
+                        if stopped():
+                            break
+                        self.client.switch_to_tab(tab)
+                        pages.append((crawl.url, self._read_crawl_page(crawl, registry, stopped)))
+                except Exception:
+                    self._close_tabs(tabs)
+                    lease.release()
+                    raise
+                if stopped():
+                    # Interrupted while reading the pages, a resumed run reads them again
+                    self._close_tabs(tabs)
+                    lease.release()
+                    break
+                # Listings shown under several of the group's URLs are handled once
+                items = list({item.item_id: item for _, page in pages for item in page.items}.values())
+                page_ids = {url: [item.item_id for item in page.items] + page.skipped_ids for url, page in pages}
+                if items:
+                    name = ', '.join(crawl.name for crawl in active)
+                    emit(_FeedBatch(name, items, lease, page_ids, active, tabs))
+                else:
+                    for url, ids in page_ids.items():
+                        self._advance_watermark(url, ids)
+                    self._checkpoint(active)
+                    self._close_tabs(tabs)
+                    lease.release()
+
+        def match(batch: '_FeedBatch', emit) -> None:
+            self._store_feed(batch.items)
+            emit(batch)
+
+        def triage(batch: '_FeedBatch', emit) -> None:
+            # Listings shown by several of the batch's pages count against the first one
+            owners: Dict[str, _Crawl] = {}
+            for crawl in batch.crawls:
+                for item_id in batch.page_ids[crawl.url]:
+                    owners.setdefault(item_id, crawl)
+
+            def send(item: FeedItem) -> None:
+                self._queue_notification(item)
+                emit(item)
+
+            def enrich(item: FeedItem) -> Optional[FeedItem]:
+                crawl = owners[item.item_id]
+                reason = "the run's deadline passed" if deadline.expired else self.budget.enrichment_limit(
+                    crawl.elapsed, crawl.enrichments
+                )
+                if reason:
+                    # The page read last is the first one left unfinished
+                    crawl.defer(reason, page=crawl.page - 1)
+                    crawl.deferred_items.append(item.item_id)
+                    return None
+                crawl.enrichments += 1
+                return self.client.enrich_feed_item(item)
+
+            try:
+                self.feed_items = registry.claim(batch.items)
+                escalated_before = len(self.escalated_items)
+                if self.feed_items:
+                    self._handle_process_feed(send=send, enrich=enrich, medians=medians, stopped=stopped)
+                if stopped():
+                    # Interrupted part way, the listings left are handled when the pages are read again
+                    return
+                # Listings left for a manual or later run aren't handled yet
+                unhandled = {item.item_id for item in self.escalated_items[escalated_before:]}
+                unhandled.update(item_id for crawl in batch.crawls for item_id in crawl.deferred_items)
+                for url, ids in batch.page_ids.items():
+                    self._advance_watermark(url, [item_id for item_id in ids if item_id not in unhandled])
+                self._complete_tasks(TASK_ITEM, [item.item_id for item in batch.items if item.item_id not in unhandled])
+                self._checkpoint(batch.crawls)
+            finally:
+                release(batch)
+
+        def notify(item: FeedItem, emit) -> None:
+            try:
+                self.client.send_feed_item(item)
+            except Exception as e:
+                print(f"Error: Failed to send {item.url}: {str(e)}")
+                raise
+            self._complete_tasks(TASK_NOTIFY, [item.item_id])
+            emit(item)
+
+        def release(batch: '_FeedBatch') -> None:
+            self._close_tabs(batch.tabs)
+            batch.lease.release()
+
+        if self.parallel_tabs > 1:
+            inputs = [entries[i:i + self.parallel_tabs] for i in range(0, len(entries), self.parallel_tabs)]
+            first_stage = Stage('fetch', fetch_in_tabs)
+        else:
+            inputs, first_stage = entries, Stage('fetch', fetch)
+        pipeline = Pipeline([
+            first_stage,
+            Stage('match', match, queue_size=1, on_drop=release),
+            Stage('triage', triage, queue_size=1, on_drop=release),
+            Stage('notify', notify, queue_size=NOTIFY_QUEUE_SIZE),
+        ], handoffs=[browser])
+        try:
+            sent = pipeline.run(inputs)
+        except KeyboardInterrupt:
+            print("\nRun interrupted, start with --resume to continue where it stopped")
+            raise
+        self._finish_run()
+        if in_sync:
+            # The run's own likes went to both sides, so they are still in sync
+            self._record_favorites_state()
+        print(f"Done going through all URLs! Sent {len(sent)} listings")
+        display_run_overlap(registry)
+        display_deferred_crawls([
+            DeferredCrawl(crawl.name, crawl.page, crawl.deferred, crawl.deferred_items)
+            for crawl in crawls_started if crawl.deferred
+        ])
+        display_pipeline_metrics(pipeline.metrics, pipeline.elapsed)
+
+    def _queue_run(self, resume: bool, registry: RunRegistry) -> List[Tuple[str, str, int]]:
+        """
+        Queue a new run's search URLs, or pick up an interrupted run's remaining work.
+
+        Returns:
+            (name, search URL, first page to read) of each search URL to crawl
+        """
+        # The last run's final writes may still be queued
+        self.db_writer.flush()
+        if not resume:
+            if self.work_queue.has_pending():
+                print("Starting over, the interrupted run's progress is discarded")
+            self.work_queue.clear()
+            self.work_queue.add_many(TASK_URL, {
+                url: {'name': name, 'url': url, 'page': 1} for name, url in self.search_urls.items()
+            })
+            return [(name, url, 1) for name, url in self.search_urls.items()]
+
+        if not self.work_queue.has_pending():
+            print("No interrupted run to resume")
+            return []
+        self._send_pending_notifications()
+        # Listings handled before the interruption are skipped like ones seen under another URL
+        registry.seen.update(self.work_queue.done_keys(TASK_ITEM))
+        crawls = self.work_queue.pending(TASK_URL)
+        print(f"Resuming the interrupted run: {len(crawls)} search URLs left, "
+              f"{len(registry.seen)} listings already handled")
+        return [(crawl['name'], crawl['url'], crawl['page']) for crawl in crawls]
+
+    def _send_pending_notifications(self) -> None:
+        """Send the emails of listings approved before the run was interrupted."""
+        pending = self.work_queue.pending(TASK_NOTIFY)
+        if pending:
+            print(f"Sending {len(pending)} listings approved before the interruption...")
+        for task in pending:
+            item = self.listings_repo.get_item(task['item_id'])
+            if item is None:
+                logging.warning(f"Listing {task['item_id']} to send isn't stored, skipping it")
+            else:
+                try:
+                    self.client.send_feed_item(item)
+                except Exception as e:
+                    print(f"Error: Failed to send {item.url}: {str(e)}")
+                    continue
+            self._complete_tasks(TASK_NOTIFY, [task['item_id']])
+
+    def _queue_notification(self, item: FeedItem) -> None:
+        """Store an approved listing as enriched, and a task to send it, so a resumed run can send it."""
+        try:
+            self.listings_repo.upsert_item(item)
+            self.work_queue.add(TASK_NOTIFY, item.item_id, {'item_id': item.item_id})
+        except Exception as e:
+            logging.error(f"Failed to queue listing {item.item_id} to send: {str(e)}")
+
+    def _complete_tasks(self, kind: str, keys: List[str]) -> None:
+        try:
+            self.work_queue.complete(kind, keys)
+        except Exception as e:
+            logging.error(f"Failed to record {kind} tasks as done: {str(e)}")
+
+    def _can_read_page(self, crawl: '_Crawl', deadline: Deadline) -> bool:
+        """Whether the crawl may read its next page, deferring it if it can't."""
+        reason = "the run's deadline passed" if deadline.expired else self.budget.page_limit(
+            crawl.elapsed, crawl.pages_read
+        )
+        if reason:
+            print(f"Deferring {crawl.label}: {reason}")
+            crawl.defer(reason)
+            return False
+        if crawl.started_at is None:
+            crawl.started_at = time.monotonic()
+        crawl.pages_read += 1
+        return True
+
+    def _checkpoint(self, crawls: List['_Crawl']) -> None:
+        """Remember the next page of each crawl, once the pages it read were handled."""
+        for crawl in crawls:
+            try:
+                payload = {'name': crawl.name, 'url': crawl.url, 'page': crawl.page}
+                # Deferred crawls stay pending, for a resumed run to finish
+                self.work_queue.update(TASK_URL, crawl.url, payload, done=crawl.done and not crawl.deferred)
+            except Exception as e:
+                logging.error(f"Failed to checkpoint the crawl of {crawl.url}: {str(e)}")
+
+    def _finish_run(self) -> None:
+        """Forget the run's work queue, unless some of it failed and can be retried with resume."""
+        self.db_writer.flush()
+        if self.work_queue.has_pending():
+            print("Some search URLs or emails weren't finished, start with --resume to continue them")
+        else:
+            self.work_queue.clear()
+
+    def _start_crawl(self, name: str, url: str, page: int = 1) -> '_Crawl':
+        # URLs that name a page themselves are crawled as just that page
+        total_pages = 1 if self.client.is_paged_url(url) else None
+        return _Crawl(name, url, load_watermark(self.sync_state_repo, url), total_pages, page)
+
+    def _crawl_page_url(self, crawl: '_Crawl') -> str:
+        return self.client.page_url(crawl.url, crawl.page) if crawl.page > 1 else crawl.url
+
+    def _read_crawl_page(
+        self,
+        crawl: '_Crawl',
+        registry: RunRegistry,
+        stopped: Optional[Callable[[], bool]] = None
+    ) -> FeedPage:
+        """Read the crawl's page from the browser and move the crawl on to its next page, if any."""
+        feed_page = self._fetch_feed(skip_ids=registry.seen, stopped=stopped)
+        if stopped and stopped():
+            return feed_page
+        if feed_page.captcha:
+            # Left for a later run from this page
+            print(f"Deferring {crawl.label}: {CAPTCHA_REASON}")
+            crawl.defer(CAPTCHA_REASON)
+            return feed_page
+        registry.record_skipped(feed_page.skipped_ids)
+        has_cards = bool(feed_page.items or feed_page.skipped_ids)
+        # Older pages only matter until the crawl reaches a listing an earlier run handled
+        up_to_date = crawl.watermark.reaches(feed_page.items)
+        if crawl.total_pages is None and has_cards and not up_to_date:
+            if crawl.watermark.crawled_at is None:
+                # A first crawl only seeds the watermark instead of going through every older listing
+                crawl.total_pages = 1
+            else:
+                crawl.total_pages = min(self.client.get_total_pages(), MAX_CRAWL_PAGES)
+        if up_to_date:
+            print(f"Page {crawl.page} reaches listings handled on {crawl.watermark.crawled_at:%d/%m %H:%M}, "
+                  "skipping older pages")
+        crawl.page += 1
+        crawl.done = not has_cards or up_to_date or crawl.total_pages is None or crawl.page > crawl.total_pages
+        return feed_page
+
+    def _close_tabs(self, tabs: List[str]) -> None:
+        if not tabs:
+            return
+        try:
+            self.client.close_tabs(tabs)
+        except Exception as e:
+            logging.error(f"Failed to close tabs: {str(e)}")
+
+    def _advance_watermark(self, url: str, item_ids: List[str]) -> None:
+        try:
+            watermark = load_watermark(self.sync_state_repo, url).advance(item_ids)
+            save_watermark(self.sync_state_repo, url, watermark)
+        except Exception as e:
+            logging.error(f"Failed to store crawl watermark: {str(e)}")
 
     def _handle_get_feed(self) -> None:
+        self.feed_items = self._fetch_feed().items
+        if self.feed_items:
+            self._store_feed(self.feed_items)
+
+    def _fetch_feed(
+        self,
+        skip_ids: Optional[Collection[str]] = None,
+        stopped: Optional[Callable[[], bool]] = None
+    ) -> FeedPage:
+        """
+        Read the current feed page and sync its saved state with the DB.
+
+        Args:
+            skip_ids: IDs of listings not to parse, see Yad2Client.get_feed_page
+            stopped: Checked once the page is read; if it returns True the saved state isn't synced
+        """
         print("Fetching feed items...")
-        self.feed_items = self.client.get_feed_items()
-        if not self.feed_items:
-            logging.warning("No feed items found")
-            print("No feed items found")
-            return
-        
-        # Update is_saved flag based on DB state
-        for item in self.feed_items:
-            if self.saved_items_repo.is_saved(item.item_id):
-                item.is_saved = True
+        feed_page = self.client.get_feed_page(skip_ids)
+        if stopped and stopped():
+            # Interrupted, syncing would click like buttons after the user asked to stop
+            return feed_page
+        if not feed_page.items:
+            if not feed_page.skipped_ids and not feed_page.captcha:
+                logging.warning("No feed items found")
+                print("No feed items found")
+            return feed_page
+
+        # Sync saved state with the DB while the browser is still on the page, so every
+        # item saved on either side is marked as saved
+        reconciliation = reconcile_favorites(feed_page.items, self.client, self.saved_items_repo)
+        if reconciliation.db_only or reconciliation.yad2_only:
+            display_favorites_reconciliation(reconciliation)
+        return feed_page
+
+    def _store_feed(self, feed_items: List[FeedItem]) -> None:
+        """Store the listings and their prices, and match their streets."""
+        try:
+            self.listings_repo.upsert_items(feed_items)
+            price_drops = self.price_history_repo.record_prices(feed_items)
+            if price_drops:
+                print(f"Price dropped for {len(price_drops)} listings since the last crawl")
+        except Exception as e:
+            logging.error(f"Failed to store feed items: {str(e)}")
         
-        categorized_feed = categorize_feed_items(self.feed_items, self.address_matcher)
+        categorized_feed = categorize_feed_items(feed_items, self.address_matcher)
+        try:
+            self.listings_repo.update_categorizations(
+                {item.item_id: item.street_match for item in feed_items if item.street_match}
+            )
+        except Exception as e:
+            logging.error(f"Failed to store street categorizations: {str(e)}")
+        logging.info(f"Street match cache: {self.address_matcher.cache_stats}")
+        logging.info(f"Street matches: {self.address_matcher.match_stats}")
         display_feed_stats(categorized_feed)
 
-    def _handle_process_feed(self) -> None:
+    def _handle_process_feed(
+        self,
+        send: Optional[Callable[[FeedItem], None]] = None,
+        enrich: Optional[Callable[[FeedItem], Optional[FeedItem]]] = None,
+        medians: Optional[Dict[Tuple[str, str], float]] = None,
+        stopped: Optional[Callable[[], bool]] = None
+    ) -> None:
         if self.feed_items is None:
             print("No feed items available. Please get feed items first.")
             return
             
         items_to_process = [item for item in self.feed_items if not item.is_saved]
-        process_feed_items(items_to_process, self.address_matcher, self.client, self.saved_items_repo)
+        try:
+            scorer = build_scorer(self.listings_repo, items_to_process, medians)
+        except Exception as e:
+            logging.error(f"Failed to load listing priorities: {str(e)}")
+            scorer = None
+        escalated = process_feed_items(
+            items_to_process,
+            self.address_matcher,
+            self.client,
+            rules=self.rules,
+            auto=self.auto,
+            send=send,
+            scorer=scorer,
+            enrich=enrich,
+            stopped=stopped
+        )
+        self.escalated_items.extend(escalated)
+
+    def _load_medians(self) -> Optional[Dict[Tuple[str, str], float]]:
+        """Price per m² medians for scoring listings, None if they can't be loaded."""
+        try:
+            return self.listings_repo.price_per_sqm_medians()
+        except Exception as e:
+            logging.error(f"Failed to load price per m² medians: {str(e)}")
+            return None
+
+    def _handle_recategorize(self) -> None:
+        """Match stored listings against the current supported streets, e.g. after adding streets."""
+        print("\nRe-categorizing stored listings...")
+        # Listings from the last crawl may still be queued
+        self.db_writer.flush()
+        result = recategorize_listings(self.listings_repo, self.address_matcher)
+        display_recategorize_result(result)
 
     def _handle_refresh_credentials(self) -> None:
         """Handle refreshing Gmail credentials."""
@@ -1,8 +1,11 @@
 import logging
-from typing import Optional
+from typing import List, Optional
 from urllib.parse import urlparse
 
-from src.processor.models import CategorizedFeed
+from src.processor.dedup import RunRegistry
+from src.processor.models import CategorizedFeed, DeferredCrawl, FavoritesReconciliation, RecategorizeResult
+from src.processor.pipeline import StageMetrics
+from src.utils.text_formatter import format_hebrew
 
 
 def validate_yad2_url(url: str) -> bool:
@@ -14,6 +17,7 @@ def validate_yad2_url(url: str) -> bool:
         logging.error(f"Failed to validate URL: {str(e)}")
         return False
 
+
 def get_valid_url() -> Optional[str]:
     """Prompt user for a valid Yad2 URL."""
     while True:
@@ -31,6 +35,7 @@ def get_valid_url() -> Optional[str]:
             logging.warning("User terminated input with EOF")
             return None
 
+
 def display_feed_stats(categorized_feed: CategorizedFeed):
     """Display statistics about categorized feed items."""
     stats = categorized_feed.stats
@@ -38,4 +43,56 @@ def display_feed_stats(categorized_feed: CategorizedFeed):
     print(f"\nFound {stats['total']} items:")
     print(f"  • {stats['supported_new']} new listings from supported streets")
     print(f"  • {stats['unsupported_new']} new listings from unsupported streets")
-    print(f"  • {stats['saved']} saved listings (will be skipped)") 
\ No newline at end of file
+    print(f"  • {stats['saved']} saved listings (will be skipped)") 
+
+
+def display_favorites_reconciliation(result: FavoritesReconciliation):
+    """Display how the saved items in the DB and on Yad2 were brought in line."""
+    print(f"\nSynced saved items: {result.fixed} fixed, {len(result.both)} already saved in both")
+    if result.db_only:
+        print(f"  • {len(result.db_only) - len(result.failed_likes)}/{len(result.db_only)} saved to Yad2")
+    if result.yad2_only:
+        print(f"  • {len(result.yad2_only)} saved to the database")
+
+
+def display_recategorize_result(result: RecategorizeResult):
+    """Display the outcome of re-categorizing stored listings."""
+    print(f"\nRe-categorized {result.scanned} stored listings, {result.changed} changed:")
+    print(f"  • {len(result.newly_supported)} previously unsupported listings are now supported")
+    print(f"  • {len(result.newly_unsupported)} previously supported listings are no longer supported")
+    for item in result.newly_supported:
+        print(f"    {format_hebrew(item.location.street)}, {format_hebrew(item.location.city)} - {item.url}")
+
+
+def display_pipeline_metrics(metrics: List[StageMetrics], elapsed: float):
+    """Display how busy each pipeline stage was."""
+    print(f"\nFinished in {elapsed:.1f}s:")
+    for stage in metrics:
+        line = (
+            f"  • {stage.name}: {stage.processed} handled, {stage.utilization(elapsed):.0%} busy, "
+            f"max queue {stage.max_queue_depth}"
+        )
+        if stage.errors or stage.dropped:
+            line += f", {stage.errors} failed, {stage.dropped} dropped"
+        print(line)
+
+
+def display_run_overlap(registry: RunRegistry):
+    """Display how much work overlapping search URLs would have repeated."""
+    if not registry.skipped:
+        return
+    print(f"\n{registry.skipped} listings appeared under more than one search URL:")
+    print(f"  • {registry.skipped_parsing} not parsed again")
+    print(f"  • {registry.skipped_processing} not processed again")
+
+
+def display_deferred_crawls(deferred: List[DeferredCrawl]):
+    """Display the search URLs a run left unfinished because they ran out of budget."""
+    if not deferred:
+        return
+    print(f"\n{len(deferred)} search URLs were left unfinished, start with --resume to continue them:")
+    for crawl in deferred:
+        line = f"  • {crawl.name} from page {crawl.page}: {crawl.reason}"
+        if crawl.deferred_items:
+            line += f", {len(crawl.deferred_items)} listings not enriched"
+        print(line)
@@ -1,11 +1,29 @@
 import os
 import sys
+from contextlib import contextmanager
+from typing import Dict, Optional
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect, text
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 
 from .models import Base
 
+# Pragmas applied to every new SQLite connection when the performance profile is enabled.
+# WAL lets readers run alongside the writer, and synchronous=NORMAL is durable in WAL mode
+# except for the last transactions before a power loss.
+PERFORMANCE_PRAGMAS: Dict[str, object] = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 64 * 1024 * 1024,
+    'cache_size': -16 * 1024,  # Negative value means KiB, i.e. 16 MiB
+    'busy_timeout': 5000,  # Milliseconds
+    'temp_store': 'MEMORY',
+}
+
+POOL_SIZE = 5
+POOL_MAX_OVERFLOW = 5
+
 
 def get_db_path():
     """Get the appropriate database file path that works both in dev and compiled mode"""
@@ -20,14 +38,74 @@ def get_db_path():
     except Exception:
         return 'yad2scraper.db'
 
+def apply_pragmas(dbapi_connection, pragmas: Dict[str, object]) -> None:
+    """Apply SQLite pragmas to a raw DBAPI connection."""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
 class Database:
-    def __init__(self):
-        db_path = get_db_path()
-        self.engine = create_engine(f'sqlite:///{db_path}')
+    def __init__(self, db_path: Optional[str] = None, tuned: bool = True):
+        """
+        Create the database engine.
+
+        Args:
+            db_path: Path of the SQLite file, defaults to get_db_path()
+            tuned: Apply the performance profile (WAL, pragmas and a thread-safe connection pool)
+        """
+        self.db_path = db_path or get_db_path()
+        self.tuned = tuned
+        if tuned:
+            self.engine = create_engine(
+                f'sqlite:///{self.db_path}',
+                poolclass=QueuePool,
+                pool_size=POOL_SIZE,
+                max_overflow=POOL_MAX_OVERFLOW,
+                connect_args={'check_same_thread': False},
+            )
+            event.listen(self.engine, 'connect', lambda conn, _: apply_pragmas(conn, PERFORMANCE_PRAGMAS))
+        else:
+            self.engine = create_engine(f'sqlite:///{self.db_path}')
         self.SessionLocal = sessionmaker(bind=self.engine)
-        
+
     def create_tables(self):
         Base.metadata.create_all(self.engine)
-        
+        self._add_missing_columns()
+
+    def _add_missing_columns(self) -> None:
+        """
+        Add columns that were added to a model after its table was created.
+        New columns must be nullable, SQLite can't add a NOT NULL column without a default.
+        """
+        inspector = inspect(self.engine)
+        with self.engine.begin() as connection:
+            for table in Base.metadata.sorted_tables:
+                existing = {column['name'] for column in inspector.get_columns(table.name)}
+                for column in table.columns:
+                    if column.name in existing:
+                        continue
+                    column_type = column.type.compile(dialect=self.engine.dialect)
+                    connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+
     def get_session(self):
-        return self.SessionLocal() 
\ No newline at end of file
+        return self.SessionLocal()
+
+    @contextmanager
+    def session_scope(self):
+        """Provide a short-lived session that commits on success and rolls back on error."""
+        session = self.get_session()
+        try:
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def dispose(self) -> None:
+        """Close all pooled connections."""
+        self.engine.dispose()
@@ -0,0 +1,258 @@
+import copy
+import json
+from datetime import datetime
+from statistics import median
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import tuple_, update
+from sqlalchemy.orm import Session
+
+from src.yad2.models import Contact, FeedItem, Location, PropertyFeatures, PropertySpecs
+
+from .models import Listing
+from .repository import QUERY_CHUNK_SIZE, Repository
+
+if TYPE_CHECKING:
+    from src.address.matcher import StreetMatch
+
+FEATURE_FIELDS = ('has_elevator', 'has_parking', 'has_mamad', 'has_balcony', 'has_storage')
+
+
+class ListingsRepository(Repository):
+    def upsert_item(self, item: FeedItem, seen_at: Optional[datetime] = None) -> None:
+        self.upsert_items([item], seen_at)
+
+    def upsert_items(self, items: Iterable[FeedItem], seen_at: Optional[datetime] = None) -> None:
+        """
+        Insert new listings and refresh existing ones in a single transaction.
+
+        Values that are only known after enrichment (features, floors, contact) are never
+        cleared by a later feed snapshot that does not have them.
+        """
+        seen_at = seen_at or datetime.now()
+        items = {item.item_id: item for item in items}
+        if not items:
+            return
+        if self.writer:
+            # The writer thread applies the items later, so it must not see in-place changes
+            items = copy.deepcopy(items)
+        self._write(lambda session: self._upsert(session, items, seen_at))
+
+    def _upsert(self, session: Session, items: Dict[str, FeedItem], seen_at: datetime) -> None:
+        existing = self._get_by_ids(session, list(items))
+        for item_id, item in items.items():
+            listing = existing.get(item_id)
+            if listing is None:
+                listing = Listing(item_id=item_id, first_seen=seen_at)
+                session.add(listing)
+            self._apply_item(listing, item)
+            listing.last_seen = seen_at
+
+    def get_item(self, item_id: str) -> Optional[FeedItem]:
+        listing = self.session.get(Listing, item_id)
+        return self.to_feed_item(listing) if listing else None
+
+    def find_listings(
+        self,
+        city: Optional[str] = None,
+        neighborhood: Optional[str] = None,
+        streets: Optional[Iterable[Tuple[str, str]]] = None,
+        rooms: Optional[float] = None,
+        min_price: Optional[int] = None,
+        max_price: Optional[int] = None,
+        seen_since: Optional[datetime] = None,
+    ) -> List[Listing]:
+        """
+        Query stored listings. All filters are optional and combined with AND.
+
+        Args:
+            city: Exact city name
+            neighborhood: Exact neighborhood name (use together with city)
+            streets: (city, street) pairs, e.g. the supported streets list
+            rooms: Exact number of rooms
+            min_price: Minimum price, inclusive
+            max_price: Maximum price, inclusive
+            seen_since: Only listings seen at or after this time
+        """
+        query = self.session.query(Listing)
+        if city is not None:
+            query = query.filter(Listing.city == city)
+        if neighborhood is not None:
+            query = query.filter(Listing.neighborhood == neighborhood)
+        if streets is not None:
+            query = query.filter(tuple_(Listing.city, Listing.street).in_(list(streets)))
+        if rooms is not None:
+            query = query.filter(Listing.rooms == rooms)
+        if min_price is not None:
+            query = query.filter(Listing.price >= min_price)
+        if max_price is not None:
+            query = query.filter(Listing.price <= max_price)
+        if seen_since is not None:
+            query = query.filter(Listing.last_seen >= seen_since)
+        return query.order_by(Listing.last_seen.desc()).all()
+
+    def iter_chunks(self, chunk_size: int = QUERY_CHUNK_SIZE) -> Iterator[List[Listing]]:
+        """
+        Stream all stored listings in item_id order, chunk_size rows at a time.
+
+        Uses keyset pagination (item_id > last seen id) so every chunk is an index range
+        scan, and expunges each chunk so the session doesn't keep the whole table.
+        """
+        last_id = None
+        while True:
+            query = self.session.query(Listing)
+            if last_id is not None:
+                query = query.filter(Listing.item_id > last_id)
+            chunk = query.order_by(Listing.item_id).limit(chunk_size).all()
+            if not chunk:
+                return
+            last_id = chunk[-1].item_id
+            for listing in chunk:
+                self.session.expunge(listing)
+            yield chunk
+
+    def price_per_sqm_medians(self) -> Dict[Tuple[str, str], float]:
+        """Median price per m² of the stored listings, by (city, neighborhood)."""
+        prices: Dict[Tuple[str, str], List[float]] = {}
+        query = self.session.query(Listing.city, Listing.neighborhood, Listing.price, Listing.size_sqm).filter(
+            Listing.neighborhood.isnot(None), Listing.price > 0, Listing.size_sqm > 0
+        )
+        for city, neighborhood, price, size_sqm in query:
+            prices.setdefault((city, neighborhood), []).append(price / size_sqm)
+        return {key: median(values) for key, values in prices.items()}
+
+    def first_seen(self, item_ids: Iterable[str]) -> Dict[str, datetime]:
+        """When each stored listing was first seen; listings that aren't stored yet are left out."""
+        item_ids = list(item_ids)
+        found = {}
+        for start in range(0, len(item_ids), QUERY_CHUNK_SIZE):
+            chunk = item_ids[start:start + QUERY_CHUNK_SIZE]
+            query = self.session.query(Listing.item_id, Listing.first_seen).filter(Listing.item_id.in_(chunk))
+            found.update(query)
+        return found
+
+    def update_categorizations(
+        self,
+        matches: Dict[str, 'StreetMatch'],
+        categorized_at: Optional[datetime] = None,
+    ) -> None:
+        """
+        Store the street categorization of listings.
+
+        Args:
+            matches: item_id -> StreetMatch, ids that aren't stored are ignored
+            categorized_at: Defaults to now
+        """
+        if not matches:
+            return
+        categorized_at = categorized_at or datetime.now()
+        rows = [
+            {
+                'item_id': item_id,
+                'is_supported': match.is_allowed,
+                'matched_neighborhood': match.neighborhood,
+                'match_constraint': match.constraint,
+                'categorized_at': categorized_at,
+            }
+            for item_id, match in matches.items()
+        ]
+
+        def write(session: Session) -> None:
+            existing = self._existing_ids(session, [row['item_id'] for row in rows])
+            rows_to_update = [row for row in rows if row['item_id'] in existing]
+            if rows_to_update:
+                # Bulk UPDATE by primary key, executed as one executemany
+                session.execute(update(Listing), rows_to_update)
+
+        self._write(write)
+
+    @staticmethod
+    def _existing_ids(session: Session, item_ids: List[str]) -> set:
+        found = set()
+        for start in range(0, len(item_ids), QUERY_CHUNK_SIZE):
+            chunk = item_ids[start:start + QUERY_CHUNK_SIZE]
+            found.update(item_id for item_id, in session.query(Listing.item_id).filter(Listing.item_id.in_(chunk)))
+        return found
+
+    @staticmethod
+    def _get_by_ids(session: Session, item_ids: List[str]) -> Dict[str, Listing]:
+        found = {}
+        for start in range(0, len(item_ids), QUERY_CHUNK_SIZE):
+            chunk = item_ids[start:start + QUERY_CHUNK_SIZE]
+            for listing in session.query(Listing).filter(Listing.item_id.in_(chunk)):
+                found[listing.item_id] = listing
+        return found
+
+    @staticmethod
+    def _apply_item(listing: Listing, item: FeedItem) -> None:
+        listing.url = item.url
+        if item.price is not None:
+            listing.price = item.price
+
+        listing.city = item.location.city
+        listing.street = item.location.street
+        listing.neighborhood = item.location.neighborhood
+        listing.area = item.location.area
+        if item.location.latitude is not None and item.location.longitude is not None:
+            listing.latitude = item.location.latitude
+            listing.longitude = item.location.longitude
+
+        if item.specs.rooms is not None:
+            listing.rooms = item.specs.rooms
+        if item.specs.floor is not None:
+            listing.floor = item.specs.floor
+        if item.specs.size_sqm is not None:
+            listing.size_sqm = item.specs.size_sqm
+
+        features = item.specs.features
+        for name in FEATURE_FIELDS:
+            setattr(listing, name, bool(getattr(listing, name)) or getattr(features, name))
+        if features.total_floors is not None:
+            listing.total_floors = features.total_floors
+        if features.current_floor is not None:
+            listing.current_floor = features.current_floor
+
+        listing.is_agency = item.is_agency
+        listing.agency_name = item.agency_name
+        if item.contact:
+            listing.contact_name = item.contact.name
+            listing.contact_phone = item.contact.phone
+
+        listing.tags = json.dumps(item.tags, ensure_ascii=False)
+
+    @staticmethod
+    def to_feed_item(listing: Listing) -> FeedItem:
+        """Rebuild a FeedItem from a stored listing."""
+        features = PropertyFeatures(
+            **{name: bool(getattr(listing, name)) for name in FEATURE_FIELDS},
+            total_floors=listing.total_floors,
+            current_floor=listing.current_floor,
+        )
+        contact = None
+        if listing.contact_name or listing.contact_phone:
+            contact = Contact(name=listing.contact_name, phone=listing.contact_phone)
+
+        return FeedItem(
+            item_id=listing.item_id,
+            url=listing.url,
+            price=listing.price,
+            location=Location(
+                city=listing.city,
+                street=listing.street,
+                neighborhood=listing.neighborhood,
+                area=listing.area,
+                latitude=listing.latitude,
+                longitude=listing.longitude,
+            ),
+            specs=PropertySpecs(
+                rooms=listing.rooms,
+                floor=listing.floor,
+                size_sqm=listing.size_sqm,
+                features=features,
+            ),
+            is_saved=False,
+            is_agency=bool(listing.is_agency),
+            agency_name=listing.agency_name,
+            contact=contact,
+            tags=json.loads(listing.tags) if listing.tags else [],
+        )
@@ -1,10 +1,106 @@
-from sqlalchemy import Column, String
+from datetime import datetime
+
+from sqlalchemy import Boolean, Column, DateTime, Float, Index, Integer, String, Text
 from sqlalchemy.orm import declarative_base
 
 Base = declarative_base()
 
 class SavedItem(Base):
     __tablename__ = 'saved_items'
-    
+
+    item_id = Column(String, primary_key=True)
+    url = Column(String, nullable=False, unique=True)
+
+class Listing(Base):
+    """A full snapshot of a FeedItem, kept across runs."""
+    __tablename__ = 'listings'
+
+    item_id = Column(String, primary_key=True)
+    url = Column(String, nullable=False)
+    price = Column(Integer)
+
+    # Location
+    city = Column(String, nullable=False)
+    street = Column(String, nullable=False)
+    neighborhood = Column(String)
+    area = Column(String)
+    latitude = Column(Float)
+    longitude = Column(Float)
+
+    # Street categorization against the supported streets list, None until categorized
+    is_supported = Column(Boolean)
+    matched_neighborhood = Column(String)
+    match_constraint = Column(String)
+    categorized_at = Column(DateTime)
+
+    # Specs
+    rooms = Column(Float)
+    floor = Column(Integer)
+    size_sqm = Column(Integer)
+
+    # Features (filled by enrichment)
+    has_elevator = Column(Boolean, nullable=False, default=False)
+    has_parking = Column(Boolean, nullable=False, default=False)
+    has_mamad = Column(Boolean, nullable=False, default=False)
+    has_balcony = Column(Boolean, nullable=False, default=False)
+    has_storage = Column(Boolean, nullable=False, default=False)
+    total_floors = Column(Integer)
+    current_floor = Column(Integer)
+
+    # Agency and contact
+    is_agency = Column(Boolean, nullable=False, default=False)
+    agency_name = Column(String)
+    contact_name = Column(String)
+    contact_phone = Column(String)
+
+    tags = Column(Text)  # JSON encoded list of strings
+
+    first_seen = Column(DateTime, nullable=False, default=datetime.now)
+    last_seen = Column(DateTime, nullable=False, default=datetime.now)
+
+    __table_args__ = (
+        Index('ix_listings_city_neighborhood', 'city', 'neighborhood'),
+        Index('ix_listings_city_street', 'city', 'street'),
+        Index('ix_listings_price', 'price'),
+        Index('ix_listings_rooms_price', 'rooms', 'price'),
+        Index('ix_listings_last_seen', 'last_seen'),
+    )
+
+class PriceObservation(Base):
+    """
+    A price change of a listing. Rows are only appended when the price differs from the
+    previous observation, so the table stays small even with frequent crawls.
+    """
+    __tablename__ = 'price_history'
+
+    # The primary key doubles as the "latest price per item" index
     item_id = Column(String, primary_key=True)
-    url = Column(String, nullable=False, unique=True) 
\ No newline at end of file
+    observed_at = Column(DateTime, primary_key=True)
+    price = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index('ix_price_history_observed_at', 'observed_at'),
+        {'sqlite_with_rowid': False},
+    )
+
+class SyncState(Base):
+    """Small JSON documents remembering what earlier runs saw, e.g. the favorites count."""
+    __tablename__ = 'sync_state'
+
+    key = Column(String, primary_key=True)
+    value = Column(Text, nullable=False)  # JSON encoded
+    updated_at = Column(DateTime, nullable=False, default=datetime.now)
+
+class WorkTask(Base):
+    """A unit of work of a Go to all URLs run, kept until the run is done so it can be resumed."""
+    __tablename__ = 'work_queue'
+
+    task_id = Column(String, primary_key=True)  # "<kind>:<key>", the same for the same work
+    kind = Column(String, nullable=False)
+    payload = Column(Text, nullable=False, default='{}')  # JSON encoded
+    done = Column(Boolean, nullable=False, default=False)
+    updated_at = Column(DateTime, nullable=False, default=datetime.now)
+
+    __table_args__ = (
+        Index('ix_work_queue_kind_done', 'kind', 'done'),
+    )
@@ -0,0 +1,168 @@
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from src.yad2.models import FeedItem
+
+from .models import PriceObservation
+from .repository import QUERY_CHUNK_SIZE, Repository
+from .write_behind import WriteBehindQueue
+
+
+@dataclass
+class PriceDrop:
+    item_id: str
+    old_price: int
+    new_price: int
+    dropped_at: datetime
+
+    @property
+    def amount(self) -> int:
+        return self.old_price - self.new_price
+
+
+class PriceHistoryRepository(Repository):
+    def __init__(self, session: Session, writer: Optional[WriteBehindQueue] = None):
+        super().__init__(session, writer)
+        # Written through the writer, not committed yet: item ID -> (price, the write it belongs to)
+        self._pending_prices: Dict[str, Tuple[int, object]] = {}
+        self._pending_lock = threading.Lock()
+
+    def record_prices(self, items: Iterable[FeedItem], observed_at: Optional[datetime] = None) -> List[PriceDrop]:
+        """
+        Append a price observation for every item whose price changed since its last observation.
+
+        Returns:
+            The price drops detected by this crawl
+        """
+        observed_at = observed_at or datetime.now()
+        prices = {item.item_id: item.price for item in items if item.price is not None}
+        if not prices:
+            return []
+
+        latest = self.latest_prices(list(prices))
+        with self._pending_lock:
+            latest.update(
+                (item_id, price) for item_id, (price, _) in self._pending_prices.items() if item_id in prices
+            )
+
+        changes = []
+        drops = []
+        for item_id, price in prices.items():
+            previous = latest.get(item_id)
+            if previous == price:
+                continue
+            changes.append(PriceObservation(item_id=item_id, observed_at=observed_at, price=price))
+            if previous is not None and price < previous:
+                drops.append(PriceDrop(item_id, previous, price, observed_at))
+
+        if changes:
+            self._write_prices(changes)
+        return drops
+
+    def _write_prices(self, changes: List[PriceObservation]) -> None:
+        """Append the observations, reading them from the overlay until the writer has committed them."""
+        def write(session: Session) -> None:
+            session.add_all(changes)
+
+        if not self.writer:
+            self._write(write)
+            return
+        # Identifies this write's prices, a later write may queue the same price again
+        token = object()
+        written = {change.item_id: (change.price, token) for change in changes}
+
+        def done() -> None:
+            # A later pending price of the same item stays, the DB doesn't have it yet
+            with self._pending_lock:
+                for item_id in written:
+                    pending = self._pending_prices.get(item_id)
+                    if pending is not None and pending[1] is token:
+                        del self._pending_prices[item_id]
+
+        # Added before submitting, so the writer can't commit and clear the prices first
+        with self._pending_lock:
+            self._pending_prices.update(written)
+        try:
+            self._write(write, done)
+        except Exception:
+            done()
+            raise
+
+    def latest_prices(self, item_ids: List[str]) -> Dict[str, int]:
+        """Get the most recently observed price of each item."""
+        latest = {}
+        for start in range(0, len(item_ids), QUERY_CHUNK_SIZE):
+            chunk = item_ids[start:start + QUERY_CHUNK_SIZE]
+            newest = (
+                self.session.query(
+                    PriceObservation.item_id,
+                    func.max(PriceObservation.observed_at).label('observed_at')
+                )
+                .filter(PriceObservation.item_id.in_(chunk))
+                .group_by(PriceObservation.item_id)
+                .subquery()
+            )
+            rows = (
+                self.session.query(PriceObservation.item_id, PriceObservation.price)
+                .join(newest, (PriceObservation.item_id == newest.c.item_id)
+                      & (PriceObservation.observed_at == newest.c.observed_at))
+            )
+            latest.update(dict(rows))
+        return latest
+
+    def get_price_history(self, item_id: str) -> List[PriceObservation]:
+        return (
+            self.session.query(PriceObservation)
+            .filter(PriceObservation.item_id == item_id)
+            .order_by(PriceObservation.observed_at)
+            .all()
+        )
+
+    def get_price_drops(self, since: datetime, item_ids: Optional[Iterable[str]] = None) -> List[PriceDrop]:
+        """
+        Find price drops observed at or after `since`.
+
+        Args:
+            since: Only drops observed from this time on
+            item_ids: Restrict the search to these items, e.g. the saved items
+        """
+        if item_ids is None:
+            drops = self._query_price_drops(since)
+        else:
+            item_ids = list(dict.fromkeys(item_ids))
+            drops = []
+            for start in range(0, len(item_ids), QUERY_CHUNK_SIZE):
+                drops.extend(self._query_price_drops(since, item_ids[start:start + QUERY_CHUNK_SIZE]))
+            drops.sort(key=lambda drop: drop.dropped_at)
+        return drops
+
+    def _query_price_drops(self, since: datetime, item_ids: Optional[List[str]] = None) -> List[PriceDrop]:
+        previous_price = func.lag(PriceObservation.price).over(
+            partition_by=PriceObservation.item_id,
+            order_by=PriceObservation.observed_at
+        )
+        history = self.session.query(
+            PriceObservation.item_id,
+            PriceObservation.observed_at,
+            PriceObservation.price,
+            previous_price.label('previous_price')
+        )
+        if item_ids is not None:
+            history = history.filter(PriceObservation.item_id.in_(item_ids))
+        history = history.subquery()
+
+        rows = (
+            self.session.query(history)
+            .filter(history.c.observed_at >= since)
+            .filter(history.c.price < history.c.previous_price)
+            .order_by(history.c.observed_at)
+        )
+        return [
+            PriceDrop(row.item_id, row.previous_price, row.price, row.observed_at)
+            for row in rows
+        ]
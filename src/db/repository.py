@@ -0,0 +1,37 @@
+from typing import Callable, Optional
+
+from sqlalchemy.orm import Session
+
+from .write_behind import WriteBehindQueue, WriteOperation
+
+# SQLite limits the number of bound parameters per statement
+QUERY_CHUNK_SIZE = 500
+
+
+class Repository:
+    def __init__(self, session: Session, writer: Optional[WriteBehindQueue] = None):
+        """
+        Args:
+            session: Session used for reads, and for writes when there is no writer
+            writer: Optional write-behind queue; when set, writes are committed on its thread
+        """
+        self.session = session
+        self.writer = writer
+
+    def _write(self, operation: WriteOperation, on_done: Optional[Callable[[], None]] = None) -> None:
+        """
+        Apply a write through the write-behind queue, or commit it on the session right away.
+
+        Args:
+            on_done: Run on the writer thread once a queued write is committed or has failed,
+                e.g. to drop it from an overlay of pending writes; unused without a writer
+        """
+        if self.writer:
+            self.writer.submit(operation, on_done)
+            return
+        try:
+            operation(self.session)
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
@@ -1,19 +1,78 @@
+import hashlib
+import threading
+from typing import Iterable, Optional, Set, Tuple
+
 from sqlalchemy.orm import Session
 
 from .models import SavedItem
+from .repository import QUERY_CHUNK_SIZE, Repository
+from .write_behind import WriteBehindQueue, WriteOperation
 
 
-class SavedItemsRepository:
-    def __init__(self, session: Session):
-        self.session = session
+class SavedItemsRepository(Repository):
+    def __init__(self, session: Session, writer: Optional[WriteBehindQueue] = None):
+        super().__init__(session, writer)
+        self._pending_ids: Set[str] = set()  # Written through the writer, not committed yet
+        self._pending_lock = threading.Lock()
         
     def add_item(self, item_id: str, url: str) -> None:
-        item = SavedItem(item_id=item_id, url=url)
-        self.session.merge(item)  # merge will update if exists, insert if not
-        self.session.commit()
+        # merge will update if exists, insert if not
+        self._write_saved(lambda session: session.merge(SavedItem(item_id=item_id, url=url)), {item_id})
+
+    def add_items(self, items: Iterable[Tuple[str, str]]) -> None:
+        """Save many (item_id, url) pairs in one transaction."""
+        items = dict(items)
+        if not items:
+            return
+
+        def write(session: Session) -> None:
+            for item_id, url in items.items():
+                session.merge(SavedItem(item_id=item_id, url=url))
+        self._write_saved(write, set(items))
+
+    def _write_saved(self, operation: WriteOperation, item_ids: Set[str]) -> None:
+        """Write, reading item_ids as saved from the overlay until the writer has committed them."""
+        if not self.writer:
+            self._write(operation)
+            return
+
+        def done() -> None:
+            # Once committed, saved items are read from the DB; a save is never undone
+            with self._pending_lock:
+                self._pending_ids.difference_update(item_ids)
+
+        # Added before submitting, so the writer can't commit and clear the IDs first
+        with self._pending_lock:
+            self._pending_ids.update(item_ids)
+        try:
+            self._write(operation, done)
+        except Exception:
+            done()
+            raise
         
     def is_saved(self, item_id: str) -> bool:
+        with self._pending_lock:
+            if item_id in self._pending_ids:
+                return True
         return self.session.query(SavedItem).filter(SavedItem.item_id == item_id).first() is not None
+
+    def saved_ids(self, item_ids: Iterable[str]) -> Set[str]:
+        """The subset of item_ids that is saved, with one query per QUERY_CHUNK_SIZE IDs."""
+        item_ids = list(dict.fromkeys(item_ids))
+        with self._pending_lock:
+            found = self._pending_ids.intersection(item_ids)
+        for start in range(0, len(item_ids), QUERY_CHUNK_SIZE):
+            chunk = item_ids[start:start + QUERY_CHUNK_SIZE]
+            query = self.session.query(SavedItem.item_id).filter(SavedItem.item_id.in_(chunk))
+            found.update(item_id for item_id, in query)
+        return found
+        
+    def checksum(self) -> str:
+        """Digest of every saved item ID, changes whenever an item is added or removed."""
+        with self._pending_lock:
+            pending = set(self._pending_ids)
+        item_ids = {item_id for item_id, in self.session.query(SavedItem.item_id)} | pending
+        return hashlib.sha256('\n'.join(sorted(item_ids)).encode('utf-8')).hexdigest()
         
     def get_all_items(self):
-        return self.session.query(SavedItem).all() 
\ No newline at end of file
+        return self.session.query(SavedItem).all()
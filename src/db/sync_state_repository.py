@@ -0,0 +1,52 @@
+import json
+import threading
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from .models import SyncState
+from .repository import Repository
+from .write_behind import WriteBehindQueue
+
+
+class SyncStateRepository(Repository):
+    def __init__(self, session: Session, writer: Optional[WriteBehindQueue] = None):
+        super().__init__(session, writer)
+        self._pending = {}  # Written through the writer, not committed yet
+        self._pending_lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._pending_lock:
+            if key in self._pending:
+                return self._pending[key]
+        # Refreshed, the writer thread may have changed the row since the session loaded it
+        state = self.session.get(SyncState, key, populate_existing=True)
+        return json.loads(state.value) if state else None
+
+    def set(self, key: str, value: dict) -> None:
+        encoded = json.dumps(value, ensure_ascii=False)
+        updated_at = datetime.now()
+
+        def write(session: Session) -> None:
+            session.merge(SyncState(key=key, value=encoded, updated_at=updated_at))
+
+        if not self.writer:
+            self._write(write)
+            return
+        pending = json.loads(encoded)
+
+        def done() -> None:
+            # A later pending value of the key stays, the DB doesn't have it yet
+            with self._pending_lock:
+                if self._pending.get(key) is pending:
+                    del self._pending[key]
+
+        # Added before submitting, so the writer can't commit and clear the value first
+        with self._pending_lock:
+            self._pending[key] = pending
+        try:
+            self._write(write, done)
+        except Exception:
+            done()
+            raise
@@ -0,0 +1,105 @@
+"""
+Durable queue of the work of a Go to all URLs run, so an interrupted run can resume.
+
+Task IDs are derived from the work itself ("url:<search url>", "item:<item id>"), so adding
+a task that is already queued or done changes nothing.
+"""
+import json
+from datetime import datetime
+from typing import Dict, Iterable, List
+
+from sqlalchemy import delete, literal_column
+from sqlalchemy.orm import Session
+
+from .models import WorkTask
+from .repository import QUERY_CHUNK_SIZE, Repository
+
+# A search URL to crawl; its payload is checkpointed with the next page to read
+TASK_URL = 'url'
+# A listing that was handled
+TASK_ITEM = 'item'
+# An approved listing to send
+TASK_NOTIFY = 'notify'
+
+
+def task_id(kind: str, key: str) -> str:
+    return f"{kind}:{key}"
+
+
+class WorkQueueRepository(Repository):
+    def add(self, kind: str, key: str, payload: dict, done: bool = False) -> None:
+        """Queue a task, unless a task with its ID is already queued or done."""
+        self.add_many(kind, {key: payload}, done)
+
+    def add_many(self, kind: str, payloads: Dict[str, dict], done: bool = False) -> None:
+        """Queue a task per key in a single transaction; like add, existing tasks are left as they are."""
+        if not payloads:
+            return
+        now = datetime.now()
+        tasks = {
+            task_id(kind, key): json.dumps(payload, ensure_ascii=False) for key, payload in payloads.items()
+        }
+
+        def write(session: Session) -> None:
+            existing = self._existing_ids(session, list(tasks))
+            for new_id, encoded in tasks.items():
+                if new_id not in existing:
+                    session.add(WorkTask(task_id=new_id, kind=kind, payload=encoded, done=done, updated_at=now))
+
+        self._write(write)
+
+    def update(self, kind: str, key: str, payload: dict, done: bool = False) -> None:
+        """Checkpoint a task's payload, or mark it done."""
+        encoded = json.dumps(payload, ensure_ascii=False)
+        now = datetime.now()
+        self._write(lambda session: session.merge(
+            WorkTask(task_id=task_id(kind, key), kind=kind, payload=encoded, done=done, updated_at=now)
+        ))
+
+    def complete(self, kind: str, keys: Iterable[str]) -> None:
+        """Mark tasks done, adding the ones that weren't queued."""
+        keys = list(keys)
+        if not keys:
+            return
+        ids = [task_id(kind, key) for key in keys]
+        now = datetime.now()
+
+        def write(session: Session) -> None:
+            existing = self._existing_ids(session, ids)
+            for done_id in ids:
+                if done_id in existing:
+                    session.query(WorkTask).filter(WorkTask.task_id == done_id).update(
+                        {'done': True, 'updated_at': now}
+                    )
+                else:
+                    session.add(WorkTask(task_id=done_id, kind=kind, payload='{}', done=True, updated_at=now))
+
+        self._write(write)
+
+    def pending(self, kind: str) -> List[dict]:
+        """Payloads of the tasks of a kind that aren't done, in the order they were queued."""
+        query = self.session.query(WorkTask.payload).filter(WorkTask.kind == kind, WorkTask.done.is_(False))
+        # Rows keep their rowid when updated, so it is the order they were first added in
+        return [json.loads(payload) for payload, in query.order_by(literal_column('rowid'))]
+
+    def done_keys(self, kind: str) -> List[str]:
+        prefix = len(task_id(kind, ''))
+        query = self.session.query(WorkTask.task_id).filter(WorkTask.kind == kind, WorkTask.done.is_(True))
+        return [done_id[prefix:] for done_id, in query]
+
+    def has_pending(self) -> bool:
+        return self.session.query(WorkTask.task_id).filter(WorkTask.done.is_(False)).first() is not None
+
+    def clear(self) -> None:
+        """Forget all tasks, done or not."""
+        self._write(lambda session: session.execute(delete(WorkTask)))
+
+    @staticmethod
+    def _existing_ids(session: Session, ids: List[str]) -> set:
+        found = set()
+        for start in range(0, len(ids), QUERY_CHUNK_SIZE):
+            chunk = ids[start:start + QUERY_CHUNK_SIZE]
+            found.update(existing_id for existing_id, in session.query(WorkTask.task_id).filter(
+                WorkTask.task_id.in_(chunk)
+            ))
+        return found
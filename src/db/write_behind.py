@@ -0,0 +1,172 @@
+import logging
+import queue
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+WriteOperation = Callable[[Session], None]
+# An operation and the callback run once it is committed or has failed
+_Write = Tuple[WriteOperation, Optional[Callable[[], None]]]
+
+
+class _Barrier:
+    """Marker placed in the queue; set once every operation submitted before it is committed."""
+    def __init__(self):
+        self.done = threading.Event()
+
+
+_STOP = object()
+
+
+class WriteBehindQueue:
+    """
+    Runs database writes on a dedicated thread so callers never wait for SQLite commits.
+
+    Operations are callables that receive the writer's session. They are applied in
+    submission order and committed in batches; a failing batch is replayed one operation
+    at a time so a single bad write doesn't drop the rest of the batch. An operation's
+    on_done callback runs on the writer thread once it is committed or has failed.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        max_size: int = 1000,
+        batch_size: int = 100,
+        put_timeout: Optional[float] = None,
+    ):
+        """
+        Args:
+            session_factory: Creates the session used by the writer thread
+            max_size: Queue capacity; submit() blocks when it is full (backpressure)
+            batch_size: Maximum number of operations committed in one transaction
+            put_timeout: Seconds submit() waits for room before raising queue.Full, None waits forever
+        """
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.put_timeout = put_timeout
+        self._queue = queue.Queue(maxsize=max_size)
+        self._thread: Optional[threading.Thread] = None
+        self.logger = logging.getLogger(__name__)
+
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+
+    def start(self) -> 'WriteBehindQueue':
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+            self._thread.start()
+        return self
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def submit(self, operation: WriteOperation, on_done: Optional[Callable[[], None]] = None) -> None:
+        """Enqueue a write. Blocks while the queue is full."""
+        if not self.is_running:
+            raise RuntimeError("Write-behind queue is not running")
+        self._queue.put((operation, on_done), timeout=self.put_timeout)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Durability barrier: wait until every operation submitted so far is committed.
+
+        Returns:
+            bool: True if the barrier was reached before the timeout, which also covers
+                waiting for room in a full queue
+        """
+        if not self.is_running:
+            return self._queue.empty()
+        barrier = _Barrier()
+        start = time.monotonic()
+        try:
+            self._queue.put(barrier, timeout=timeout)
+        except queue.Full:
+            return False
+        if timeout is not None:
+            timeout = max(0.0, timeout - (time.monotonic() - start))
+        return barrier.done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Flush pending writes and stop the writer thread."""
+        if not self.is_running:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            self.logger.warning(f"DB writer did not stop within {timeout}s, {self._queue.qsize()} writes pending")
+        else:
+            self.logger.info(
+                f"DB writer stopped: {self.written} writes in {self.batches} batches, {self.failed} failed"
+            )
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def _run(self) -> None:
+        session = self.session_factory()
+        try:
+            while True:
+                batch, markers = self._next_batch()
+                if batch:
+                    self._commit_batch(session, batch)
+                for marker in markers:
+                    if marker is _STOP:
+                        return
+                    marker.done.set()
+        finally:
+            session.close()
+
+    def _next_batch(self):
+        """Block for the next operation, then drain up to batch_size without waiting."""
+        batch: List[_Write] = []
+        markers = []
+        item = self._queue.get()
+        while True:
+            if item is _STOP or isinstance(item, _Barrier):
+                # Commit everything before the marker before acknowledging it
+                markers.append(item)
+                break
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                break
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+        return batch, markers
+
+    def _commit_batch(self, session: Session, batch: List[_Write]) -> None:
+        start = time.perf_counter()
+        try:
+            for operation, _ in batch:
+                operation(session)
+            session.commit()
+            self.written += len(batch)
+            self.batches += 1
+        except Exception as e:
+            session.rollback()
+            self.logger.warning(f"Batch of {len(batch)} writes failed ({str(e)}), retrying one by one")
+            for operation, _ in batch:
+                try:
+                    operation(session)
+                    session.commit()
+                    self.written += 1
+                except Exception as op_error:
+                    session.rollback()
+                    self.failed += 1
+                    self.logger.error(f"Failed to write to database: {str(op_error)}")
+            self.batches += 1
+        self.logger.debug(f"Committed {len(batch)} writes in {(time.perf_counter() - start) * 1000:.1f} ms")
+        for _, on_done in batch:
+            if on_done is None:
+                continue
+            try:
+                on_done()
+            except Exception as e:
+                self.logger.error(f"Write completion callback failed: {str(e)}")
@@ -1,15 +1,20 @@
 #!/usr/bin/env python3
 
+import argparse
 import json
 import logging
 import os
 import signal
 import sys
 
-from address import AddressMatcher
-from app import Yad2ScraperApp
-from utils.logging_config import setup_logging
-from yad2.client import Yad2Client
+from src.address import AddressMatcher
+from src.app import Yad2ScraperApp
+from src.cli.input_handler import display_recategorize_result
+from src.processor.budget import CrawlBudget
+from src.processor.recategorize import recategorize_stored_listings
+from src.processor.triage import load_rules
+from src.utils.logging_config import setup_logging
+from src.yad2.client import Yad2Client
 
 
 def get_resource_path(relative_path):
@@ -34,11 +39,62 @@ def get_log_path():
         return 'main.log'
 
 def signal_handler(*_):
-    """Handle interrupt signals gracefully."""
+    """Handle interrupt signals gracefully, stopping a run where --resume can pick it up."""
     print("\nReceived interrupt signal. Exiting...")
-    sys.exit(0)
+    raise KeyboardInterrupt
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Yad2 apartment scraper")
+    parser.add_argument(
+        '--recategorize',
+        action='store_true',
+        help="Match stored listings against the current supported streets and exit, without opening a browser"
+    )
+    parser.add_argument(
+        '--auto',
+        action='store_true',
+        help="Go through all search URLs unattended, deciding listings by consts/triage_rules.json"
+    )
+    parser.add_argument(
+        '--tabs',
+        type=int,
+        default=1,
+        metavar='N',
+        help="Load N search URLs at a time in parallel browser tabs when going through all URLs"
+    )
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help="Continue an interrupted run through all search URLs where it stopped"
+    )
+    parser.add_argument(
+        '--url-minutes',
+        type=float,
+        metavar='M',
+        help="Defer a search URL still being crawled M minutes after its first page"
+    )
+    parser.add_argument(
+        '--max-pages',
+        type=int,
+        metavar='N',
+        help="Defer a search URL after reading N of its pages"
+    )
+    parser.add_argument(
+        '--max-enrichments',
+        type=int,
+        metavar='N',
+        help="Defer a search URL after opening N of its listings"
+    )
+    parser.add_argument(
+        '--deadline-minutes',
+        type=float,
+        metavar='M',
+        help="Defer whatever is left of a run through all search URLs after M minutes"
+    )
+    return parser.parse_args()
 
 def main():
+    args = parse_args()
     try:
         log_level = os.getenv('DEFAULT_LOG_LEVEL', 'WARNING')
         file_log_level = os.getenv('DEFAULT_FILE_LOG_LEVEL', 'INFO')
@@ -55,19 +111,45 @@ def main():
         return 1
     
     client = None
+    address_matcher = None
     try:
-        client = Yad2Client(headless=False)
         address_matcher = AddressMatcher(get_resource_path(os.path.join('consts', 'supported_streets.json')))
+        if args.recategorize:
+            display_recategorize_result(recategorize_stored_listings(address_matcher))
+            return 0
+
+        client = Yad2Client(headless=False)
+        # Pick up edits to the streets file without restarting the browser session
+        address_matcher.start_watching()
         search_urls = json.load(open(get_resource_path(os.path.join('consts', 'search_url.json'))))
+        # Compiled once here, so an invalid rules file fails before any listing is processed
+        rules = load_rules(get_resource_path(os.path.join('consts', 'triage_rules.json')))
         
-        app = Yad2ScraperApp(client, address_matcher, search_urls)
-        app.run()
+        budget = CrawlBudget(
+            max_seconds=args.url_minutes * 60 if args.url_minutes is not None else None,
+            max_pages=args.max_pages,
+            max_enrichments=args.max_enrichments
+        )
+        deadline_seconds = args.deadline_minutes * 60 if args.deadline_minutes is not None else None
+        app = Yad2ScraperApp(
+            client, address_matcher, search_urls, rules,
+            parallel_tabs=args.tabs, budget=budget, deadline_seconds=deadline_seconds
+        )
+        if args.auto:
+            app.run_auto(resume=args.resume)
+        else:
+            app.run(resume=args.resume)
         
+    except KeyboardInterrupt:
+        # Progress was stored as the app closed
+        return 0
     except Exception as e:
         logging.error(f"Fatal error: {str(e)}", exc_info=True)
         print(f"Fatal error: {str(e)}")
         return 1
     finally:
+        if address_matcher:
+            address_matcher.stop_watching()
         if client:
             try:
                 client.close()
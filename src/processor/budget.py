@@ -0,0 +1,52 @@
+"""
+Budgets that keep one slow search URL from holding up a whole Go to all URLs run.
+
+Each search URL gets the same CrawlBudget of wall time, pages read and listings enriched,
+and the run as a whole can have a Deadline. A crawl out of budget is deferred rather than
+finished: it stops where it is, and the pages and listings it didn't get to are left for
+--resume or the next run.
+"""
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+
+@dataclass(frozen=True)
+class CrawlBudget:
+    max_seconds: Optional[float] = None  # Wall time from the search URL's first page
+    max_pages: Optional[int] = None  # Pages read in one run
+    max_enrichments: Optional[int] = None  # Listing pages opened in one run
+
+    def page_limit(self, elapsed: float, pages: int) -> Optional[str]:
+        """Why another page can't be read, None if it can."""
+        if self.max_pages is not None and pages >= self.max_pages:
+            return f"read {self.max_pages} pages"
+        return self._time_limit(elapsed)
+
+    def enrichment_limit(self, elapsed: float, enrichments: int) -> Optional[str]:
+        """Why another listing can't be enriched, None if it can."""
+        if self.max_enrichments is not None and enrichments >= self.max_enrichments:
+            return f"enriched {self.max_enrichments} listings"
+        return self._time_limit(elapsed)
+
+    def _time_limit(self, elapsed: float) -> Optional[str]:
+        if self.max_seconds is not None and elapsed >= self.max_seconds:
+            return f"took over {self.max_seconds:.0f}s"
+        return None
+
+
+class Deadline:
+    """A point in time after which a run starts no new work."""
+
+    def __init__(self, seconds: Optional[float], clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            seconds: Time from now until the deadline, None for no deadline
+        """
+        self._clock = clock
+        self._at = None if seconds is None else clock() + seconds
+
+    @property
+    def expired(self) -> bool:
+        return self._at is not None and self._clock() >= self._at
+
@@ -0,0 +1,42 @@
+from typing import Iterable, List, Set
+
+from src.yad2.models import FeedItem
+
+
+class RunRegistry:
+    """
+    Listings handled so far in one run, shared by all of its search URLs.
+
+    Search URLs overlap (neighboring neighborhoods, price bands), so the same listing shows
+    up on several of them. It is checked twice: before parsing a page, so known cards are
+    never parsed, and before processing, so nothing is matched, prompted or enriched twice.
+    """
+
+    def __init__(self):
+        self.seen: Set[str] = set()
+        self.skipped_parsing = 0  # Cards not parsed because their listing was already handled
+        self.skipped_processing = 0  # Parsed listings not processed again
+
+    def record_skipped(self, item_ids: Iterable[str]) -> None:
+        """Count cards that weren't parsed because their IDs were in seen."""
+        self.skipped_parsing += len(list(item_ids))
+
+    def claim(self, items: List[FeedItem]) -> List[FeedItem]:
+        """
+        Register the items as handled.
+
+        Returns:
+            The items that weren't handled earlier in the run
+        """
+        new_items = []
+        for item in items:
+            if item.item_id in self.seen:
+                self.skipped_processing += 1
+            else:
+                self.seen.add(item.item_id)
+                new_items.append(item)
+        return new_items
+
+    @property
+    def skipped(self) -> int:
+        return self.skipped_parsing + self.skipped_processing
@@ -0,0 +1,64 @@
+import logging
+from typing import List
+
+from src.db.saved_items_repository import SavedItemsRepository
+from src.yad2.client import Yad2Client
+from src.yad2.models import FeedItem
+
+from .models import FavoritesReconciliation
+
+
+def reconcile_favorites(
+    items: List[FeedItem],
+    client: Yad2Client,
+    saved_items_repo: SavedItemsRepository
+) -> FavoritesReconciliation:
+    """
+    Bring the local saved items and the Yad2 likes of the feed in line with each other.
+
+    The feed is split into saved in both, DB only and Yad2 only with one DB query. DB-only
+    items are then liked on Yad2 with one script, Yad2-only items stored with one DB write.
+    Every item saved on either side is marked as saved, so processing skips it.
+
+    Args:
+        items: Feed items of the current page, is_saved being their Yad2 like state
+
+    Returns:
+        FavoritesReconciliation: The IDs in each group
+    """
+    result = FavoritesReconciliation()
+    if not items:
+        return result
+
+    try:
+        saved_locally = saved_items_repo.saved_ids(item.item_id for item in items)
+    except Exception as e:
+        logging.error(f"Failed to check saved state of the feed: {str(e)}")
+        return result
+    saved_yad2 = {item.item_id for item in items if item.is_saved}
+    items_by_id = {item.item_id: item for item in items}
+
+    result.both = [item_id for item_id in items_by_id if item_id in saved_locally and item_id in saved_yad2]
+    result.db_only = [item_id for item_id in items_by_id if item_id in saved_locally and item_id not in saved_yad2]
+    result.yad2_only = [item_id for item_id in items_by_id if item_id in saved_yad2 and item_id not in saved_locally]
+
+    if result.db_only:
+        logging.info(f"{len(result.db_only)} items saved in DB only - saving to Yad2")
+        try:
+            liked = client.click_like_buttons(result.db_only)
+        except Exception as e:
+            logging.error(f"Failed to save {len(result.db_only)} ads to Yad2: {str(e)}")
+            liked = {}
+        result.failed_likes = [item_id for item_id in result.db_only if not liked.get(item_id)]
+
+    if result.yad2_only:
+        logging.info(f"{len(result.yad2_only)} items saved in Yad2 only - saving to DB")
+        try:
+            saved_items_repo.add_items((item_id, items_by_id[item_id].url) for item_id in result.yad2_only)
+        except Exception as e:
+            logging.error(f"Failed to save {len(result.yad2_only)} items to DB: {str(e)}")
+
+    # Saved on one side is enough to skip the item, like a failed like used to be
+    for item_id in result.db_only:
+        items_by_id[item_id].is_saved = True
+    return result
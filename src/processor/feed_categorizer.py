@@ -10,17 +10,18 @@ def categorize_feed_items(items: List[FeedItem], address_matcher: AddressMatcher
     """Categorize feed items into supported, unsupported and saved items."""
     supported = []
     unsupported = []
-    saved = []
-    
-    for item in items:
-        if item.is_saved:
-            saved.append(item)
-            continue
-            
-        street = item.location.street
-        match = address_matcher.is_street_allowed(street, item.location.city)
-        
-        if match.is_allowed:  # Both regular supported and with constraints
+    saved = [item for item in items if item.is_saved]
+    new_items = [item for item in items if not item.is_saved]
+
+    # Match all streets in one batch instead of one lookup per item, and keep the result on
+    # the item so later stages don't match it again
+    unmatched = [item for item in new_items if item.street_match is None]
+    if unmatched:
+        for item, match in zip(unmatched, address_matcher.match_streets(unmatched)):
+            item.street_match = match
+
+    for item in new_items:
+        if item.street_match.is_allowed:  # Both regular supported and with constraints
             supported.append(item)
         else:
             unsupported.append(item)
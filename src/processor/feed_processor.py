@@ -1,145 +1,326 @@
 import logging
-from typing import List
+from typing import Callable, List, Optional
 
-from src.address import AddressMatcher
-from src.db.saved_items_repository import SavedItemsRepository
+from src.address import AddressMatcher, GeoCheck, StreetMatch
 from src.utils.console import prompt_yes_no
 from src.utils.text_formatter import format_hebrew
 from src.yad2.client import Yad2Client
 from src.yad2.models import FeedItem
 
 from .feed_categorizer import categorize_feed_items
+from .priority import ListingScorer, PriorityQueue
+from .triage import DEFAULT_RULES, TriageAction, TriageDecision, TriageRules
 
 
-def process_item(item: FeedItem, client: Yad2Client) -> None:
-    """Process a single feed item."""
-    try:
-        # 1. First approval
-        if not prompt_yes_no("Do you approve to send?"):
-            logging.info(f"Rejected item: {item.url}")
-        else:
-            # 2. Enrich item
-            enriched_item = client.enrich_feed_item(item)
+def _announce(decision: TriageDecision, item: FeedItem) -> None:
+    verb = "Approved" if decision.action == TriageAction.APPROVE else "Rejected"
+    print(f"{verb} by rule: {decision.rule or 'default'}")
+    logging.info(f"{verb} item by rule '{decision.rule or 'default'}': {item.url}")
+
+def _never() -> bool:
+    return False
+
+def _leave_for_later(item: FeedItem) -> None:
+    print("Stopped, left for a later run")
+    logging.info(f"Stopped before prompting for item: {item.url}")
+
+def process_item(
+    item: FeedItem,
+    client: Yad2Client,
+    rules: Optional[TriageRules] = None,
+    auto: bool = False,
+    send: Optional[Callable[[FeedItem], None]] = None,
+    save: Optional[Callable[[FeedItem], None]] = None,
+    enrich: Optional[Callable[[FeedItem], Optional[FeedItem]]] = None,
+    stopped: Optional[Callable[[], bool]] = None,
+    check: Optional[Callable[[FeedItem], bool]] = None
+) -> bool:
+    """
+    Process a single feed item.
 
-            # 3. Check last floor
-            if item.specs.features.current_floor == item.specs.features.total_floors:
-                print("Last floor is not recommended")
+    The triage rules run before enrichment, to reject without opening the listing, and
+    again after it. Prompts are only shown for what the rules leave undecided.
+
+    Args:
+        rules: Triage rules, defaults to DEFAULT_RULES
+        auto: Never prompt; items the rules don't decide are left for a manual run
+        send: Sends an approved item, defaults to client.send_feed_item
+        save: Saves the handled item, defaults to client.save_ad
+        enrich: Enriches the item, defaults to client.enrich_feed_item; returning None defers
+            the item, leaving it unhandled for a later run
+        stopped: Checked before each prompt; once it returns True the item is left unhandled
+            instead of prompting
+        check: Run on the enriched item before the rules; returning False skips the item,
+            e.g. once its coordinates show it is outside its street's constraint area
+
+    Returns:
+        bool: False if the item was left for a manual or later run
+    """
+    rules = rules or TriageRules(DEFAULT_RULES)
+    send = send or client.send_feed_item
+    save = save or client.save_ad
+    enrich = enrich or client.enrich_feed_item
+    stopped = stopped or _never
+    handled = True
+    try:
+        # 1. Rules that don't need the listing page, then first approval
+        decision = rules.evaluate(item)
+        if decision.action == TriageAction.REJECT:
+            _announce(decision, item)
+            return True
+        if decision.action != TriageAction.APPROVE and not auto:
+            if stopped():
+                _leave_for_later(item)
+                handled = False
+                return False
+            if not prompt_yes_no("Do you approve to send?"):
                 logging.info(f"Rejected item: {item.url}")
-            else:
-                # 4. Show formatted listing and get format approval
-                print("\nFormatted listing:")
-                print(format_hebrew(enriched_item.format_listing()))
-                logging.info(f"Approved and enriched item: {item.url}")
-                
-                # 5. Format approval and send
-                if prompt_yes_no("Do you approve the format?"):
-                    client.send_feed_item(enriched_item)
-                else:
-                    logging.info(f"Skipped sending item: {item.url}")
+                return True
+
+        # 2. Enrich item
+        enriched_item = enrich(item)
+        if enriched_item is None:
+            print("Out of budget, left for a later run")
+            logging.info(f"Deferred item: {item.url}")
+            handled = False
+            return False
+
+        # 3. Checks that need the listing page, then the rules again, now with floors and
+        # features (e.g. rejecting the last floor)
+        if check and not check(enriched_item):
+            return True
+        decision = rules.evaluate(enriched_item)
+        if decision.action == TriageAction.REJECT:
+            _announce(decision, item)
+            return True
+
+        # 4. Show formatted listing and get format approval
+        print("\nFormatted listing:")
+        print(format_hebrew(enriched_item.format_listing()))
+        logging.info(f"Approved and enriched item: {item.url}")
+
+        # 5. Format approval and send
+        if decision.action == TriageAction.APPROVE:
+            _announce(decision, item)
+            send(enriched_item)
+        elif auto:
+            print("Left for manual review")
+            logging.info(f"Escalated item: {item.url}")
+            handled = False
+        elif stopped():
+            _leave_for_later(item)
+            handled = False
+        elif prompt_yes_no("Do you approve the format?"):
+            send(enriched_item)
+        else:
+            logging.info(f"Skipped sending item: {item.url}")
 
     except Exception as e:
         logging.error(f"Failed to enrich item {item.url}: {str(e)}")
         print(f"Error: Failed to enrich item: {str(e)}")
     finally:
-        # Always try to save the ad at the end, regardless of what happened
-        try:
-            client.save_ad(item)
-        except Exception as e:
-            logging.error(f"Failed to save ad {item.url}: {str(e)}")
-            print(f"Error: Failed to save ad: {str(e)}")
+        # Always try to save the ad at the end, regardless of what happened, unless it was
+        # left for a manual run and must show up in the feed again
+        if handled:
+            try:
+                save(item)
+            except Exception as e:
+                logging.error(f"Failed to save ad {item.url}: {str(e)}")
+                print(f"Error: Failed to save ad: {str(e)}")
+    return handled
 
 def process_feed_items(
     items: List[FeedItem], 
     address_matcher: AddressMatcher, 
     client: Yad2Client,
-    saved_items_repo: SavedItemsRepository
-) -> None:
-    """Process feed items in order: supported streets first, then unsupported."""
+    rules: Optional[TriageRules] = None,
+    auto: bool = False,
+    send: Optional[Callable[[FeedItem], None]] = None,
+    scorer: Optional[ListingScorer] = None,
+    enrich: Optional[Callable[[FeedItem], Optional[FeedItem]]] = None,
+    stopped: Optional[Callable[[], bool]] = None
+) -> List[FeedItem]:
+    """
+    Process feed items in order of priority, so the most promising ones are reviewed and
+    enriched first.
+
+    Handled items are saved together at the end, with one script for all of their like
+    buttons, so this must return before the browser leaves the feed page.
+
+    The items' saved state is expected to be reconciled already, see reconcile_favorites,
+    which runs once the feed is read; items saved on either side are skipped.
+
+    Args:
+        rules: Triage rules, defaults to DEFAULT_RULES
+        auto: Run without prompts, see process_item
+        send: Sends an approved item, defaults to client.send_feed_item
+        scorer: Scores items for the order, defaults to one without price medians or first seen times
+        enrich: Enriches an item, see process_item; deferred items are neither saved nor returned
+        stopped: Checked before each item and prompt; once it returns True the remaining items
+            are left unhandled, neither saved nor returned
+
+    Returns:
+        Items left for manual review, always empty unless auto is set
+    """
+    escalated: List[FeedItem] = []
     if not items:
         logging.warning("No items to process")
-        return
+        return escalated
 
-    def handle_saved_state(item: FeedItem) -> bool:
-        """
-        Handle the saved state of an item. Returns True if item should be skipped.
-        """
-        try:
-            is_saved_locally = saved_items_repo.is_saved(item.item_id)
-            is_saved_yad2 = item.is_saved
+    to_save: List[FeedItem] = []
+    rules = rules or TriageRules(DEFAULT_RULES)
+    scorer = scorer or ListingScorer({}, {})
+    stopped = stopped or _never
 
-            if is_saved_locally and is_saved_yad2:
-                logging.info(f"Item {item.item_id} already saved in both DB and Yad2 - skipping")
-                return True
-            elif is_saved_locally and not is_saved_yad2:
-                logging.info(f"Item {item.item_id} saved in DB only - saving to Yad2")
-                try:
-                    client.save_ad(item)
-                except Exception as e:
-                    logging.error(f"Failed to save ad {item.url} to Yad2: {str(e)}")
-                return True
-            elif not is_saved_locally and is_saved_yad2:
-                logging.info(f"Item {item.item_id} saved in Yad2 only - saving to DB")
-                try:
-                    saved_items_repo.add_item(item.item_id, item.url)
-                except Exception as e:
-                    logging.error(f"Failed to save item {item.url} to DB: {str(e)}")
-                return True
-            
-            return False
-        except Exception as e:
-            logging.error(f"Failed to check saved state for item {item.url}: {str(e)}")
-            return False  # Continue with normal processing if we can't check saved state
+    deferred: List[FeedItem] = []
 
-    # First, handle saved state for all items
-    for item in items:
-        if handle_saved_state(item):
-            continue
+    def enrich_or_defer(item: FeedItem) -> Optional[FeedItem]:
+        enriched = enrich(item) if enrich else client.enrich_feed_item(item)
+        if enriched is None:
+            deferred.append(item)
+        return enriched
+
+    def process(item: FeedItem, check: Optional[Callable[[FeedItem], bool]] = None) -> None:
+        handled = process_item(
+            item, client, rules, auto, send, save=to_save.append, enrich=enrich_or_defer, stopped=stopped,
+            check=check
+        )
+        if not handled and not (deferred and deferred[-1] is item) and not stopped():
+            escalated.append(item)
+
+    try:
+        _process_items(
+            items, address_matcher, rules, scorer, process, to_save.append, escalated, auto, stopped
+        )
+    finally:
+        # Save even if processing was interrupted, so sent items don't show up as new again
+        if to_save:
+            try:
+                client.save_ads(to_save)
+            except Exception as e:
+                logging.error(f"Failed to save {len(to_save)} ads: {str(e)}")
+                print(f"Error: Failed to save ads: {str(e)}")
+    return escalated
 
-    # Then process remaining items
+def _process_items(
+    items: List[FeedItem],
+    address_matcher: AddressMatcher,
+    rules: TriageRules,
+    scorer: ListingScorer,
+    process: Callable[..., None],
+    save: Callable[[FeedItem], None],
+    escalated: List[FeedItem],
+    auto: bool,
+    stopped: Callable[[], bool]
+) -> None:
+    """The body of process_feed_items; skipped items are passed to save, not saved right away."""
+    # Process the items, most promising first
     categorized = categorize_feed_items(items, address_matcher)
+    supported_ids = {item.item_id for item in categorized.supported_items}
+    queue = PriorityQueue(scorer.score, categorized.supported_items + categorized.unsupported_items)
+    total = len(queue)
+    for idx in range(1, total + 1):
+        if stopped():
+            print("\nStopped, the remaining items are left for a later run")
+            return
+        item, score = queue.pop()
+        # Skip if saved on either side, as marked by reconcile_favorites
+        if item.is_saved:
+            continue
+
+        match = item.street_match or address_matcher.is_street_allowed(item.location.street, item.location.city)
+        if item.item_id in supported_ids:
+            print(f"\nSupported Item {idx}/{total} (priority {score:.0f})")
+            _process_supported(item, match, address_matcher, process, save, auto, stopped)
+        else:
+            print(f"\nUnsupported Item {idx}/{total} (priority {score:.0f})")
+            _process_unsupported(item, match, address_matcher, rules, process, save, escalated, auto, stopped)
 
-    # Process supported items first (including those with constraints)
-    if categorized.supported_items:
-        print("\nProcessing supported streets...")
-        for idx, item in enumerate(categorized.supported_items, 1):
-            # Skip if already handled in saved state check
-            if item.is_saved:
-                continue
-
-            print(f"\nSupported Item {idx}/{len(categorized.supported_items)}")
-            match = address_matcher.is_street_allowed(item.location.street, item.location.city)
-            
-            if match.constraint:
-                print(f"Street: {format_hebrew(item.location.street)} ({format_hebrew(match.neighborhood)})")
-                print(f"Constraint: {format_hebrew(match.constraint)}")
-            else:
-                print(f"Street: {format_hebrew(item.location.street)}")
-                
-            print(f"Item link: {item.url}")
-            
-            if match.constraint:
-                if prompt_yes_no("Street has constraints, proceed?"):
-                    process_item(item, client)
-                else:
-                    print("Skipping...")
-                    client.save_ad(item)
-                    continue
-            else:
-                process_item(item, client)
-
-    # Process unsupported items
-    if categorized.unsupported_items:
-        print("\nProcessing unsupported streets...")
-        for idx, item in enumerate(categorized.unsupported_items, 1):
-            # Skip if already handled in saved state check
-            if item.is_saved:
-                continue
-
-            print(f"\nUnsupported Item {idx}/{len(categorized.unsupported_items)}")
-            print(f"Street: {format_hebrew(item.location.street)}")
-            print(f"Item link: {item.url}")
-            if not prompt_yes_no("Street isn't supported, skip?"):
-                process_item(item, client)
-            else:
-                print("Skipping...") 
-                client.save_ad(item)
\ No newline at end of file
+def _process_supported(
+    item: FeedItem,
+    match: StreetMatch,
+    address_matcher: AddressMatcher,
+    process: Callable[..., None],
+    save: Callable[[FeedItem], None],
+    auto: bool,
+    stopped: Callable[[], bool]
+) -> None:
+    """Process an item on a supported street, including streets with constraints."""
+    if match.constraint:
+        print(f"Street: {format_hebrew(item.location.street)} ({format_hebrew(match.neighborhood)})")
+        print(f"Constraint: {format_hebrew(match.constraint)}")
+    else:
+        print(f"Street: {format_hebrew(item.location.street)}")
+
+    print(f"Item link: {item.url}")
+
+    if match.constraint:
+        # Resolve the constraint by the listing's location when the streets file has its area
+        location_check = address_matcher.check_location(item, match)
+        if location_check == GeoCheck.INSIDE:
+            print("Listing is inside the constraint area")
+            process(item)
+        elif location_check == GeoCheck.OUTSIDE:
+            print("Listing is outside the constraint area, skipping...")
+            save(item)
+        elif not auto and stopped():
+            _leave_for_later(item)
+        elif auto or prompt_yes_no("Street has constraints, proceed?"):
+            # In auto mode the rules decide, e.g. by the "constraint" condition, unless the
+            # listing page has the coordinates the feed didn't
+            process(item, lambda enriched: _recheck_constraint(enriched, match, address_matcher))
+        else:
+            print("Skipping...")
+            save(item)
+    else:
+        process(item)
+
+def _recheck_constraint(item: FeedItem, match: StreetMatch, address_matcher: AddressMatcher) -> bool:
+    """Check the constraint area again with what enrichment found; False if the listing is outside it."""
+    location_check = address_matcher.check_location(item, match)
+    if location_check == GeoCheck.OUTSIDE:
+        print("Listing is outside the constraint area, skipping...")
+        return False
+    if location_check == GeoCheck.INSIDE:
+        print("Listing is inside the constraint area")
+    return True
+
+def _process_unsupported(
+    item: FeedItem,
+    match: StreetMatch,
+    address_matcher: AddressMatcher,
+    rules: TriageRules,
+    process: Callable[..., None],
+    save: Callable[[FeedItem], None],
+    escalated: List[FeedItem],
+    auto: bool,
+    stopped: Callable[[], bool]
+) -> None:
+    """Process an item on a street that isn't supported."""
+    print(f"Street: {format_hebrew(item.location.street)}")
+    print(f"Item link: {item.url}")
+
+    location_check = address_matcher.check_location(item, match)
+    if location_check == GeoCheck.OUTSIDE:
+        print("Listing is outside the supported neighborhoods, skipping...")
+        save(item)
+        return
+    if location_check == GeoCheck.INSIDE:
+        neighborhoods = ', '.join(address_matcher.neighborhoods_at(item))
+        print(f"Listing is inside a supported neighborhood: {format_hebrew(neighborhoods)}")
+
+    if auto:
+        # Only enrich what the rules might still decide; an escalated listing on an unsupported
+        # street would be left for manual review anyway, so its page isn't opened
+        if location_check == GeoCheck.INSIDE or rules.evaluate(item).action == TriageAction.ESCALATE:
+            print("Left for manual review")
+            escalated.append(item)
+        else:
+            process(item)
+    elif stopped():
+        _leave_for_later(item)
+    elif not prompt_yes_no("Street isn't supported, skip?"):
+        process(item)
+    else:
+        print("Skipping...")
+        save(item)
@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Dict, List
 
 from src.yad2.models import FeedItem
@@ -17,4 +17,30 @@ class CategorizedFeed:
             'supported_new': len(self.supported_items),
             'unsupported_new': len(self.unsupported_items),
             'saved': len(self.saved_items)
-        } 
\ No newline at end of file
+        } 
+
+@dataclass
+class RecategorizeResult:
+    scanned: int = 0
+    changed: int = 0
+    newly_supported: List[FeedItem] = field(default_factory=list)  # Were stored as unsupported
+    newly_unsupported: List[FeedItem] = field(default_factory=list)  # Were stored as supported
+
+@dataclass
+class FavoritesReconciliation:
+    both: List[str] = field(default_factory=list)  # Saved in the DB and liked on Yad2
+    db_only: List[str] = field(default_factory=list)  # Liked on Yad2 by the reconciliation
+    yad2_only: List[str] = field(default_factory=list)  # Stored in the DB by the reconciliation
+    failed_likes: List[str] = field(default_factory=list)  # DB-only items whose like button wasn't found
+
+    @property
+    def fixed(self) -> int:
+        return len(self.db_only) - len(self.failed_likes) + len(self.yad2_only)
+
+@dataclass
+class DeferredCrawl:
+    """A search URL left unfinished because it ran out of budget."""
+    name: str
+    page: int  # The first page that wasn't fully handled
+    reason: str
+    deferred_items: List[str] = field(default_factory=list)  # Listings left unenriched on that page
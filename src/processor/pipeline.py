@@ -0,0 +1,255 @@
+"""
+Staged pipeline runner: each stage is a pool of worker threads reading from a bounded queue.
+
+A stage handler receives an item and an emit callable, and may emit any number of items to
+the next stage. emit blocks while the next stage's queue is full, so a slow stage holds back
+the ones before it instead of letting work pile up in memory. Items emitted by the last stage
+are collected as the pipeline's results.
+
+Stages that must not run side by side, e.g. two stages driving the same browser, share a
+Handoff: the first stage takes a lease with the item and a later stage releases it when the
+item is done, so the next item only enters once the resource is free again.
+
+Stopping drops the queued items and closes the pipeline's handoffs, so a handler that is
+still running sees the stop the next time it takes the resource, or by checking closed.
+"""
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, List, Optional, Sequence
+
+Emit = Callable[[Any], None]
+
+# Seconds to wait for handlers to return once the pipeline is interrupted
+STOP_TIMEOUT = 10.0
+
+_DONE = object()
+
+
+@dataclass
+class Stage:
+    name: str
+    handler: Callable[[Any, Emit], None]
+    workers: int = 1
+    queue_size: int = 10  # Capacity of the stage's input queue
+    # Called with items that weren't handled: the handler raised, or the pipeline was stopped
+    on_drop: Optional[Callable[[Any], None]] = None
+
+
+@dataclass
+class StageMetrics:
+    name: str
+    workers: int
+    processed: int = 0
+    emitted: int = 0
+    errors: int = 0
+    dropped: int = 0
+    busy_seconds: float = 0.0
+    max_queue_depth: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    @property
+    def throughput(self) -> float:
+        """Items handled per second of work, across all of the stage's workers."""
+        return self.processed * self.workers / self.busy_seconds if self.busy_seconds else 0.0
+
+    def utilization(self, elapsed: float) -> float:
+        """Share of the run's wall time the stage's workers were busy."""
+        return self.busy_seconds / (elapsed * self.workers) if elapsed else 0.0
+
+
+class Lease:
+    def __init__(self, semaphore: threading.Semaphore):
+        self._semaphore = semaphore
+        self._released = False
+        self._lock = threading.Lock()
+
+    def release(self) -> None:
+        """Give the resource back. Safe to call more than once."""
+        with self._lock:
+            if self._released:
+                return
+            self._released = True
+        self._semaphore.release()
+
+
+class Handoff:
+    """A resource held by one item at a time while it moves through several stages."""
+
+    def __init__(self):
+        self._semaphore = threading.Semaphore(1)
+        self._closed = threading.Event()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed.is_set()
+
+    def take(self) -> Optional[Lease]:
+        """Block until the resource is free. None once the handoff is closed."""
+        self._semaphore.acquire()
+        if self.closed:
+            # Pass the wake-up on to the next one waiting
+            self._semaphore.release()
+            return None
+        return Lease(self._semaphore)
+
+    def close(self) -> None:
+        """Stop handing the resource out, waking whoever is waiting for it."""
+        if not self._closed.is_set():
+            self._closed.set()
+            self._semaphore.release()
+
+
+class Pipeline:
+    def __init__(self, stages: List[Stage], handoffs: Sequence[Handoff] = ()):
+        """
+        Args:
+            stages: Stages in the order items flow through them
+            handoffs: Resources shared by the stages, closed when the pipeline is stopped
+        """
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage")
+        self.stages = stages
+        self.handoffs = list(handoffs)
+        self.metrics = [StageMetrics(stage.name, stage.workers) for stage in stages]
+        self.elapsed = 0.0
+        self.results: List[Any] = []
+        self._queues = [queue.Queue(maxsize=stage.queue_size) for stage in stages]
+        self._remaining_workers = [stage.workers for stage in stages]
+        self._results_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self.logger = logging.getLogger(__name__)
+
+    def queue_depths(self) -> List[int]:
+        """Items currently waiting in front of each stage."""
+        return [inbox.qsize() for inbox in self._queues]
+
+    @property
+    def stopping(self) -> bool:
+        return self._stopping.is_set()
+
+    def stop(self) -> None:
+        """Stop handling items; whatever is still queued is dropped and the handoffs are closed."""
+        self._stopping.set()
+        for handoff in self.handoffs:
+            handoff.close()
+
+    def run(self, inputs: Iterable[Any], timeout: float = STOP_TIMEOUT) -> List[Any]:
+        """
+        Feed the inputs to the first stage and wait until every stage is done.
+
+        Args:
+            inputs: Items for the first stage, consumed lazily as it has room for them
+            timeout: Seconds to wait for the workers after a KeyboardInterrupt, in all.
+                Workers still busy after that, e.g. waiting for input, are left behind.
+
+        Returns:
+            Items emitted by the last stage
+        """
+        start = time.perf_counter()
+        for index, stage in enumerate(self.stages):
+            for worker in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._work, args=(index,), name=f"pipeline-{stage.name}-{worker}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+        try:
+            for item in inputs:
+                if self._stopping.is_set():
+                    break
+                self._put(0, item)
+            for _ in range(self.stages[0].workers):
+                self._queues[0].put(_DONE)
+            for thread in self._threads:
+                thread.join()
+        except KeyboardInterrupt:
+            self.stop()
+            deadline = time.monotonic() + timeout
+            try:
+                for _ in range(self.stages[0].workers):
+                    # Frees up as the workers drop what's queued, unless one is stuck in its handler
+                    self._queues[0].put(_DONE, timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Full:
+                pass
+            for thread in self._threads:
+                thread.join(max(0.0, deadline - time.monotonic()))
+            raise
+        finally:
+            self.elapsed = time.perf_counter() - start
+            self._log_metrics()
+        return self.results
+
+    def _put(self, index: int, item: Any) -> None:
+        inbox, metrics = self._queues[index], self.metrics[index]
+        inbox.put(item)
+        depth = inbox.qsize()
+        with metrics._lock:
+            metrics.max_queue_depth = max(metrics.max_queue_depth, depth)
+
+    def _emitter(self, index: int) -> Emit:
+        metrics = self.metrics[index]
+        is_last = index == len(self.stages) - 1
+
+        def emit(item: Any) -> None:
+            if is_last:
+                with self._results_lock:
+                    self.results.append(item)
+            else:
+                self._put(index + 1, item)
+            with metrics._lock:
+                metrics.emitted += 1
+        return emit
+
+    def _drop(self, stage: Stage, item: Any) -> None:
+        if stage.on_drop:
+            try:
+                stage.on_drop(item)
+            except Exception as e:
+                self.logger.error(f"Stage {stage.name} failed to drop an item: {str(e)}")
+
+    def _work(self, index: int) -> None:
+        stage, metrics, inbox = self.stages[index], self.metrics[index], self._queues[index]
+        emit = self._emitter(index)
+        while True:
+            item = inbox.get()
+            if item is _DONE:
+                break
+            if self._stopping.is_set():
+                with metrics._lock:
+                    metrics.dropped += 1
+                self._drop(stage, item)
+                continue
+
+            start = time.perf_counter()
+            try:
+                stage.handler(item, emit)
+                failed = False
+            except Exception as e:
+                failed = True
+                self.logger.error(f"Stage {stage.name} failed: {str(e)}", exc_info=True)
+                self._drop(stage, item)
+            with metrics._lock:
+                metrics.busy_seconds += time.perf_counter() - start
+                metrics.processed += 1
+                metrics.errors += failed
+
+        # The last worker out tells every worker of the next stage there is nothing more coming
+        with metrics._lock:
+            self._remaining_workers[index] -= 1
+            last_worker = self._remaining_workers[index] == 0
+        if last_worker and index + 1 < len(self.stages):
+            for _ in range(self.stages[index + 1].workers):
+                self._queues[index + 1].put(_DONE)
+
+    def _log_metrics(self) -> None:
+        for metrics in self.metrics:
+            self.logger.info(
+                f"Stage {metrics.name}: {metrics.processed} items, {metrics.errors} failed, "
+                f"{metrics.dropped} dropped, {metrics.throughput:.2f} items/s, "
+                f"{metrics.utilization(self.elapsed):.0%} busy, max queue {metrics.max_queue_depth}"
+            )
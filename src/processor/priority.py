@@ -0,0 +1,111 @@
+"""
+Priority of listings for review and enrichment, so the most promising ones come first.
+
+A listing's score adds up:
+    street match    STREET_SCORE for a supported street, less CONSTRAINT_PENALTY if the
+                    street has a constraint; nothing for other streets
+    price per m²    up to PRICE_SCORE for a price per m² below its neighborhood's median,
+                    as much taken off above it
+    private         PRIVATE_SCORE for listings not posted by an agency
+    freshness       FRESHNESS_SCORE for a listing first seen now, down to nothing after
+                    FRESHNESS_DAYS
+"""
+import heapq
+import itertools
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from src.db.listings_repository import ListingsRepository
+from src.yad2.models import FeedItem
+
+STREET_SCORE = 40
+CONSTRAINT_PENALTY = 15
+PRICE_SCORE = 25
+# Price per m² this far below the median (as a share of it) earns the whole PRICE_SCORE
+PRICE_SCORE_RANGE = 0.25
+PRIVATE_SCORE = 10
+FRESHNESS_SCORE = 15
+FRESHNESS_DAYS = 7
+
+
+class ListingScorer:
+    def __init__(
+        self,
+        medians: Dict[Tuple[str, str], float],
+        first_seen: Dict[str, datetime],
+        now: Optional[datetime] = None
+    ):
+        """
+        Args:
+            medians: Median price per m² by (city, neighborhood), see price_per_sqm_medians
+            first_seen: When listings were first seen; missing listings count as new
+        """
+        self.medians = medians
+        self.first_seen = first_seen
+        self.now = now or datetime.now()
+
+    def score(self, item: FeedItem) -> float:
+        return self.street_score(item) + self.price_score(item) + self.private_score(item) + self.freshness(item)
+
+    @staticmethod
+    def street_score(item: FeedItem) -> float:
+        match = item.street_match
+        if match is None or not match.is_allowed:
+            return 0
+        return STREET_SCORE - (CONSTRAINT_PENALTY if match.constraint else 0)
+
+    def price_score(self, item: FeedItem) -> float:
+        """Nothing if the listing's price per m² or its neighborhood's median is unknown."""
+        median = self.medians.get((item.location.city, item.location.neighborhood))
+        if not median or not item.price or not item.specs.size_sqm:
+            return 0
+        below_median = (median - item.price / item.specs.size_sqm) / median
+        return PRICE_SCORE * max(-1.0, min(1.0, below_median / PRICE_SCORE_RANGE))
+
+    @staticmethod
+    def private_score(item: FeedItem) -> float:
+        return 0 if item.is_agency else PRIVATE_SCORE
+
+    def freshness(self, item: FeedItem) -> float:
+        first_seen = self.first_seen.get(item.item_id)
+        if first_seen is None:
+            return FRESHNESS_SCORE
+        age_days = max(0.0, (self.now - first_seen).total_seconds() / 86400)
+        return FRESHNESS_SCORE * max(0.0, 1 - age_days / FRESHNESS_DAYS)
+
+
+def build_scorer(
+    listings_repo: ListingsRepository,
+    items: List[FeedItem],
+    medians: Optional[Dict[Tuple[str, str], float]] = None
+) -> ListingScorer:
+    """
+    A scorer with the stored listings' medians and the items' first seen times.
+
+    Args:
+        medians: Medians loaded once for a run of several batches, loaded from listings_repo if not given
+    """
+    first_seen = listings_repo.first_seen(item.item_id for item in items)
+    return ListingScorer(listings_repo.price_per_sqm_medians() if medians is None else medians, first_seen)
+
+
+class PriorityQueue:
+    """Max-heap of listings by score. Listings with the same score keep the order they were added in."""
+
+    def __init__(self, score: Callable[[FeedItem], float], items: Iterable[FeedItem] = ()):
+        self._score = score
+        self._heap: List[Tuple[float, int, FeedItem]] = []
+        self._order = itertools.count()
+        for item in items:
+            self.push(item)
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, item: FeedItem) -> None:
+        heapq.heappush(self._heap, (-self._score(item), next(self._order), item))
+
+    def pop(self) -> Tuple[FeedItem, float]:
+        """The highest scoring listing and its score."""
+        score, _, item = heapq.heappop(self._heap)
+        return item, -score
@@ -0,0 +1,59 @@
+import logging
+from typing import Optional
+
+from src.address import AddressMatcher, StreetMatch
+from src.db.database import Database
+from src.db.listings_repository import QUERY_CHUNK_SIZE, ListingsRepository
+from src.db.models import Listing
+
+from .models import RecategorizeResult
+
+
+def _is_unchanged(listing: Listing, match: StreetMatch) -> bool:
+    return (
+        listing.is_supported is not None
+        and bool(listing.is_supported) == match.is_allowed
+        and listing.matched_neighborhood == match.neighborhood
+        and listing.match_constraint == match.constraint
+    )
+
+def recategorize_listings(
+    listings_repo: ListingsRepository,
+    address_matcher: AddressMatcher,
+    chunk_size: int = QUERY_CHUNK_SIZE,
+) -> RecategorizeResult:
+    """
+    Match every stored listing against the current supported streets and store the
+    categorizations that changed. Works chunk by chunk so memory stays flat.
+
+    Returns:
+        Counts, and the listings whose supported state flipped
+    """
+    result = RecategorizeResult()
+    for chunk in listings_repo.iter_chunks(chunk_size):
+        items = [listings_repo.to_feed_item(listing) for listing in chunk]
+        matches = address_matcher.match_streets(items)
+
+        changed = {}
+        for listing, item, match in zip(chunk, items, matches):
+            if _is_unchanged(listing, match):
+                continue
+            changed[item.item_id] = match
+            if listing.is_supported is False and match.is_allowed:
+                result.newly_supported.append(item)
+            elif listing.is_supported and not match.is_allowed:
+                result.newly_unsupported.append(item)
+
+        listings_repo.update_categorizations(changed)
+        result.scanned += len(chunk)
+        result.changed += len(changed)
+        logging.debug(f"Recategorized {result.scanned} listings, {result.changed} changed")
+
+    return result
+
+def recategorize_stored_listings(address_matcher: AddressMatcher, db: Optional[Database] = None) -> RecategorizeResult:
+    """Run recategorize_listings on the local database, without the browser or the write-behind queue."""
+    db = db or Database()
+    db.create_tables()
+    with db.session_scope() as session:
+        return recategorize_listings(ListingsRepository(session), address_matcher)
@@ -0,0 +1,224 @@
+"""
+Declarative triage rules, compiled once into predicates and evaluated per listing.
+
+A rules file is an ordered list of rules; the first rule whose conditions all hold decides:
+
+    {
+        "default": "escalate",
+        "rules": [
+            {"name": "Last floor", "action": "reject", "when": {"floor": "last"}},
+            {"name": "Over budget", "action": "reject", "when": {"price": {"min": 3500001}}},
+            {"name": "Good fit", "action": "approve", "when": {
+                "price": {"max": 3200000}, "rooms": {"min": 3.5}, "agency": false,
+                "features": {"has_elevator": true}, "constraint": false
+            }}
+        ]
+    }
+
+Conditions:
+    price, rooms, size_sqm  {"min": x, "max": y}, both inclusive and optional
+    floor                   "last", "not_last", "ground", or {"min": x, "max": y}
+    agency                  true for agency listings, false for private ones
+    features                {"has_elevator": true, "has_parking": false, ...}
+    supported               whether the street is in the supported streets list
+    constraint              whether the supported street has a constraint
+    tags                    {"any": [...], "none": [...]}
+
+Floor and features are only known after enrichment. Before it, a rule that depends
+on them can't decide, and neither can the rules after it, since it might have matched.
+"""
+import json
+import logging
+from dataclasses import dataclass, fields
+from enum import Enum
+from typing import Callable, Dict, List, Optional
+
+from src.yad2.models import FeedItem, PropertyFeatures
+
+FEATURE_NAMES = [f.name for f in fields(PropertyFeatures) if f.name.startswith('has_')]
+
+DEFAULT_RULES: dict = {
+    "default": "escalate",
+    "rules": [
+        {"name": "Last floor", "action": "reject", "when": {"floor": "last"}},
+    ],
+}
+
+
+class TriageAction(Enum):
+    APPROVE = 'approve'
+    REJECT = 'reject'
+    ESCALATE = 'escalate'
+
+
+@dataclass(frozen=True)
+class TriageDecision:
+    action: TriageAction
+    rule: Optional[str] = None  # Name of the deciding rule, None for the default action
+
+
+# A predicate returns None when the item doesn't have the data to decide yet
+Predicate = Callable[[FeedItem], Optional[bool]]
+
+
+def _range(getter: Callable[[FeedItem], Optional[float]], bounds: dict) -> Predicate:
+    unknown_keys = set(bounds) - {'min', 'max'}
+    if unknown_keys or not bounds:
+        raise ValueError(f"Range needs 'min' and/or 'max', got {sorted(bounds)}")
+    low, high = bounds.get('min'), bounds.get('max')
+
+    def predicate(item: FeedItem) -> Optional[bool]:
+        value = getter(item)
+        if value is None:
+            return None
+        return (low is None or value >= low) and (high is None or value <= high)
+    return predicate
+
+def _current_floor(item: FeedItem) -> Optional[int]:
+    features = item.specs.features
+    return features.current_floor if features.current_floor is not None else item.specs.floor
+
+def _floor(spec) -> Predicate:
+    if isinstance(spec, dict):
+        return _range(_current_floor, spec)
+    if spec == 'ground':
+        def predicate(item: FeedItem) -> Optional[bool]:
+            floor = _current_floor(item)
+            return None if floor is None else floor <= 0
+        return predicate
+    if spec in ('last', 'not_last'):
+        want_last = spec == 'last'
+
+        def predicate(item: FeedItem) -> Optional[bool]:
+            features = item.specs.features
+            if features.current_floor is None or features.total_floors is None:
+                return None
+            return (features.current_floor == features.total_floors) == want_last
+        return predicate
+    raise ValueError(f"Unknown floor condition {spec!r}")
+
+def _features(spec: Dict[str, bool]) -> Predicate:
+    unknown = set(spec) - set(FEATURE_NAMES)
+    if unknown:
+        raise ValueError(f"Unknown features {sorted(unknown)}")
+
+    def predicate(item: FeedItem) -> Optional[bool]:
+        # Features are filled by enrichment, which also fills the floors
+        if item.specs.features.total_floors is None:
+            return None
+        return all(getattr(item.specs.features, name) == expected for name, expected in spec.items())
+    return predicate
+
+def _street_match(field_name: str, expected: bool) -> Predicate:
+    def predicate(item: FeedItem) -> Optional[bool]:
+        match = item.street_match
+        if match is None:
+            return None
+        value = match.is_allowed if field_name == 'supported' else bool(match.constraint)
+        return value == expected
+    return predicate
+
+def _tags(spec: dict) -> Predicate:
+    unknown_keys = set(spec) - {'any', 'none'}
+    if unknown_keys:
+        raise ValueError(f"Tags condition supports 'any' and 'none', got {sorted(unknown_keys)}")
+    any_of, none_of = set(spec.get('any', [])), set(spec.get('none', []))
+
+    def predicate(item: FeedItem) -> Optional[bool]:
+        tags = set(item.tags)
+        return (not any_of or bool(tags & any_of)) and not (tags & none_of)
+    return predicate
+
+def _compile_condition(name: str, spec) -> Predicate:
+    if name == 'price':
+        return _range(lambda item: item.price, spec)
+    if name == 'rooms':
+        return _range(lambda item: item.specs.rooms, spec)
+    if name == 'size_sqm':
+        return _range(lambda item: item.specs.size_sqm, spec)
+    if name == 'floor':
+        return _floor(spec)
+    if name == 'agency':
+        return lambda item: item.is_agency == bool(spec)
+    if name == 'features':
+        return _features(spec)
+    if name in ('supported', 'constraint'):
+        return _street_match(name, bool(spec))
+    if name == 'tags':
+        return _tags(spec)
+    raise ValueError(f"Unknown condition {name!r}")
+
+
+@dataclass(frozen=True)
+class _Rule:
+    name: str
+    action: TriageAction
+    predicates: List[Predicate]
+
+    def matches(self, item: FeedItem) -> Optional[bool]:
+        """True if every condition holds, False if one fails, None if one can't be decided yet."""
+        result = True
+        for predicate in self.predicates:
+            value = predicate(item)
+            if value is False:
+                return False
+            if value is None:
+                result = None
+        return result
+
+
+class TriageRules:
+    def __init__(self, config: dict):
+        """
+        Compile a rules config.
+
+        Raises:
+            ValueError: If a rule has an unknown action or condition
+        """
+        self.default = self._action(config.get('default', 'escalate'))
+        self.rules: List[_Rule] = []
+        for index, rule in enumerate(config.get('rules', []), 1):
+            name = rule.get('name') or f"rule {index}"
+            try:
+                predicates = [_compile_condition(key, spec) for key, spec in rule.get('when', {}).items()]
+                self.rules.append(_Rule(name=name, action=self._action(rule['action']), predicates=predicates))
+            except (KeyError, ValueError, TypeError) as e:
+                raise ValueError(f"Invalid triage rule '{name}': {str(e)}") from e
+
+    @staticmethod
+    def _action(value: str) -> TriageAction:
+        try:
+            return TriageAction(value)
+        except ValueError:
+            raise ValueError(f"Unknown action {value!r}, expected one of {[a.value for a in TriageAction]}") from None
+
+    def evaluate(self, item: FeedItem) -> TriageDecision:
+        """
+        Apply the rules in order.
+
+        Returns:
+            The first matching rule's action. ESCALATE without a rule if a rule couldn't be
+            decided with the item's current data; the default action if no rule matched.
+        """
+        for rule in self.rules:
+            matched = rule.matches(item)
+            if matched is None:
+                return TriageDecision(TriageAction.ESCALATE)
+            if matched:
+                return TriageDecision(rule.action, rule.name)
+        return TriageDecision(self.default)
+
+
+def load_rules(path: Optional[str]) -> TriageRules:
+    """Load a rules file, or the default rules if there is none."""
+    if path is None:
+        return TriageRules(DEFAULT_RULES)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+    except FileNotFoundError:
+        logging.info(f"No triage rules file at {path}, using the default rules")
+        return TriageRules(DEFAULT_RULES)
+    rules = TriageRules(config)
+    logging.info(f"Loaded {len(rules.rules)} triage rules from {path}")
+    return rules
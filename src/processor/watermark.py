@@ -0,0 +1,49 @@
+"""
+Per search URL crawl watermarks.
+
+Search results are sorted newest first, so once a page holds a listing an earlier run already
+handled, the listings after it were there for that run too and the crawl of that URL can stop.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+from src.db.sync_state_repository import SyncStateRepository
+from src.yad2.models import FeedItem
+
+# Stop paginating a search URL after this many pages, even if every page has new listings
+MAX_CRAWL_PAGES = 10
+# IDs kept per search URL; a few pages' worth is enough to recognize the first page
+WATERMARK_MAX_IDS = 1000
+
+
+@dataclass
+class CrawlWatermark:
+    item_ids: List[str] = field(default_factory=list)  # Handled listings, most recently handled first
+    crawled_at: Optional[datetime] = None
+
+    def reaches(self, items: List[FeedItem]) -> bool:
+        """True if a page holds any listing handled by an earlier run, so the pages after it are older."""
+        known = set(self.item_ids)
+        return any(item.item_id in known for item in items)
+
+    def advance(self, item_ids: Iterable[str], crawled_at: Optional[datetime] = None) -> 'CrawlWatermark':
+        """A watermark that also knows item_ids, keeping the most recently handled IDs."""
+        item_ids = list(dict.fromkeys(list(item_ids) + self.item_ids))
+        return CrawlWatermark(item_ids[:WATERMARK_MAX_IDS], crawled_at or datetime.now())
+
+
+def _key(url: str) -> str:
+    return f"watermark:{url}"
+
+def load_watermark(sync_state_repo: SyncStateRepository, url: str) -> CrawlWatermark:
+    state = sync_state_repo.get(_key(url))
+    if not state:
+        return CrawlWatermark()
+    return CrawlWatermark(state['item_ids'], datetime.fromisoformat(state['crawled_at']))
+
+def save_watermark(sync_state_repo: SyncStateRepository, url: str, watermark: CrawlWatermark) -> None:
+    sync_state_repo.set(_key(url), {
+        'item_ids': watermark.item_ids,
+        'crawled_at': watermark.crawled_at.isoformat(),
+    })
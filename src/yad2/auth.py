@@ -46,8 +46,7 @@ class Yad2Auth:
             self.browser.random_delay(7.0, 9.0)
 
             # Check for CAPTCHA after click
-            if self.browser.check_for_captcha():
-                input("Press Enter once you've completed the CAPTCHA...")
+            self.browser.solve_captcha()
 
             # Add a small delay to allow for redirect
             self.browser.random_delay(5.0, 7.0)
@@ -13,6 +13,8 @@ class Browser:
     def __init__(self, headless: bool = True):
         self.headless = headless
         self.driver = None
+        # Unattended runs leave CAPTCHA challenges unsolved instead of waiting for the user
+        self.unattended = False
         self.logger = logging.getLogger(__name__)
 
     def init_driver(self) -> webdriver.Chrome:
@@ -119,4 +121,19 @@ class Browser:
             self.logger.warning(message)
             print(message)
             return True
-        return False
\ No newline at end of file
+        return False
+
+    def solve_captcha(self) -> bool:
+        """
+        Wait for the user to complete the CAPTCHA challenge on the current page, if there is one.
+
+        Returns:
+            bool: False if a challenge was left unsolved because the run is unattended
+        """
+        if not self.check_for_captcha():
+            return True
+        if self.unattended:
+            self.logger.warning("Running unattended, leaving the CAPTCHA challenge unsolved")
+            return False
+        input("Press Enter once you've completed the CAPTCHA...")
+        return True
\ No newline at end of file
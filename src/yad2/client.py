@@ -1,6 +1,7 @@
 import logging
 import re
-from typing import List, Tuple
+from typing import Collection, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlparse
 
 from dotenv import load_dotenv
 from selenium.webdriver.common.by import By
@@ -12,16 +13,31 @@ from .browser import Browser
 from .feed_handler import FeedHandler
 from .feed_parser import FeedParser
 from .item_enricher import ItemEnricher
-from .models import FeedItem
+from .models import FeedItem, FeedPage
 from .navigation import NavigationHandler
 
+# Finds a listing's like button on the current page and tells whether the listing is already
+# saved, by the button's icon: saved has 1 class, unsaved has 2 (see FeedParser._is_saved).
+# Clicking the button of a saved listing would unsave it.
+_LIKE_BUTTON_SCRIPT = """
+    function likeButtonOf(itemId) {
+        const itemLink = document.querySelector(`a[href*="/realestate/item/${itemId}"]`);
+        const itemContainer = itemLink && itemLink.closest('div[class*="card_cardBox"]');
+        return itemContainer && itemContainer.querySelector('[data-testid="like-button"]');
+    }
+    function isLiked(likeButton) {
+        const icon = likeButton.querySelector('div');
+        return Boolean(icon) && icon.classList.length === 1;
+    }
+"""
+
 
 class Yad2Client:
     BASE_URL = "https://www.yad2.co.il"
     REALESTATE_URL = f"{BASE_URL}/realestate/forsale"
     SAVED_ITEMS_URL = f"{BASE_URL}/my-favorites"
 
-    def __init__(self, headless: bool = True, saved_items_repo=None):
+    def __init__(self, headless: bool = True, saved_items_repo=None, listings_repo=None):
         load_dotenv()
         self.browser = Browser(headless=headless)
         self.browser.init_driver()
@@ -33,10 +49,15 @@ class Yad2Client:
         self.auth = Yad2Auth(self.browser)
         self.enricher = ItemEnricher(self.browser)
         self._saved_items_repo = None  # Initialize private variable
+        self.listings_repo = listings_repo
         self.navigation = NavigationHandler(self.browser, saved_items_repo)
         self.feed_handler = FeedHandler(self.browser, self.parser)
         self.email_sender = EmailSender()
         self.logger = logging.getLogger(__name__)
+        # Search pages opened side by side in tabs, see open_tabs
+        self._main_window: Optional[str] = None
+        self._current_tab: Optional[str] = None
+        self._item_tabs: Dict[str, str] = {}  # Listing ID -> tab showing its card
         
         # Set saved_items_repo after navigation is initialized
         self.saved_items_repo = saved_items_repo
@@ -53,14 +74,20 @@ class Yad2Client:
         if hasattr(self, 'navigation'):
             self.navigation.saved_items_repo = value
 
+    @property
+    def unattended(self) -> bool:
+        """Whether CAPTCHA challenges are left unsolved instead of waiting for the user."""
+        return self.browser.unattended
+
+    @unattended.setter
+    def unattended(self, value: bool):
+        self.browser.unattended = value
+
     def navigate_to(self, url: str) -> bool:
         success = self.navigation.navigate_to(url)
         
         # Check for CAPTCHA after navigation
-        if self.browser.check_for_captcha():
-            input("Press Enter once you've completed the CAPTCHA...")
-        
-        return success
+        return self.browser.solve_captcha() and success
 
     def _deduplicate_items(self, items: List[FeedItem]) -> List[FeedItem]:
         """Remove duplicate items based on URL while preserving order."""
@@ -80,26 +107,38 @@ class Yad2Client:
 
     def get_feed_items(self) -> List[FeedItem]:
         """Get feed items from current page."""
+        return self.get_feed_page().items
+
+    def get_feed_page(self, skip_ids: Optional[Collection[str]] = None) -> FeedPage:
+        """
+        Get feed items from current page.
+
+        Args:
+            skip_ids: IDs of listings not to parse, reported in FeedPage.skipped_ids instead
+        """
         try:
             # Check for CAPTCHA before getting items
-            if self.browser.check_for_captcha():
-                input("Press Enter once you've completed the CAPTCHA...")
+            if not self.browser.solve_captcha():
+                return FeedPage([], captcha=True)
             
             # Get and deduplicate items
-            items = self.feed_handler.get_feed_items()
-            return self._deduplicate_items(items)
+            page = self.feed_handler.get_feed_page(skip_ids)
+            page.items = self._deduplicate_items(page.items)
+            if self._current_tab:
+                self._item_tabs.update((item.item_id, self._current_tab) for item in page.items)
+            return page
             
         except Exception as e:
             self.logger.error(f"Error while getting feed items: {str(e)}")
             print(f"Error while getting feed items: {str(e)}")
-            return []
+            return FeedPage([])
 
     def get_saved_items(self) -> List[Tuple[str, str]]:
         """Get items from the saved items page."""
         try:
             # Check for CAPTCHA before getting items
-            if self.browser.check_for_captcha():
-                input("Press Enter once you've completed the CAPTCHA...")
+            if not self.browser.solve_captcha():
+                return []
             
             # Get saved items
             return self.feed_handler.get_saved_items()
@@ -109,6 +148,50 @@ class Yad2Client:
             print(f"Error while getting saved items: {str(e)}")
             return []
 
+    def open_tabs(self, urls: List[str]) -> List[str]:
+        """
+        Open search URLs in background tabs, which load side by side instead of one after
+        the other. Switch to each with switch_to_tab to read it, and close them with close_tabs.
+
+        Returns:
+            List[str]: Window handle of each URL's tab, in order
+        """
+        self._main_window = self.browser.driver.current_window_handle
+        return self.navigation.open_tabs(urls)
+
+    def switch_to_tab(self, handle: str) -> bool:
+        """Make a tab from open_tabs the current page, waiting for it to finish loading."""
+        success = self.navigation.switch_to_tab(handle)
+        self._current_tab = handle
+
+        # Check for CAPTCHA after the tab loaded
+        return self.browser.solve_captcha() and success
+
+    def close_tabs(self, handles: List[str]) -> None:
+        """Close tabs from open_tabs and go back to the tab that was current when they were opened."""
+        self.navigation.close_tabs(handles, self._main_window)
+        self._current_tab = None
+        closed = set(handles)
+        self._item_tabs = {item_id: tab for item_id, tab in self._item_tabs.items() if tab not in closed}
+
+    @staticmethod
+    def page_url(url: str, page: int) -> str:
+        """The URL of a given page of search results."""
+        parsed = urlparse(url)
+        query = [(key, value) for key, value in parse_qsl(parsed.query) if key != 'page']
+        if page > 1:
+            query.append(('page', str(page)))
+        return parsed._replace(query=urlencode(query)).geturl()
+
+    @staticmethod
+    def is_paged_url(url: str) -> bool:
+        """Whether the URL already points at a specific page of search results."""
+        return any(key == 'page' for key, _ in parse_qsl(urlparse(url).query))
+
+    def get_total_pages(self) -> int:
+        """Get total number of pages of the current search results."""
+        return self._get_total_pages()
+
     def _get_total_pages(self) -> int:
         """Get total number of pages from pagination element."""
         try:
@@ -172,8 +255,17 @@ class Yad2Client:
         """
         Enriches a FeedItem with additional information from the listing page.
         Opens the item in a new tab and closes it when done.
+        The enriched listing is stored in the database if a listings repository is set.
         """
-        return self.enricher.enrich_item(item)
+        enriched_item = self.enricher.enrich_item(item)
+
+        if self.listings_repo:
+            try:
+                self.listings_repo.upsert_item(enriched_item)
+            except Exception as e:
+                self.logger.error(f"Failed to store enriched item {item.item_id}: {str(e)}")
+
+        return enriched_item
     
 
     def send_feed_item(self, item: FeedItem) -> None:
@@ -216,20 +308,15 @@ class Yad2Client:
         
         try:
             # Execute JavaScript to find and click the button for this specific item
-            success = self.browser.driver.execute_script("""
-                // Find the feed item by its base URL (without query params)
-                const itemId = arguments[0];
-                const itemLink = document.querySelector(`a[href*="/realestate/item/${itemId}"]`);
-                if (!itemLink) return false;
-                
-                // Find the like button within this item's container
-                const itemContainer = itemLink.closest('div[class*="card_cardBox"]');
-                if (!itemContainer) return false;
-                
-                const likeButton = itemContainer.querySelector('[data-testid="like-button"]');
+            success = self.browser.driver.execute_script(_LIKE_BUTTON_SCRIPT + """
+                // Find the like button within the container of the item's link
+                const likeButton = likeButtonOf(arguments[0]);
                 if (!likeButton) return false;
-                
-                likeButton.click();
+
+                // Already saved, e.g. by a batch script that failed part way
+                if (!isLiked(likeButton)) {
+                    likeButton.click();
+                }
                 return true;
             """, item.item_id)
             
@@ -260,6 +347,112 @@ class Yad2Client:
             print("Error saving ad!")
             return False
 
+    def save_ads(self, items: List[FeedItem]) -> Dict[str, bool]:
+        """
+        Saves many feed items: clicks all of their like buttons in one script and stores the
+        saved ones in the database with one write. Items whose button wasn't found are retried
+        one by one with save_ad. Items read from a tab (see open_tabs) are clicked in their tab.
+
+        Args:
+            items: FeedItems shown on the current page or in an open tab
+
+        Returns:
+            Dict[str, bool]: Whether each item was saved on Yad2 and in the database
+        """
+        items = list({item.item_id: item for item in items if item and item.item_id}.values())
+        if not items:
+            return {}
+
+        by_tab: Dict[Optional[str], List[FeedItem]] = {}
+        for item in items:
+            by_tab.setdefault(self._item_tabs.get(item.item_id), []).append(item)
+        if list(by_tab) == [None]:
+            results = self._save_ads_on_page(items)
+        else:
+            driver = self.browser.driver
+            current = driver.current_window_handle
+            results = {}
+            try:
+                for tab, tab_items in by_tab.items():
+                    driver.switch_to.window(tab or current)
+                    results.update(self._save_ads_on_page(tab_items))
+            finally:
+                driver.switch_to.window(current)
+
+        print(f"Saved {sum(results.values())}/{len(results)} ads")
+        return results
+
+    def _save_ads_on_page(self, items: List[FeedItem]) -> Dict[str, bool]:
+        """save_ads for items shown on the current page."""
+        results = self.click_like_buttons([item.item_id for item in items])
+        liked = [item for item in items if results[item.item_id]]
+        liked_ids = {item.item_id for item in liked}
+        if liked and self.saved_items_repo:
+            try:
+                self.saved_items_repo.add_items((item.item_id, item.url) for item in liked)
+                self.logger.info(f"Successfully saved {len(liked)} items to database")
+            except Exception as e:
+                self.logger.error(f"Failed to save {len(liked)} items to database: {str(e)}")
+                print("Warning: Items saved on Yad2 but failed to save to local database")
+                results.update((item.item_id, False) for item in liked)
+        elif liked:
+            self.logger.warning("No database repository available to save items")
+
+        # Only retry items that weren't clicked, clicking a liked item again would unlike it
+        for item in items:
+            if item.item_id not in liked_ids:
+                results[item.item_id] = self.save_ad(item)
+
+        return results
+
+    def click_like_buttons(self, item_ids: List[str]) -> Dict[str, bool]:
+        """
+        Clicks the like button of each listing on the current page, all in one script execution.
+        Listings already saved aren't clicked again. Only clicks; storing the saved items is up
+        to the caller.
+
+        Args:
+            item_ids: IDs of listings shown on the current page
+
+        Returns:
+            Dict[str, bool]: Whether each listing is saved on Yad2 now
+        """
+        if not item_ids:
+            return {}
+        try:
+            clicked = self.browser.driver.execute_script(_LIKE_BUTTON_SCRIPT + """
+                // An error on one listing leaves the rest to be clicked, and the results
+                // tell the caller which listings are saved now
+                const results = {};
+                for (const itemId of arguments[0]) {
+                    try {
+                        const likeButton = likeButtonOf(itemId);
+                        if (likeButton && !isLiked(likeButton)) {
+                            likeButton.click();
+                        }
+                        results[itemId] = Boolean(likeButton);
+                    } catch (e) {
+                        results[itemId] = false;
+                    }
+                }
+                return results;
+            """, list(item_ids)) or {}
+        except Exception as e:
+            # Retrying these with save_ad is safe, it doesn't click listings that are already saved
+            self.logger.error(f"Error while trying to like {len(item_ids)} items: {str(e)}")
+            clicked = {}
+
+        results = {item_id: bool(clicked.get(item_id)) for item_id in item_ids}
+        failed = [item_id for item_id, success in results.items() if not success]
+        if failed:
+            self.logger.warning(f"Could not find save button for items {', '.join(failed)}")
+        self.logger.info(f"Liked {len(item_ids) - len(failed)}/{len(item_ids)} items on Yad2")
+        return results
+
+    def get_favorites_count(self) -> Optional[int]:
+        """Number of saved items shown in the header badge of the current page, None if unknown."""
+        return self.navigation.read_favorites_count()
+
     def navigate_to_saved_items(self) -> bool:
         """Navigate to the saved items page."""
         return self.navigate_to(self.SAVED_ITEMS_URL)
@@ -1,14 +1,49 @@
 import logging
-from typing import List, Tuple
+from typing import Collection, List, Optional, Tuple
 
 from selenium.webdriver.common.by import By
 from selenium.webdriver.remote.webelement import WebElement
 
 from .browser import Browser
-from .feed_parser import FeedParser
-from .models import FeedItem
+from .feed_parser import FeedParser, item_id_from_url
+from .models import FeedItem, FeedPage
+from .next_data import extract_listing_coordinates, read_next_data
 from .saved_feed_parser import SavedFeedParser
-from .selectors import FEED_CONTAINER, FEED_ITEM, SAVED_ITEM, SAVED_ITEMS_CONTAINER
+from .selectors import FEED_CONTAINER, FEED_ITEM, ITEM_LINK, SAVED_ITEM, SAVED_ITEM_LINK, SAVED_ITEMS_CONTAINER
+
+# The favorites grid renders more cards as it is scrolled. Scroll to the last card and wait,
+# until a wait passes without new cards.
+SAVED_ITEMS_SCROLL_PAUSE = 0.75
+SAVED_ITEMS_MAX_SCROLLS = 40
+
+_CARD_LINKS_SCRIPT = """
+    const [cards, selector] = arguments;
+    return cards.map(card => {
+        const link = card.querySelector(selector);
+        return link ? link.href : null;
+    });
+"""
+
+_COLLECT_SAVED_ITEMS_SCRIPT = """
+    const [selector, pauseMs, maxScrolls, done] = arguments;
+    let count = -1;
+    let scrolls = 0;
+    const step = () => {
+        const links = document.querySelectorAll(selector);
+        if (links.length === count || scrolls >= maxScrolls) {
+            done(Array.from(links, link => link.href));
+            return;
+        }
+        count = links.length;
+        scrolls++;
+        if (links.length) {
+            links[links.length - 1].scrollIntoView({block: 'end'});
+        }
+        window.scrollTo(0, document.body.scrollHeight);
+        setTimeout(step, pauseMs);
+    };
+    step();
+"""
 
 
 class FeedHandler:
@@ -21,11 +56,14 @@ class FeedHandler:
     def get_saved_items(self) -> List[Tuple[str, str]]:
         """Get items from the saved items page."""
         try:
-            if self.browser.check_for_captcha():
-                input("Press Enter once you've completed the CAPTCHA...")
+            if not self.browser.solve_captcha():
+                return []
             
             container = self.browser.wait_for_element(By.CSS_SELECTOR, SAVED_ITEMS_CONTAINER)
-            return self._get_saved_items(container)
+            if not container:
+                self.logger.warning("Saved items grid not found")
+                return []
+            return self._get_saved_items()
             
         except Exception as e:
             self.logger.error(f"Failed to get saved items: {str(e)}")
@@ -33,40 +71,108 @@ class FeedHandler:
 
     def get_feed_items(self) -> List[FeedItem]:
         """Get items from the regular feed page."""
+        return self.get_feed_page().items
+
+    def get_feed_page(self, skip_ids: Optional[Collection[str]] = None) -> FeedPage:
+        """
+        Get items from the regular feed page.
+
+        Args:
+            skip_ids: IDs of listings not to parse, e.g. ones already handled in this run
+        """
         try:
-            if self.browser.check_for_captcha():
-                input("Press Enter once you've completed the CAPTCHA...")
+            if not self.browser.solve_captcha():
+                return FeedPage([], captcha=True)
             
             container = self.browser.wait_for_element(By.CSS_SELECTOR, FEED_CONTAINER)
-            return self._get_regular_items(container)
+            return self._get_regular_items(container, skip_ids)
             
         except Exception as e:
             self.logger.error(f"Failed to get feed items: {str(e)}")
-            return []
+            return FeedPage([])
 
-    def _get_saved_items(self, container: WebElement) -> List[Tuple[str, str]]:
-        """Parse items from saved items page, returning list of (item_id, url) tuples."""
-        saved_items = container.find_elements(By.CSS_SELECTOR, SAVED_ITEM)
-        
-        parsed_items = []
-        for item in saved_items:
-            parsed_item = self.saved_parser.parse_item(item)
+    def _get_saved_items(self) -> List[Tuple[str, str]]:
+        """
+        Collect every saved item, returning list of (item_id, url) tuples.
+
+        A single script scrolls the grid until it stops growing and returns all the links,
+        instead of a round-trip per card.
+        """
+        driver = self.browser.driver
+        max_wait = SAVED_ITEMS_SCROLL_PAUSE * (SAVED_ITEMS_MAX_SCROLLS + 1)
+        # The timeout is the driver's, so the session's other async scripts get theirs back
+        previous_timeout = driver.timeouts.script
+        driver.set_script_timeout(max_wait + 10)
+        try:
+            hrefs = driver.execute_async_script(
+                _COLLECT_SAVED_ITEMS_SCRIPT,
+                f"{SAVED_ITEMS_CONTAINER} {SAVED_ITEM} {SAVED_ITEM_LINK}",
+                int(SAVED_ITEMS_SCROLL_PAUSE * 1000),
+                SAVED_ITEMS_MAX_SCROLLS
+            )
+        finally:
+            driver.set_script_timeout(previous_timeout)
+
+        parsed_items = {}
+        for href in hrefs or []:
+            parsed_item = self.saved_parser.parse_url(href)
             if parsed_item:
-                parsed_items.append(parsed_item)
-                
-        return parsed_items
+                parsed_items.setdefault(parsed_item[0], parsed_item)
+
+        self.logger.info(f"Found {len(parsed_items)} saved items")
+        return list(parsed_items.values())
 
-    def _get_regular_items(self, container: WebElement) -> List[FeedItem]:
+    def _get_regular_items(self, container: WebElement, skip_ids: Optional[Collection[str]] = None) -> FeedPage:
         """Parse items from regular feed page."""
         feed_items = [
             item for item in container.find_elements(By.CSS_SELECTOR, FEED_ITEM)
             if not item.get_attribute('data-testid') or 'yad1-listing' not in item.get_attribute('data-testid')
         ]
+
+        skipped_ids = []
+        if skip_ids and feed_items:
+            feed_items, skipped_ids = self._skip_cards(feed_items, skip_ids)
         
         parsed_items = []
         for item in feed_items:
             parsed_item = self.parser.parse_item(item)
             if parsed_item:
                 parsed_items.append(parsed_item)
-                
-        return parsed_items 
\ No newline at end of file
+
+        self._add_coordinates(parsed_items)
+        return FeedPage(parsed_items, skipped_ids)
+
+    def _skip_cards(self, cards: List[WebElement], skip_ids: Collection[str]) -> Tuple[List[WebElement], List[str]]:
+        """Drop the cards of skip_ids, reading every card's link in one script instead of parsing it."""
+        try:
+            hrefs = self.browser.driver.execute_script(_CARD_LINKS_SCRIPT, cards, ITEM_LINK)
+        except Exception as e:
+            self.logger.warning(f"Failed to read feed item links, parsing all of them: {str(e)}")
+            return cards, []
+        if not isinstance(hrefs, list) or len(hrefs) != len(cards):
+            # Pairing the links with the cards would be off, so nothing can be skipped safely
+            count = len(hrefs) if isinstance(hrefs, list) else type(hrefs).__name__
+            self.logger.warning(f"Read {count} links for {len(cards)} feed items, parsing all of them")
+            return cards, []
+
+        kept, skipped_ids = [], []
+        for card, href in zip(cards, hrefs):
+            item_id = item_id_from_url(href)
+            if item_id in skip_ids:
+                skipped_ids.append(item_id)
+            else:
+                kept.append(card)
+        if skipped_ids:
+            self.logger.info(f"Skipped parsing {len(skipped_ids)}/{len(cards)} feed items")
+        return kept, skipped_ids
+
+    def _add_coordinates(self, items: List[FeedItem]) -> None:
+        """Fill in listing coordinates from the page state, they aren't shown in the feed itself."""
+        next_data = read_next_data(self.browser.driver)
+        if next_data is None:
+            return
+        coordinates = extract_listing_coordinates(next_data)
+        for item in items:
+            if item.item_id in coordinates:
+                item.location.latitude, item.location.longitude = coordinates[item.item_id]
+        self.logger.debug(f"Found coordinates for {sum(i.item_id in coordinates for i in items)}/{len(items)} items") 
\ No newline at end of file
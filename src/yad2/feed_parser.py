@@ -18,6 +18,11 @@ from .selectors import (
 
 logger = logging.getLogger(__name__)
 
+def item_id_from_url(href: str) -> Optional[str]:
+    """The listing ID in a listing link, None if it isn't one."""
+    url = (href or '').split('?')[0]
+    return url.split('/item/')[1] if '/item/' in url else None
+
 class FeedParser:
     def parse_item(self, element: WebElement) -> Optional[FeedItem]:
         try:
@@ -4,6 +4,7 @@ from selenium.webdriver.common.by import By
 
 from .browser import Browser
 from .models import Contact, FeedItem
+from .next_data import extract_listing_coordinates, read_next_data
 
 
 class ItemEnricher:
@@ -32,6 +33,7 @@ class ItemEnricher:
             self._extract_floor_info(item)
             self._extract_features(item)
             self._extract_parking_info(item)
+            self._extract_coordinates(item)
             
             if not item.is_agency:
                 self._extract_contact_info(item)
@@ -123,6 +125,20 @@ class ItemEnricher:
             )
             pass
 
+    def _extract_coordinates(self, item: FeedItem):
+        if item.location.latitude is not None:
+            return
+        next_data = read_next_data(self.browser.driver)
+        if next_data is None:
+            return
+        # Only the listing's own address, other coordinates on the page (a map center, similar
+        # listings) would place it wrongly. Without them the location stays unknown.
+        coordinates = extract_listing_coordinates(next_data).get(item.item_id)
+        if coordinates:
+            item.location.latitude, item.location.longitude = coordinates
+        else:
+            self.logger.debug(f"No coordinates found for item {item.url}")
+
     def _extract_contact_info(self, item: FeedItem):
         try:
             contact_button = self.browser.wait_for_clickable(
@@ -1,5 +1,8 @@
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import TYPE_CHECKING, List, Optional
+
+if TYPE_CHECKING:
+    from src.address.matcher import StreetMatch
 
 
 @dataclass
@@ -30,6 +33,8 @@ class Location:
     street: str
     neighborhood: Optional[str] = None
     area: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
 
 @dataclass
 class FeedItem:
@@ -43,6 +48,7 @@ class FeedItem:
     agency_name: Optional[str] = None
     contact: Optional[Contact] = None
     tags: List[str] = field(default_factory=list)
+    street_match: Optional['StreetMatch'] = None  # Set once by categorize_feed_items
 
     def format_listing(self) -> str:
         """
@@ -101,3 +107,10 @@ class FeedItem:
         
         # Join main parts with commas, then join with end parts using dashes
         return f"{', '.join(main_parts)} - {' - '.join(end_parts)}"
+
+@dataclass
+class FeedPage:
+    """Listings parsed from a search results page."""
+    items: List[FeedItem]
+    skipped_ids: List[str] = field(default_factory=list)  # Cards left unparsed, as asked by the caller
+    captcha: bool = False  # The page showed a CAPTCHA challenge that was left unsolved, see Browser.unattended
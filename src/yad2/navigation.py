@@ -1,5 +1,5 @@
 import logging
-from typing import Optional
+from typing import List, Optional
 
 from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.common.by import By
@@ -7,7 +7,7 @@ from selenium.webdriver.common.by import By
 from src.db.saved_items_repository import SavedItemsRepository
 
 from .browser import Browser
-from .selectors import FEED_CONTAINER, SAVED_ITEMS_CONTAINER
+from .selectors import FAVORITES_BADGE, FEED_CONTAINER, SAVED_ITEMS_CONTAINER
 
 
 class NavigationHandler:
@@ -71,7 +71,7 @@ class NavigationHandler:
             try:
                 favorites_badge = self.browser.wait_for_element(
                     By.CSS_SELECTOR,
-                    'div[data-testid="favorites-dropdown-menu"] span[data-testid="badge"]',
+                    FAVORITES_BADGE,
                     timeout=timeout
                 )
                 
@@ -96,6 +96,61 @@ class NavigationHandler:
             self._log_debug_info()
             return False
 
+    def open_tabs(self, urls: List[str]) -> List[str]:
+        """
+        Open each URL in a new background tab without waiting for it to load, so the pages
+        load side by side. The current tab stays the active one.
+
+        Returns:
+            List[str]: Window handle of each URL's tab, in order
+        """
+        driver = self.browser.driver
+        handles = []
+        for url in urls:
+            self.logger.info(f"Opening {url} in a new tab")
+            before = set(driver.window_handles)
+            driver.execute_script("window.open(arguments[0], '_blank');", url)
+            opened = [handle for handle in driver.window_handles if handle not in before]
+            if not opened:
+                raise RuntimeError(f"Failed to open a tab for {url}")
+            handles.append(opened[0])
+        return handles
+
+    def switch_to_tab(self, handle: str) -> bool:
+        """Make a tab opened by open_tabs the active one and verify its feed page loaded."""
+        try:
+            self.browser.driver.switch_to.window(handle)
+            return self._handle_feed_page()
+        except Exception as e:
+            self.logger.error(f"Failed to switch to tab: {str(e)}")
+            print(f"Failed to switch to tab: {str(e)}")
+            return False
+
+    def close_tabs(self, handles: List[str], return_to: str) -> None:
+        """Close the tabs and make return_to the active tab again."""
+        driver = self.browser.driver
+        for handle in handles:
+            try:
+                driver.switch_to.window(handle)
+                driver.close()
+            except Exception as e:
+                self.logger.warning(f"Failed to close tab: {str(e)}")
+        driver.switch_to.window(return_to)
+
+    def read_favorites_count(self) -> Optional[int]:
+        """Read the number of saved items from the header badge, None if it isn't shown or isn't a number."""
+        try:
+            badges = self.browser.driver.find_elements(By.CSS_SELECTOR, FAVORITES_BADGE)
+            text = badges[0].get_attribute('textContent').strip() if badges else ''
+        except Exception as e:
+            self.logger.warning(f"Failed to read favorites badge: {str(e)}")
+            return None
+        # Capped badges ("99+") don't tell the exact count
+        if not text.isdigit():
+            self.logger.info(f"Favorites badge has no exact count: {text!r}")
+            return None
+        return int(text)
+
     def _log_debug_info(self) -> None:
         """Log debug information when navigation fails."""
         if self.browser and self.browser.driver:
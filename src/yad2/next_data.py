@@ -0,0 +1,67 @@
+"""
+Helpers for the Next.js state Yad2 embeds in its pages (<script id="__NEXT_DATA__">).
+Feed pages carry every listing with its token (item id) and coordinates, e.g.
+{"token": "abc123", "address": {"coords": {"lat": 32.1, "lon": 34.8}, ...}}.
+"""
+import json
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+from selenium.webdriver.common.by import By
+
+from .selectors import NEXT_DATA_SCRIPT
+
+logger = logging.getLogger(__name__)
+
+Coordinates = Tuple[float, float]  # (latitude, longitude)
+
+_COORDINATE_KEYS = (('lat', 'lon'), ('lat', 'lng'), ('latitude', 'longitude'))
+
+
+def read_next_data(driver) -> Optional[dict]:
+    """Parse the __NEXT_DATA__ state of the current page, None if it has none."""
+    try:
+        script = driver.find_element(By.CSS_SELECTOR, NEXT_DATA_SCRIPT)
+        return json.loads(script.get_attribute('innerHTML'))
+    except Exception as e:
+        logger.debug(f"No page state found: {str(e)}")
+        return None
+
+def _as_coordinates(value: Any) -> Optional[Coordinates]:
+    if not isinstance(value, dict):
+        return None
+    for lat_key, lon_key in _COORDINATE_KEYS:
+        lat, lon = value.get(lat_key), value.get(lon_key)
+        if isinstance(lat, (int, float)) and isinstance(lon, (int, float)) and (lat or lon):
+            return float(lat), float(lon)
+    return None
+
+def find_coordinates(data: Any) -> Optional[Coordinates]:
+    """Depth-first search for the first coordinates object in the state."""
+    coordinates = _as_coordinates(data)
+    if coordinates:
+        return coordinates
+    children = data.values() if isinstance(data, dict) else data if isinstance(data, list) else ()
+    for child in children:
+        coordinates = find_coordinates(child)
+        if coordinates:
+            return coordinates
+    return None
+
+def extract_listing_coordinates(data: Any) -> Dict[str, Coordinates]:
+    """Map every listing token in the state to its coordinates."""
+    result: Dict[str, Coordinates] = {}
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            token = node.get('token')
+            if isinstance(token, str) and token not in result:
+                coordinates = find_coordinates(node.get('address'))
+                if coordinates:
+                    result[token] = coordinates
+                    continue
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            stack.extend(node)
+    return result
@@ -18,11 +18,19 @@ class SavedFeedParser:
         """
         try:
             link = element.find_element(By.CSS_SELECTOR, SAVED_ITEM_LINK)
-            url = link.get_attribute('href').split('?')[0]
-            item_id = url.split('/item/')[1]
-            
-            return item_id, url
+            return self.parse_url(link.get_attribute('href'))
 
         except Exception as e:
             self.logger.error(f"Failed to parse saved item: {str(e)}")
-            return None
\ No newline at end of file
+            return None
+
+    def parse_url(self, href: str) -> Optional[Tuple[str, str]]:
+        """
+        Parse a saved item's link.
+        Returns tuple of (item_id, url) if successful, None otherwise.
+        """
+        url = (href or '').split('?')[0]
+        if '/item/' not in url:
+            self.logger.error(f"Failed to parse saved item link: {href!r}")
+            return None
+        return url.split('/item/')[1], url
\ No newline at end of file
@@ -21,6 +21,9 @@ SAVE_BUTTON = '[class*="like-toggle_likeButton__"]'
 PAGINATION_TEXT = 'nav[data-nagish="pagination-navbar"] span:first-of-type'  # The text showing "עמוד X מתוך Y"
 PAGINATION_NAV = 'nav[data-nagish="pagination-navbar"]'     # The pagination container
 
+# Header badge with the number of saved items
+FAVORITES_BADGE = 'div[data-testid="favorites-dropdown-menu"] span[data-testid="badge"]'
+
 # Saved items page selectors
 SAVED_ITEMS_CONTAINER = "div[class*='category-section-grid_list']"
 SAVED_ITEM = "article[class*='feed-item-grid_box']"
@@ -28,3 +31,6 @@ SAVED_ITEM_LINK = "a[class*='feed-item-grid_linkOverlay']"
 SAVED_ITEM_TITLE = "h3[class*='title_title']"
 SAVED_ITEM_SUBTITLE = "p[class*='sub-title_line']"
 SAVED_ITEM_PRICE = "span[class*='price_number']"
+
+# Embedded Next.js page state, holds listing data including coordinates
+NEXT_DATA_SCRIPT = 'script#__NEXT_DATA__'
@@ -0,0 +1,98 @@
+import random
+
+from rapidfuzz import fuzz, process
+
+from src.address.fuzzy_index import NGramIndex
+
+LETTERS = 'אבגדהוזחטי '
+
+
+def _mutate(rng: random.Random, text: str) -> str:
+    chars = list(text)
+    for _ in range(rng.randint(0, 3)):
+        pos = rng.randrange(len(chars) + 1)
+        op = rng.random()
+        if op < 0.33 and chars:
+            chars.pop(min(pos, len(chars) - 1))
+        elif op < 0.66:
+            chars.insert(pos, rng.choice(LETTERS))
+        elif chars:
+            chars[min(pos, len(chars) - 1)] = rng.choice(LETTERS)
+    return ''.join(chars)
+
+def _linear_best(query: str, strings: list):
+    best = process.extractOne(query, strings, scorer=fuzz.ratio, score_cutoff=85)
+    return (best[0], best[1]) if best else None
+
+def test_index_never_misses_a_match_above_threshold():
+    rng = random.Random(7)
+    strings = list(dict.fromkeys(
+        ''.join(rng.choice(LETTERS) for _ in range(rng.randint(1, 14))) for _ in range(1000)
+    ))
+    index = NGramIndex(strings, threshold=85)
+
+    for _ in range(500):
+        query = _mutate(rng, rng.choice(strings))
+        assert index.best_match(query) == _linear_best(query, strings)
+        assert len(index.candidates(query)) < len(strings)
+
+def test_remove_and_re_add():
+    rng = random.Random(3)
+    strings = list(dict.fromkeys(
+        ''.join(rng.choice(LETTERS) for _ in range(rng.randint(4, 12))) for _ in range(1000)
+    ))
+    index = NGramIndex(strings, threshold=85)
+
+    removed = set(strings[:600])  # Forces a compaction
+    for string in removed:
+        index.remove(string)
+    live = [string for string in strings if string not in removed]
+
+    assert len(index) == len(live)
+    for _ in range(200):
+        query = _mutate(rng, rng.choice(strings))
+        assert index.best_match(query) == _linear_best(query, live)
+
+    index.add(strings[0])
+    assert strings[0] in index
+    assert index.best_match(strings[0]) == (strings[0], 100.0)
+
+def test_empty_index():
+    index = NGramIndex()
+    assert index.candidates("הרצל") == []
+    assert index.best_match("הרצל") is None
+
+def test_copy_leaves_the_original_untouched():
+    index = NGramIndex(["אבן גבירול", "דיזנגוף", "ארלוזורוב"], threshold=85)
+    index.best_match("דיזנגוב")  # Builds the numpy caches
+
+    copy = index.copy()
+    copy.add("אבן גבירון")
+    copy.remove("דיזנגוף")
+
+    assert set(index) == {"אבן גבירול", "דיזנגוף", "ארלוזורוב"}
+    assert index.best_match("דיזנגוב") == ("דיזנגוף", _linear_best("דיזנגוב", ["דיזנגוף"])[1])
+    assert index.candidates("אבן גבירון") == ["אבן גבירול"]
+    assert set(copy) == {"אבן גבירול", "ארלוזורוב", "אבן גבירון"}
+    assert copy.best_match("דיזנגוב") is None
+    assert copy.best_match("אבן גבירון") == ("אבן גבירון", 100.0)
+
+def test_best_matches_breaks_ties_like_best_match():
+    # Both strings score 90 against the query, the first inserted one wins
+    for strings in (['abcdefghix', 'abcdefghiy'], ['abcdefghiy', 'abcdefghix']):
+        index = NGramIndex(strings, threshold=85)
+        assert index.best_matches(['abcdefghiz', 'abcdefghix', 'zzz']) == [
+            index.best_match('abcdefghiz'), ('abcdefghix', 100.0), None
+        ]
+        assert index.best_match('abcdefghiz')[0] == strings[0]
+
+def test_best_matches_agrees_with_best_match():
+    rng = random.Random(11)
+    strings = list(dict.fromkeys(
+        ''.join(rng.choice(LETTERS) for _ in range(rng.randint(1, 14))) for _ in range(1000)
+    ))
+    index = NGramIndex(strings, threshold=85)
+    queries = [_mutate(rng, rng.choice(strings)) for _ in range(300)]
+
+    assert index.best_matches(queries) == [index.best_match(query) for query in queries]
+    assert NGramIndex(threshold=85).best_matches(queries[:2]) == [None, None]
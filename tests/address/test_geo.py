@@ -0,0 +1,123 @@
+import json
+from unittest.mock import Mock, patch
+
+import pytest
+
+from src import main
+from src.address import AddressMatcher, GeoCheck, StreetMatch
+from src.address.geo import GridIndex, Polygon, build_geo_index
+from src.processor.feed_processor import process_feed_items
+from src.yad2.models import FeedItem
+from tests.helpers import create_feed_item
+
+# Roughly 1.1km x 0.95km around Ramat Aviv
+RAMAT_AVIV = [[32.110, 34.795], [32.120, 34.795], [32.120, 34.805], [32.110, 34.805]]
+# The part north of Einstein street
+NORTH_OF_EINSTEIN = [[32.115, 34.795], [32.120, 34.795], [32.120, 34.805], [32.115, 34.805]]
+
+
+def _item(street: str, lat=None, lon=None, city: str = "תל אביב") -> FeedItem:
+    return create_feed_item(price=None, city=city, street=street, latitude=lat, longitude=lon)
+
+@pytest.fixture
+def streets_file(tmp_path):
+    test_data = [{
+        "city": "תל אביב",
+        "neighborhoods": [{
+            "neighborhood": "רמת אביב",
+            "polygon": RAMAT_AVIV,
+            "streets": [
+                {"name": "אינשטיין"},
+                {"name": "ברודצקי", "constraint": "צפונית לרחוב אינשטיין", "constraint_polygon": NORTH_OF_EINSTEIN},
+                {"name": "חיים לבנון", "constraint": "זוגיים בלבד"}
+            ]
+        }]
+    }]
+    json_file = tmp_path / "streets.json"
+    json_file.write_text(json.dumps(test_data), encoding='utf-8')
+    return str(json_file)
+
+@pytest.fixture
+def matcher(streets_file):
+    return AddressMatcher(streets_file)
+
+def test_polygon_contains():
+    polygon = Polygon(RAMAT_AVIV)
+    assert polygon.contains(32.115, 34.800)
+    assert not polygon.contains(32.125, 34.800)
+    assert not polygon.contains(32.115, 34.790)
+
+def test_polygon_contains_concave():
+    # L shape, the top right corner is outside
+    polygon = Polygon([[0, 0], [0, 2], [1, 2], [1, 1], [2, 1], [2, 0]])
+    assert polygon.contains(0.5, 1.5)
+    assert polygon.contains(1.5, 0.5)
+    assert not polygon.contains(1.5, 1.5)
+
+def test_polygon_check_near_edge_is_unknown():
+    polygon = Polygon(RAMAT_AVIV)
+    # About 11m inside the southern edge
+    assert polygon.check(32.1101, 34.800) == GeoCheck.UNKNOWN
+    assert polygon.check(32.1101, 34.800, margin=0) == GeoCheck.INSIDE
+    assert polygon.check(32.1150, 34.800) == GeoCheck.INSIDE
+    assert polygon.check(32.1300, 34.800) == GeoCheck.OUTSIDE
+
+def test_polygon_needs_three_points():
+    with pytest.raises(ValueError):
+        Polygon([[0, 0], [1, 1]])
+
+def test_grid_index_query():
+    grid = GridIndex(cell_size=0.005)
+    grid.insert("a", Polygon(RAMAT_AVIV))
+    grid.insert("b", Polygon([[32.0, 34.7], [32.01, 34.7], [32.01, 34.71]]))
+
+    assert grid.query(32.115, 34.800) == ["a"]
+    assert grid.query(32.005, 34.702) == ["b"]
+    assert grid.query(31.0, 34.0) == []
+    assert grid.nearby(32.121, 34.800) == ["a"]
+
+def test_build_geo_index_without_polygons():
+    geo = build_geo_index([{"city": "חיפה", "neighborhoods": [
+        {"neighborhood": "כרמל", "streets": [{"name": "מוריה"}]}
+    ]}], normalize_city=str.strip)
+    assert not geo
+    assert geo.check_neighborhoods("חיפה", 32.8, 35.0) == GeoCheck.UNKNOWN
+
+def test_constraint_resolved_by_location(matcher):
+    match = matcher.is_street_allowed("ברודצקי 10", "תל אביב")
+
+    assert matcher.check_location(_item("ברודצקי 10", 32.118, 34.800), match) == GeoCheck.INSIDE
+    assert matcher.check_location(_item("ברודצקי 10", 32.112, 34.800), match) == GeoCheck.OUTSIDE
+    assert matcher.check_location(_item("ברודצקי 10"), match) == GeoCheck.UNKNOWN
+
+def test_constraint_without_polygon_is_unknown(matcher):
+    match = matcher.is_street_allowed("חיים לבנון", "תל אביב")
+    assert matcher.check_location(_item("חיים לבנון", 32.118, 34.800), match) == GeoCheck.UNKNOWN
+
+def test_supported_street_without_constraint_is_inside(matcher):
+    match = matcher.is_street_allowed("אינשטיין", "תל אביב")
+    assert matcher.check_location(_item("אינשטיין"), match) == GeoCheck.INSIDE
+
+def test_unsupported_street_checked_against_neighborhoods(matcher):
+    inside = _item("טאגור", 32.116, 34.800, city="תל אביב יפו")
+    outside = _item("טאגור", 32.080, 34.780)
+    not_allowed = StreetMatch(is_allowed=False)
+
+    assert matcher.check_location(inside, not_allowed) == GeoCheck.INSIDE
+    assert matcher.neighborhoods_at(inside) == ["רמת אביב"]
+    assert matcher.check_location(outside, not_allowed) == GeoCheck.OUTSIDE
+    assert matcher.check_location(_item("הנביאים", 32.8, 35.0, city="חיפה"), not_allowed) == GeoCheck.UNKNOWN
+
+def test_constraint_resolved_by_location_with_main_matcher(streets_file):
+    # main builds the matcher; its GeoCheck results must be the ones feed_processor compares against
+    matcher = main.AddressMatcher(streets_file)
+    inside = _item("ברודצקי 10", 32.118, 34.800)
+    inside.price = 2500000
+
+    with patch('src.processor.feed_processor.prompt_yes_no') as mock_prompt_yes_no, \
+         patch('src.processor.feed_processor.process_item') as mock_process_item, \
+         patch('builtins.print'):
+        process_feed_items([inside], matcher, Mock())
+
+    mock_prompt_yes_no.assert_not_called()
+    mock_process_item.assert_called_once()
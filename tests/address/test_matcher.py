@@ -4,7 +4,10 @@ import logging
 import pytest
 
 from src.address import AddressMatcher
+from src.address.match_cache import MatchCache
 from src.utils.logging_config import setup_logging
+from src.yad2.models import FeedItem
+from tests.helpers import create_feed_item
 
 # Use the centralized logging configuration
 setup_logging(level=logging.INFO)
@@ -104,4 +107,98 @@ def test_same_street_different_city(matcher):
 
     # Should not match in Non-existent City
     result3 = matcher.is_street_allowed("אברמוביץ", "Non-existent City")
-    assert not result3.is_allowed
\ No newline at end of file
+    assert not result3.is_allowed
+
+def test_streets_indexed_per_city(matcher):
+    assert set(matcher.street_lookup) == {"Test City", "Other City"}
+    # Keys are normalized, "רחוב" is dropped
+    assert set(matcher.street_lookup["Other City"]) == {"אברמוביץ", "אחר"}
+
+def test_city_name_variant_falls_back_to_fuzzy_city(tmp_path):
+    test_data = [{
+        "city": "תל אביב",
+        "neighborhoods": [{"neighborhood": "רמת אביב", "streets": [{"name": "אינשטיין"}]}]
+    }]
+    json_file = tmp_path / "streets.json"
+    json_file.write_text(json.dumps(test_data), encoding='utf-8')
+    matcher = AddressMatcher(str(json_file))
+
+    result = matcher.is_street_allowed("אינשטיין", "תל אביב יפו")
+    assert result.is_allowed
+    assert result.city == "תל אביב"
+    assert not matcher.is_street_allowed("אינשטיין", "חיפה").is_allowed
+
+def _item(street: str, city: str) -> FeedItem:
+    return create_feed_item(street, price=None, city=city, street=street)
+
+def test_match_streets_agrees_with_single_lookups(matcher):
+    addresses = [
+        ("אברמוביץ", "Test City"),
+        ("ביתר 12", "Test City"),
+        ("אברמוביץ'", "Test City"),
+        ("רחוב לא קיים", "Test City"),
+        ("רחוב אחר", "Other City"),
+        ("אברמוביץ", "Non-existent City"),
+    ]
+    items = [_item(street, city) for street, city in addresses]
+
+    results = matcher.match_streets(items)
+
+    assert results == [matcher.is_street_allowed(street, city) for street, city in addresses]
+    assert [result.is_allowed for result in results] == [True, True, True, False, True, False]
+
+def test_match_streets_empty(matcher):
+    assert matcher.match_streets([]) == []
+
+def test_repeated_lookups_hit_the_memo(matcher):
+    matcher.is_street_allowed("אברמוביץ 5", "Test City")
+    matcher.is_street_allowed("אברמוביץ 7", "Test City")
+    matcher.match_streets([_item("אברמוביץ 9", "Test City")])
+
+    stats = matcher.cache_stats
+    assert stats['misses'] == 1
+    assert stats['hits'] == 2
+    assert stats['hit_rate'] == pytest.approx(2 / 3)
+
+def test_match_cache_is_bounded():
+    cache = MatchCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")  # "b" becomes least recently used
+    cache.put("c", 3)
+
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+def test_abbreviations_and_aliases_are_exact_hits(tmp_path):
+    test_data = [{
+        "city": "תל אביב",
+        "neighborhoods": [{"neighborhood": "לב העיר", "streets": [
+            {"name": "שדרות רוטשילד"},
+            {"name": "הרצל"},
+            {"name": "אבן גבירול", "aliases": ["אבן גבירול רבי שלמה"]}
+        ]}]
+    }]
+    json_file = tmp_path / "streets.json"
+    json_file.write_text(json.dumps(test_data), encoding='utf-8')
+    matcher = AddressMatcher(str(json_file))
+
+    addresses = ["שד' רוטשילד 12", "שד׳ רוטשילד", "רח' הרצל 3", "רחוב הרצל", "אבן גבירול רבי שלמה 40"]
+    for street in addresses:
+        assert matcher.is_street_allowed(street, "תל אביב-יפו").is_allowed
+    assert matcher.is_street_allowed("אבן גבירול רבי שלמה", "תל אביב").neighborhood == "לב העיר"
+
+    stats = matcher.match_stats
+    assert stats['fuzzy'] == stats['miss'] == 0
+    assert stats['exact_rate'] == 1.0
+
+def test_match_stats_counts_uncached_lookups(matcher):
+    matcher.is_street_allowed("אברמוביץ", "Test City")
+    matcher.is_street_allowed("אברמוביץ", "Test City")  # Served from the memo
+    matcher.is_street_allowed("אברמוביצ", "Test City")
+    matcher.match_streets([_item("ביתר 4", "Test City"), _item("לא קיים", "Test City"), _item("הרצל", "Nowhere")])
+
+    stats = matcher.match_stats
+    assert (stats['exact'], stats['fuzzy'], stats['miss']) == (2, 1, 2)
+    assert stats['exact_rate'] == pytest.approx(2 / 5)
@@ -0,0 +1,243 @@
+import copy
+import json
+import os
+import struct
+import time
+
+import pytest
+
+from src.address import street_index, utils
+from src.address.matcher import STREET_MATCH_THRESHOLD, AddressMatcher
+from src.address.street_index import (
+    build_city_streets,
+    build_street_index,
+    compile_streets,
+    get_index_path,
+    hash_source,
+    load_artifact,
+    update_street_index,
+)
+from tests.helpers import create_feed_item
+
+TEST_DATA = [
+    {
+        "city": "תל אביב",
+        "neighborhoods": [
+            {
+                "neighborhood": "הצפון הישן",
+                "streets": [
+                    {"name": "אבן גבירול"},
+                    {"name": "דיזנגוף", "constraint": "רק בין ארלוזורוב לנורדאו"}
+                ]
+            }
+        ]
+    }
+]
+
+
+@pytest.fixture
+def json_file(tmp_path):
+    path = tmp_path / "streets.json"
+    path.write_text(json.dumps(TEST_DATA, ensure_ascii=False), encoding='utf-8')
+    return path
+
+def test_artifact_written_next_to_json(json_file):
+    AddressMatcher(str(json_file))
+
+    index_path = get_index_path(str(json_file))
+    assert index_path == str(json_file.with_suffix('.idx'))
+    index = load_artifact(index_path, hash_source(json_file.read_bytes(), STREET_MATCH_THRESHOLD))
+    assert index is not None
+    assert "דיזנגוף" in index.streets["תל אביב"]
+
+def test_artifact_reused(json_file, monkeypatch):
+    AddressMatcher(str(json_file))
+
+    def fail_build(*args, **kwargs):
+        raise AssertionError("index should have been loaded from the artifact")
+
+    monkeypatch.setattr('src.address.matcher.build_street_index', fail_build)
+    matcher = AddressMatcher(str(json_file))
+
+    result = matcher.is_street_allowed("דיזנגוף 100", "תל אביב")
+    assert result.is_allowed
+    assert result.constraint == "רק בין ארלוזורוב לנורדאו"
+    # Fuzzy lookups work on the unpickled index
+    assert matcher.is_street_allowed("אבן גבירל", "תל אביב").is_allowed
+
+def test_rebuilt_when_json_changes(json_file):
+    AddressMatcher(str(json_file))
+
+    data = json.loads(json_file.read_text(encoding='utf-8'))
+    data[0]['neighborhoods'][0]['streets'].append({"name": "ארלוזורוב"})
+    json_file.write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+
+    matcher = AddressMatcher(str(json_file))
+    assert matcher.is_street_allowed("ארלוזורוב", "תל אביב").is_allowed
+    assert load_artifact(matcher.index_path, hash_source(json_file.read_bytes(), STREET_MATCH_THRESHOLD)) is not None
+
+def test_rebuilt_on_version_mismatch(json_file, monkeypatch):
+    matcher = AddressMatcher(str(json_file))
+    digest = hash_source(json_file.read_bytes(), STREET_MATCH_THRESHOLD)
+
+    monkeypatch.setattr(street_index, 'ARTIFACT_VERSION', street_index.ARTIFACT_VERSION + 1)
+    assert load_artifact(matcher.index_path, digest) is None
+
+    AddressMatcher(str(json_file))
+    with open(matcher.index_path, 'rb') as f:
+        _, version, _ = struct.unpack('<6sH32s', f.read(40))
+    assert version == street_index.ARTIFACT_VERSION
+
+def test_rebuilt_when_normalization_changes(json_file, monkeypatch):
+    matcher = AddressMatcher(str(json_file))
+    digest = hash_source(json_file.read_bytes(), STREET_MATCH_THRESHOLD)
+
+    monkeypatch.setitem(utils.STREET_ABBREVIATIONS, 'דרך', '')
+    assert hash_source(json_file.read_bytes(), STREET_MATCH_THRESHOLD) != digest
+    assert load_artifact(matcher.index_path, hash_source(json_file.read_bytes(), STREET_MATCH_THRESHOLD)) is None
+
+def test_rebuilt_when_threshold_changes(json_file, monkeypatch):
+    matcher = AddressMatcher(str(json_file))
+    assert hash_source(json_file.read_bytes(), STREET_MATCH_THRESHOLD + 5) != hash_source(
+        json_file.read_bytes(), STREET_MATCH_THRESHOLD
+    )
+
+    # The fuzzy indexes are pickled with their threshold, a new one mustn't load them
+    monkeypatch.setattr('src.address.matcher.STREET_MATCH_THRESHOLD', STREET_MATCH_THRESHOLD + 5)
+    rebuilt = AddressMatcher(str(json_file))
+    assert all(index.threshold == STREET_MATCH_THRESHOLD + 5 for index in rebuilt.fuzzy_index.values())
+    assert load_artifact(matcher.index_path, hash_source(json_file.read_bytes(), STREET_MATCH_THRESHOLD)) is None
+
+def test_corrupt_artifact_is_ignored(json_file):
+    index_path = get_index_path(str(json_file))
+    with open(index_path, 'wb') as f:
+        f.write(b'garbage')
+
+    matcher = AddressMatcher(str(json_file))
+    assert matcher.is_street_allowed("אבן גבירול", "תל אביב").is_allowed
+    assert load_artifact(index_path, hash_source(json_file.read_bytes(), STREET_MATCH_THRESHOLD)) is not None
+
+def test_compile_streets_to_custom_path(json_file, tmp_path):
+    output = tmp_path / "compiled" / "streets.idx"
+    output.parent.mkdir()
+
+    assert compile_streets(str(json_file), str(output)) == str(output)
+    assert load_artifact(str(output), hash_source(json_file.read_bytes(), STREET_MATCH_THRESHOLD)) is not None
+
+    matcher = AddressMatcher(str(json_file), index_path=str(output))
+    assert matcher.is_street_allowed("אבן גבירול", "תל אביב").is_allowed
+
+def _rewrite(json_file, data):
+    json_file.write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+    # Make sure the mtime moves even on filesystems with coarse timestamps
+    stat = json_file.stat()
+    os.utime(json_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+def test_reload_applies_street_changes(json_file):
+    matcher = AddressMatcher(str(json_file))
+    assert not matcher.reload()
+
+    data = copy.deepcopy(TEST_DATA)
+    streets = data[0]['neighborhoods'][0]['streets']
+    streets.append({"name": "ארלוזורוב"})
+    streets[1]['constraint'] = "רק מצפון לארלוזורוב"
+    del streets[0]
+    _rewrite(json_file, data)
+
+    assert matcher.reload()
+    assert matcher.is_street_allowed("ארלוזורוב 20", "תל אביב").is_allowed
+    assert matcher.is_street_allowed("דיזנגוף", "תל אביב").constraint == "רק מצפון לארלוזורוב"
+    assert not matcher.is_street_allowed("אבן גבירול", "תל אביב").is_allowed
+    assert not matcher.is_street_allowed("אבן גבירל", "תל אביב").is_allowed
+    assert not matcher.reload()
+
+    # The reloaded streets are written back, so the next start loads them from the artifact
+    assert load_artifact(matcher.index_path, hash_source(json_file.read_bytes(), STREET_MATCH_THRESHOLD)) is not None
+
+def test_reload_clears_memoized_matches(json_file):
+    matcher = AddressMatcher(str(json_file))
+    assert not matcher.is_street_allowed("ארלוזורוב", "תל אביב").is_allowed
+
+    data = copy.deepcopy(TEST_DATA)
+    data[0]['neighborhoods'][0]['streets'].append({"name": "ארלוזורוב"})
+    _rewrite(json_file, data)
+    matcher.reload()
+
+    assert matcher.is_street_allowed("ארלוזורוב", "תל אביב").is_allowed
+
+def test_batch_and_single_matches_agree_on_ties_after_reload(json_file):
+    data = copy.deepcopy(TEST_DATA)
+    data[0]['neighborhoods'][0]['streets'] = [{"name": "גורדון"}]
+    _rewrite(json_file, data)
+    matcher = AddressMatcher(str(json_file))
+
+    # The reloaded file lists the new street first, the updated fuzzy index has it last
+    data[0]['neighborhoods'][0]['streets'] = [{"name": "גורדין"}, {"name": "גורדון"}]
+    _rewrite(json_file, data)
+    assert matcher.reload()
+
+    # "גורדן" is as close to both streets
+    [batch] = matcher.match_streets([create_feed_item(city="תל אביב", street="גורדן 5")])
+    single = matcher.fuzzy_index["תל אביב"].best_match("גורדן")
+
+    assert batch.street == single[0] == "גורדון"
+
+def test_reload_only_rebuilds_changed_cities(json_file):
+    data = copy.deepcopy(TEST_DATA) + [{
+        "city": "חיפה",
+        "neighborhoods": [{"neighborhood": "כרמל", "streets": [{"name": "מוריה"}]}]
+    }]
+    _rewrite(json_file, data)
+    matcher = AddressMatcher(str(json_file))
+    old_index = matcher.street_lookup, dict(matcher.fuzzy_index)
+
+    data[1]['neighborhoods'][0]['streets'].append({"name": "חורב"})
+    _rewrite(json_file, data)
+    matcher.reload()
+
+    old_streets, old_fuzzy = old_index
+    assert matcher.fuzzy_index["תל אביב"] is old_fuzzy["תל אביב"]
+    assert matcher.fuzzy_index["חיפה"] is not old_fuzzy["חיפה"]
+    assert set(matcher.fuzzy_index["חיפה"]) == {"מוריה", "חורב"}
+    # The previous snapshot is left as it was for lookups that were still using it
+    assert set(old_fuzzy["חיפה"]) == {"מוריה"}
+    assert set(old_streets["חיפה"]) == {"מוריה"}
+
+def test_reload_keeps_streets_on_invalid_json(json_file):
+    matcher = AddressMatcher(str(json_file))
+    json_file.write_text('[{"city": ', encoding='utf-8')
+
+    assert not matcher.reload()
+    assert matcher.is_street_allowed("דיזנגוף", "תל אביב").is_allowed
+
+def test_update_street_index_reports_diff():
+    def normalize(text):
+        return text
+
+    old = build_street_index(TEST_DATA, normalize, normalize, threshold=85)
+    data = copy.deepcopy(TEST_DATA)
+    streets = data[0]['neighborhoods'][0]['streets']
+    streets[0]['constraint'] = "זוגיים בלבד"
+    streets.append({"name": "ארלוזורוב"})
+    del streets[1]
+
+    _, diff = update_street_index(old, build_city_streets(data, normalize, normalize), threshold=85)
+
+    assert diff.added == [("תל אביב", "ארלוזורוב")]
+    assert diff.removed == [("תל אביב", "דיזנגוף")]
+    assert diff.changed == [("תל אביב", "אבן גבירול")]
+
+def test_watcher_reloads_in_background(json_file):
+    matcher = AddressMatcher(str(json_file))
+    matcher.start_watching(interval=0.01)
+    try:
+        data = copy.deepcopy(TEST_DATA)
+        data[0]['neighborhoods'][0]['streets'].append({"name": "ארלוזורוב"})
+        _rewrite(json_file, data)
+
+        deadline = time.monotonic() + 5
+        while "ארלוזורוב" not in matcher.street_lookup["תל אביב"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert matcher.is_street_allowed("ארלוזורוב", "תל אביב").is_allowed
+    finally:
+        matcher.stop_watching()
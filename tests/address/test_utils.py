@@ -1,4 +1,4 @@
-from src.address.utils import normalize_hebrew_text
+from src.address.utils import normalize_hebrew_text, normalize_street_name
 
 
 def test_normalize_hebrew_text():
@@ -10,4 +10,37 @@ def test_normalize_hebrew_text():
     ]
     
     for input_text, expected in test_cases:
-        assert normalize_hebrew_text(input_text) == expected 
\ No newline at end of file
+        assert normalize_hebrew_text(input_text) == expected 
+
+def test_normalize_hebrew_text_variants():
+    test_cases = [
+        ('שד׳ רוטשילד', 'שד רוטשילד'),  # Geresh
+        ('בית״ר', 'ביתר'),  # Gershayim
+        ('תל אביב-יפו', 'תל אביב יפו'),
+        ('תל אביב־יפו', 'תל אביב יפו'),  # Maqaf
+        ('רח. הרצל', 'רח הרצל'),
+        ('שָׁלוֹם', 'שלום'),  # Niqqud
+    ]
+
+    for input_text, expected in test_cases:
+        assert normalize_hebrew_text(input_text) == expected
+
+
+def test_normalize_street_name():
+    test_cases = [
+        ('שד\' רוטשילד', 'שדרות רוטשילד'),
+        ('שד׳ רוטשילד', 'שדרות רוטשילד'),
+        ('שדרות רוטשילד', 'שדרות רוטשילד'),
+        ('רח\' הרצל', 'הרצל'),
+        ('רחוב הרצל', 'הרצל'),
+        ('שד"ל', 'שדל'),
+        ('בן-גוריון', 'בן גוריון'),
+        ('רח', 'רח'),  # A bare abbreviation is a name, not a street type
+    ]
+
+    for input_text, expected in test_cases:
+        assert normalize_street_name(input_text) == expected
+
+
+def test_normalize_street_name_custom_abbreviations():
+    assert normalize_street_name('דרך מנחם בגין', {'דרך': ''}) == 'מנחם בגין'
@@ -0,0 +1,23 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.db.models import Base
+
+
+@pytest.fixture
+def db_session():
+    """Create a test database in memory"""
+    engine = create_engine('sqlite:///:memory:')
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    session = Session()
+    yield session
+    session.close()
+
+@pytest.fixture
+def session_factory(tmp_path):
+    """Sessions of a test database file, for tests that need several connections, e.g. a writer thread"""
+    engine = create_engine(f'sqlite:///{tmp_path / "test.db"}')
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)
@@ -0,0 +1,81 @@
+import threading
+
+import pytest
+from sqlalchemy import text
+
+from src.db.database import Database
+from src.db.saved_items_repository import SavedItemsRepository
+
+
+@pytest.fixture
+def tuned_db(tmp_path):
+    db = Database(db_path=str(tmp_path / "tuned.db"))
+    db.create_tables()
+    yield db
+    db.dispose()
+
+def _pragma(db: Database, name: str):
+    with db.engine.connect() as conn:
+        return conn.execute(text(f"PRAGMA {name}")).scalar()
+
+def test_tuned_profile_applies_pragmas(tuned_db):
+    assert _pragma(tuned_db, "journal_mode") == "wal"
+    assert _pragma(tuned_db, "synchronous") == 1  # NORMAL
+    assert _pragma(tuned_db, "busy_timeout") == 5000
+    assert _pragma(tuned_db, "cache_size") == -16 * 1024
+
+def test_default_profile_keeps_rollback_journal(tmp_path):
+    db = Database(db_path=str(tmp_path / "default.db"), tuned=False)
+    db.create_tables()
+    assert _pragma(db, "journal_mode") == "delete"
+    db.dispose()
+
+def test_session_scope_commits(tuned_db):
+    with tuned_db.session_scope() as session:
+        SavedItemsRepository(session).add_item("123", "https://www.yad2.co.il/item/123")
+
+    with tuned_db.session_scope() as session:
+        assert SavedItemsRepository(session).is_saved("123")
+
+def test_sessions_usable_from_multiple_threads(tuned_db):
+    errors = []
+
+    def worker(thread_idx: int):
+        try:
+            for i in range(10):
+                with tuned_db.session_scope() as session:
+                    item_id = f"{thread_idx}-{i}"
+                    SavedItemsRepository(session).add_item(item_id, f"https://www.yad2.co.il/item/{item_id}")
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(idx,)) for idx in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    with tuned_db.session_scope() as session:
+        assert len(SavedItemsRepository(session).get_all_items()) == 40
+
+def test_create_tables_adds_new_columns_to_existing_tables(tmp_path):
+    db = Database(db_path=str(tmp_path / "old.db"))
+    with db.engine.begin() as conn:
+        # The listings table as created before the categorization columns existed
+        conn.execute(text(
+            "CREATE TABLE listings (item_id VARCHAR PRIMARY KEY, url VARCHAR NOT NULL, "
+            "city VARCHAR NOT NULL, street VARCHAR NOT NULL)"
+        ))
+        conn.execute(text(
+            "INSERT INTO listings (item_id, url, city, street) VALUES ('1', 'https://www.yad2.co.il/item/1', 'a', 'b')"
+        ))
+
+    db.create_tables()
+
+    with db.engine.connect() as conn:
+        columns = {row[1] for row in conn.execute(text("PRAGMA table_info(listings)"))}
+        assert {'is_supported', 'matched_neighborhood', 'latitude', 'last_seen'} <= columns
+        assert conn.execute(text("SELECT is_supported FROM listings")).scalar() is None
+    db.create_tables()  # Idempotent
+    db.dispose()
@@ -0,0 +1,142 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+
+from src.address import StreetMatch
+from src.db.listings_repository import ListingsRepository
+from src.db.models import Listing
+from src.yad2.models import Contact, FeedItem, PropertySpecs
+from tests.helpers import create_feed_item
+
+
+@pytest.fixture
+def repository(db_session):
+    return ListingsRepository(db_session)
+
+def create_item(item_id: str, street: str = "הרצל", price: int = 2500000, rooms: float = 4.0) -> FeedItem:
+    return create_feed_item(
+        item_id,
+        price=price,
+        city="תל אביב",
+        street=street,
+        neighborhood="פלורנטין",
+        specs=PropertySpecs(rooms=rooms, floor=2, size_sqm=90),
+        is_agency=True,
+        agency_name="Agency",
+        tags=["משופצת"]
+    )
+
+def test_upsert_and_get_round_trip(repository):
+    item = create_item("abc")
+    item.specs.features.has_elevator = True
+    item.specs.features.current_floor = 2
+    item.specs.features.total_floors = 5
+    item.contact = Contact(name="Dana", phone="050-0000000")
+
+    repository.upsert_item(item)
+    stored = repository.get_item("abc")
+
+    assert stored == item
+
+def test_upsert_keeps_first_seen_and_updates_last_seen(repository):
+    first = datetime(2024, 1, 1)
+    second = first + timedelta(days=3)
+
+    repository.upsert_item(create_item("abc", price=2500000), seen_at=first)
+    repository.upsert_item(create_item("abc", price=2400000), seen_at=second)
+
+    listing = repository.find_listings()[0]
+    assert listing.first_seen == first
+    assert listing.last_seen == second
+    assert listing.price == 2400000
+
+def test_feed_snapshot_does_not_clear_enrichment(repository):
+    enriched = create_item("abc")
+    enriched.specs.features.has_parking = True
+    enriched.specs.features.total_floors = 8
+    enriched.contact = Contact(name=None, phone="050-0000000")
+    repository.upsert_item(enriched)
+
+    repository.upsert_item(create_item("abc"))
+
+    stored = repository.get_item("abc")
+    assert stored.specs.features.has_parking
+    assert stored.specs.features.total_floors == 8
+    assert stored.contact.phone == "050-0000000"
+
+def test_find_listings_filters(repository):
+    now = datetime(2024, 6, 15)
+    repository.upsert_items([
+        create_item("1", street="הרצל", price=2900000, rooms=4),
+        create_item("2", street="הרצל", price=3100000, rooms=4),
+        create_item("3", street="אלנבי", price=2800000, rooms=4),
+        create_item("4", street="הרצל", price=2500000, rooms=3),
+    ], seen_at=now)
+    repository.upsert_item(create_item("5", street="הרצל", price=2000000, rooms=4), seen_at=now - timedelta(days=60))
+
+    results = repository.find_listings(
+        streets=[("תל אביב", "הרצל")],
+        rooms=4,
+        max_price=3000000,
+        seen_since=now - timedelta(days=30),
+    )
+
+    assert [listing.item_id for listing in results] == ["1"]
+
+def test_historical_query_uses_index(db_session):
+    plan = db_session.execute(text(
+        "EXPLAIN QUERY PLAN SELECT * FROM listings WHERE rooms = 4 AND price <= 3000000"
+    )).fetchall()
+    assert any("USING INDEX" in row[-1] for row in plan)
+
+def test_coordinates_round_trip(repository):
+    item = create_item("geo")
+    item.location.latitude, item.location.longitude = 32.11, 34.79
+    repository.upsert_item(item)
+
+    # A later snapshot without coordinates keeps them
+    repository.upsert_item(create_item("geo"))
+
+    stored = repository.get_item("geo")
+    assert (stored.location.latitude, stored.location.longitude) == (32.11, 34.79)
+
+def test_iter_chunks_streams_all_listings_in_id_order(repository):
+    repository.upsert_items([create_item(f"{i:03d}") for i in range(25)])
+
+    chunks = list(repository.iter_chunks(chunk_size=10))
+
+    assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+    assert [listing.item_id for chunk in chunks for listing in chunk] == [f"{i:03d}" for i in range(25)]
+
+def test_update_categorizations(repository, db_session):
+    repository.upsert_items([create_item("1"), create_item("2")])
+
+    repository.update_categorizations({
+        "1": StreetMatch(is_allowed=True, neighborhood="פלורנטין", constraint="זוגיים בלבד"),
+        "2": StreetMatch(is_allowed=False),
+        "missing": StreetMatch(is_allowed=True),
+    })
+
+    first, second = (db_session.get(Listing, item_id) for item_id in ("1", "2"))
+    assert (first.is_supported, first.matched_neighborhood, first.match_constraint) == (
+        True, "פלורנטין", "זוגיים בלבד"
+    )
+    assert first.categorized_at is not None
+    assert second.is_supported is False
+    assert db_session.get(Listing, "missing") is None
+
+def test_price_per_sqm_medians(repository):
+    no_size = create_item("d", price=9000000)
+    no_size.specs.size_sqm = None
+    repository.upsert_items([
+        create_item("a", price=2700000), create_item("b", price=1800000), create_item("c", price=3600000), no_size
+    ])
+
+    assert repository.price_per_sqm_medians() == {("תל אביב", "פלורנטין"): 30000.0}
+
+def test_first_seen(repository):
+    seen_at = datetime(2024, 1, 1)
+    repository.upsert_items([create_item("a"), create_item("b")], seen_at=seen_at)
+
+    assert repository.first_seen(["a", "b", "missing"]) == {"a": seen_at, "b": seen_at}
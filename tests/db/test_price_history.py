@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+
+from src.db.price_history_repository import PriceHistoryRepository
+from src.yad2.models import FeedItem
+from tests.helpers import create_feed_item
+
+START = datetime(2024, 1, 1)
+
+
+@pytest.fixture
+def repository(db_session):
+    return PriceHistoryRepository(db_session)
+
+def create_item(item_id: str, price) -> FeedItem:
+    return create_feed_item(item_id, price=price)
+
+def test_only_price_changes_are_stored(repository):
+    repository.record_prices([create_item("1", 2000000)], observed_at=START)
+    repository.record_prices([create_item("1", 2000000)], observed_at=START + timedelta(days=1))
+    repository.record_prices([create_item("1", 1900000)], observed_at=START + timedelta(days=2))
+
+    history = repository.get_price_history("1")
+    assert [(row.observed_at, row.price) for row in history] == [
+        (START, 2000000),
+        (START + timedelta(days=2), 1900000),
+    ]
+
+def test_items_without_price_are_ignored(repository):
+    assert repository.record_prices([create_item("1", None)]) == []
+    assert repository.get_price_history("1") == []
+
+def test_record_prices_returns_drops(repository):
+    repository.record_prices([create_item("1", 2000000), create_item("2", 3000000)], observed_at=START)
+
+    drops = repository.record_prices(
+        [create_item("1", 1800000), create_item("2", 3100000), create_item("3", 1000000)],
+        observed_at=START + timedelta(days=1)
+    )
+
+    assert len(drops) == 1
+    assert drops[0].item_id == "1"
+    assert drops[0].amount == 200000
+
+def test_latest_prices(repository):
+    repository.record_prices([create_item("1", 2000000)], observed_at=START)
+    repository.record_prices([create_item("1", 1900000), create_item("2", 500000)],
+                             observed_at=START + timedelta(days=1))
+
+    assert repository.latest_prices(["1", "2", "3"]) == {"1": 1900000, "2": 500000}
+
+def test_get_price_drops_since(repository):
+    repository.record_prices([create_item("1", 2000000), create_item("2", 3000000)], observed_at=START)
+    repository.record_prices([create_item("1", 1900000)], observed_at=START + timedelta(days=1))
+    repository.record_prices([create_item("2", 2900000)], observed_at=START + timedelta(days=10))
+    repository.record_prices([create_item("2", 2950000)], observed_at=START + timedelta(days=11))
+
+    drops = repository.get_price_drops(since=START + timedelta(days=5))
+    assert [(drop.item_id, drop.old_price, drop.new_price) for drop in drops] == [("2", 3000000, 2900000)]
+
+    all_drops = repository.get_price_drops(since=START, item_ids=["1"])
+    assert [(drop.item_id, drop.new_price) for drop in all_drops] == [("1", 1900000)]
+
+def test_get_price_drops_for_many_items(repository, monkeypatch):
+    monkeypatch.setattr('src.db.price_history_repository.QUERY_CHUNK_SIZE', 2)
+    item_ids = [str(i) for i in range(5)]
+    repository.record_prices([create_item(item_id, 2000000) for item_id in item_ids], observed_at=START)
+    for day, item_id in enumerate(reversed(item_ids), 1):
+        repository.record_prices([create_item(item_id, 1900000)], observed_at=START + timedelta(days=day))
+
+    drops = repository.get_price_drops(since=START, item_ids=item_ids + ["missing"])
+
+    assert [drop.item_id for drop in drops] == list(reversed(item_ids))
+
+def test_latest_price_lookup_uses_primary_key(db_session):
+    plan = db_session.execute(text(
+        "EXPLAIN QUERY PLAN SELECT price FROM price_history WHERE item_id = '1' ORDER BY observed_at DESC LIMIT 1"
+    )).fetchall()
+    assert any("PRIMARY KEY" in row[-1] for row in plan)
@@ -1,6 +1,6 @@
 import pytest
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 
 from src.db.models import Base
 from src.db.saved_items_repository import SavedItemsRepository
@@ -63,4 +63,26 @@ def test_get_all_items(repository):
     # Then
     saved_items = repository.get_all_items()
     assert len(saved_items) == 2
-    assert {item.item_id for item in saved_items} == {"123", "456"} 
\ No newline at end of file
+    assert {item.item_id for item in saved_items} == {"123", "456"} 
+
+def test_add_items_in_one_transaction(repository, monkeypatch):
+    # Given
+    commits = []
+    monkeypatch.setattr(repository.session, 'commit', lambda: commits.append(1) or Session.commit(repository.session))
+
+    # When
+    repository.add_items([("123", "https://www.yad2.co.il/item/123"), ("456", "https://www.yad2.co.il/item/456")])
+    repository.add_items([])
+
+    # Then
+    assert len(commits) == 1
+    assert {item.item_id for item in repository.get_all_items()} == {"123", "456"}
+
+def test_saved_ids(repository, monkeypatch):
+    # Given
+    monkeypatch.setattr('src.db.saved_items_repository.QUERY_CHUNK_SIZE', 2)
+    repository.add_items([(item_id, f"https://www.yad2.co.il/item/{item_id}") for item_id in ("1", "3", "5")])
+
+    # Then
+    assert repository.saved_ids(["1", "2", "3", "4", "5", "1"]) == {"1", "3", "5"}
+    assert repository.saved_ids([]) == set()
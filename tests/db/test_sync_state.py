@@ -0,0 +1,35 @@
+from src.db.saved_items_repository import SavedItemsRepository
+from src.db.sync_state_repository import SyncStateRepository
+from src.db.write_behind import WriteBehindQueue
+
+
+def test_set_and_get(session_factory):
+    repository = SyncStateRepository(session_factory())
+
+    assert repository.get("favorites") is None
+    repository.set("favorites", {"count": 3, "checksum": "abc"})
+    repository.set("favorites", {"count": 4, "checksum": "def"})
+
+    assert repository.get("favorites") == {"count": 4, "checksum": "def"}
+    assert SyncStateRepository(session_factory()).get("favorites") == {"count": 4, "checksum": "def"}
+
+def test_pending_writes_are_visible(session_factory):
+    writer = WriteBehindQueue(session_factory).start()
+    repository = SyncStateRepository(session_factory(), writer)
+
+    repository.set("favorites", {"count": 1})
+    assert repository.get("favorites") == {"count": 1}
+
+    writer.close()
+    assert SyncStateRepository(session_factory()).get("favorites") == {"count": 1}
+
+def test_saved_items_checksum(session_factory):
+    repository = SavedItemsRepository(session_factory())
+    empty = repository.checksum()
+
+    repository.add_items([("2", "https://www.yad2.co.il/item/2"), ("1", "https://www.yad2.co.il/item/1")])
+    checksum = repository.checksum()
+    repository.add_item("1", "https://www.yad2.co.il/item/1?updated")
+
+    assert checksum != empty
+    assert repository.checksum() == checksum
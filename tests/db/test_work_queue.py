@@ -0,0 +1,40 @@
+from src.db.work_queue_repository import TASK_ITEM, TASK_NOTIFY, TASK_URL, WorkQueueRepository
+from src.db.write_behind import WriteBehindQueue
+
+
+def test_adding_a_task_twice_keeps_the_first(session_factory):
+    repository = WorkQueueRepository(session_factory())
+
+    repository.add(TASK_URL, "b", {"url": "b", "page": 1})
+    repository.add(TASK_URL, "a", {"url": "a", "page": 1})
+    repository.update(TASK_URL, "b", {"url": "b", "page": 3})
+    repository.add(TASK_URL, "b", {"url": "b", "page": 1})
+
+    # Checkpoints keep a task's place in the queue
+    assert repository.pending(TASK_URL) == [{"url": "b", "page": 3}, {"url": "a", "page": 1}]
+
+def test_completed_tasks_are_not_pending(session_factory):
+    repository = WorkQueueRepository(session_factory())
+
+    repository.add_many(TASK_NOTIFY, {"1": {"item_id": "1"}, "2": {"item_id": "2"}})
+    repository.complete(TASK_NOTIFY, ["1"])
+    repository.complete(TASK_ITEM, ["1", "2"])
+    repository.add(TASK_NOTIFY, "1", {"item_id": "1"})
+
+    assert repository.pending(TASK_NOTIFY) == [{"item_id": "2"}]
+    assert sorted(repository.done_keys(TASK_ITEM)) == ["1", "2"]
+    assert repository.has_pending()
+
+    repository.clear()
+    assert not repository.has_pending()
+    assert repository.done_keys(TASK_ITEM) == []
+
+def test_tasks_survive_the_writer(session_factory):
+    writer = WriteBehindQueue(session_factory).start()
+    repository = WorkQueueRepository(session_factory(), writer)
+
+    repository.add(TASK_URL, "a", {"url": "a", "page": 1})
+    repository.update(TASK_URL, "a", {"url": "a", "page": 2})
+    writer.close()
+
+    assert WorkQueueRepository(session_factory()).pending(TASK_URL) == [{"url": "a", "page": 2}]
@@ -0,0 +1,151 @@
+import queue
+import threading
+from unittest.mock import Mock
+
+import pytest
+
+from src.db.database import Database
+from src.db.models import SavedItem
+from src.db.price_history_repository import PriceHistoryRepository
+from src.db.saved_items_repository import SavedItemsRepository
+from src.db.sync_state_repository import SyncStateRepository
+from src.db.write_behind import WriteBehindQueue
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = Database(db_path=str(tmp_path / "writer.db"))
+    db.create_tables()
+    yield db
+    db.dispose()
+
+@pytest.fixture
+def writer(db):
+    writer = WriteBehindQueue(db.get_session, batch_size=10).start()
+    yield writer
+    writer.close()
+
+def _add(item_id: str):
+    return lambda session: session.merge(SavedItem(item_id=item_id, url=f"https://www.yad2.co.il/item/{item_id}"))
+
+def test_flush_is_a_durability_barrier(db, writer):
+    for i in range(25):
+        writer.submit(_add(str(i)))
+
+    assert writer.flush(timeout=5)
+
+    with db.session_scope() as session:
+        assert session.query(SavedItem).count() == 25
+    assert writer.batches >= 3  # batch_size=10
+
+def test_close_flushes_pending_writes(db):
+    writer = WriteBehindQueue(db.get_session).start()
+    for i in range(5):
+        writer.submit(_add(str(i)))
+
+    writer.close(timeout=5)
+
+    assert not writer.is_running
+    with db.session_scope() as session:
+        assert session.query(SavedItem).count() == 5
+
+def test_failed_write_does_not_drop_batch(db, writer):
+    def broken(_session):
+        raise ValueError("broken write")
+
+    writer.submit(_add("1"))
+    writer.submit(broken)
+    writer.submit(_add("2"))
+    writer.flush(timeout=5)
+
+    assert writer.failed == 1
+    with db.session_scope() as session:
+        assert {item.item_id for item in session.query(SavedItem)} == {"1", "2"}
+
+def test_submit_applies_backpressure_when_full(db):
+    release = threading.Event()
+    writer = WriteBehindQueue(db.get_session, max_size=1, batch_size=1, put_timeout=0.1).start()
+
+    writer.submit(lambda _session: release.wait(5))  # Keeps the writer busy
+    writer.submit(_add("1"))  # Fills the queue
+    with pytest.raises(queue.Full):
+        writer.submit(_add("2"))
+
+    release.set()
+    writer.close(timeout=5)
+
+def test_flush_times_out_when_full(db):
+    release = threading.Event()
+    writer = WriteBehindQueue(db.get_session, max_size=1, batch_size=1).start()
+
+    writer.submit(lambda _session: release.wait(5))  # Keeps the writer busy
+    writer.submit(_add("1"))  # Fills the queue
+    assert not writer.flush(timeout=0.1)
+
+    release.set()
+    assert writer.flush(timeout=5)
+    writer.close(timeout=5)
+
+def test_submit_requires_running_writer(db):
+    with pytest.raises(RuntimeError):
+        WriteBehindQueue(db.get_session).submit(_add("1"))
+
+def test_repository_reads_its_own_pending_writes(db, writer):
+    repository = SavedItemsRepository(db.get_session(), writer)
+    release = threading.Event()
+    writer.submit(lambda _session: release.wait(5))  # Hold back the commit
+
+    repository.add_item("123", "https://www.yad2.co.il/item/123")
+
+    assert repository.is_saved("123")
+    release.set()
+    writer.flush(timeout=5)
+    assert len(repository.get_all_items()) == 1
+
+def test_pending_overlays_are_cleared_once_committed(db, writer):
+    saved_items = SavedItemsRepository(db.get_session(), writer)
+    prices = PriceHistoryRepository(db.get_session(), writer)
+    sync_state = SyncStateRepository(db.get_session(), writer)
+    item = Mock(item_id="123", price=2500000)
+
+    saved_items.add_items([("123", "https://www.yad2.co.il/item/123")])
+    prices.record_prices([item])
+    sync_state.set("favorites", {"count": 1})
+    assert writer.flush(timeout=5)
+
+    assert not saved_items._pending_ids
+    assert not prices._pending_prices
+    assert not sync_state._pending
+    # Read from the DB now
+    assert saved_items.is_saved("123")
+    assert prices.record_prices([item]) == []
+    assert sync_state.get("favorites") == {"count": 1}
+
+def test_later_pending_value_outlives_an_earlier_commit(db, writer):
+    sync_state = SyncStateRepository(db.get_session(), writer)
+    release = threading.Event()
+
+    sync_state.set("favorites", {"count": 1})
+    writer.submit(lambda _session: release.wait(5))  # Holds back the second value's commit
+    sync_state.set("favorites", {"count": 2})
+    assert sync_state.get("favorites") == {"count": 2}
+
+    release.set()
+    assert writer.flush(timeout=5)
+    assert sync_state.get("favorites") == {"count": 2}
+
+def test_repeated_pending_price_outlives_an_earlier_commit(db):
+    # Completion callbacks are run by hand, after the price went back to what the first write queued
+    callbacks = []
+    writer = Mock()
+    writer.submit.side_effect = lambda _operation, on_done: callbacks.append(on_done)
+    prices = PriceHistoryRepository(db.get_session(), writer)
+
+    for price in (2500000, 2400000, 2500000):
+        prices.record_prices([Mock(item_id="123", price=price)])
+    callbacks[0]()
+    callbacks[1]()
+
+    # The last write is still pending, so the same price again is no change
+    assert prices.record_prices([Mock(item_id="123", price=2500000)]) == []
+    assert len(callbacks) == 3
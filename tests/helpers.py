@@ -0,0 +1,30 @@
+from typing import Optional
+
+from src.yad2.models import FeedItem, Location, PropertySpecs
+
+
+def create_feed_item(
+    item_id: str = "1",
+    *,
+    price: Optional[int] = 1000000,
+    city: str = "Test City",
+    street: str = "Street",
+    neighborhood: Optional[str] = None,
+    latitude: Optional[float] = None,
+    longitude: Optional[float] = None,
+    specs: Optional[PropertySpecs] = None,
+    is_saved: bool = False,
+    is_agency: bool = False,
+    **fields
+) -> FeedItem:
+    """A feed listing for tests; fields not given get neutral defaults, the URL follows the item ID."""
+    return FeedItem(
+        item_id=item_id,
+        url=f"https://www.yad2.co.il/realestate/item/{item_id}",
+        price=price,
+        location=Location(city=city, street=street, neighborhood=neighborhood, latitude=latitude, longitude=longitude),
+        specs=specs or PropertySpecs(),
+        is_saved=is_saved,
+        is_agency=is_agency,
+        **fields
+    )
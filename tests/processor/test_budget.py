@@ -0,0 +1,30 @@
+import pytest
+
+from src.processor.budget import CrawlBudget, Deadline
+
+
+@pytest.mark.parametrize("budget, elapsed, pages, expected", [
+    (CrawlBudget(), 1000, 100, None),
+    (CrawlBudget(max_pages=3), 0, 2, None),
+    (CrawlBudget(max_pages=3), 0, 3, "read 3 pages"),
+    (CrawlBudget(max_seconds=60), 59, 0, None),
+    (CrawlBudget(max_seconds=60), 60, 0, "took over 60s"),
+])
+def test_page_limit(budget, elapsed, pages, expected):
+    assert budget.page_limit(elapsed, pages) == expected
+
+def test_enrichment_limit():
+    budget = CrawlBudget(max_seconds=60, max_enrichments=5)
+
+    assert budget.enrichment_limit(10, 4) is None
+    assert budget.enrichment_limit(10, 5) == "enriched 5 listings"
+    assert budget.enrichment_limit(61, 0) == "took over 60s"
+
+def test_deadline():
+    now = [100.0]
+    deadline = Deadline(30, clock=lambda: now[0])
+
+    assert not deadline.expired
+    now[0] = 130.0
+    assert deadline.expired
+    assert not Deadline(None).expired
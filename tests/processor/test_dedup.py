@@ -0,0 +1,25 @@
+from src.processor.dedup import RunRegistry
+from tests.helpers import create_feed_item
+
+
+def test_claim_returns_new_items_only():
+    registry = RunRegistry()
+
+    first = registry.claim([create_feed_item("1"), create_feed_item("2")])
+    second = registry.claim([create_feed_item("2"), create_feed_item("3")])
+
+    assert [item.item_id for item in first] == ["1", "2"]
+    assert [item.item_id for item in second] == ["3"]
+    assert registry.seen == {"1", "2", "3"}
+    assert registry.skipped_processing == 1
+
+def test_skipped_counts():
+    registry = RunRegistry()
+    registry.claim([create_feed_item("1")])
+
+    registry.record_skipped(["1"])
+    registry.record_skipped([])
+    registry.claim([create_feed_item("1")])
+
+    assert registry.skipped_parsing == 1
+    assert registry.skipped == 2
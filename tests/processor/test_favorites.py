@@ -0,0 +1,73 @@
+from unittest.mock import Mock
+
+import pytest
+
+from src.processor.favorites import reconcile_favorites
+from tests.helpers import create_feed_item
+
+
+@pytest.fixture
+def saved_items_repo():
+    repo = Mock()
+    repo.saved_ids.side_effect = lambda item_ids: set(item_ids) & {"db", "both", "db-missing"}
+    return repo
+
+@pytest.fixture
+def items():
+    return [
+        create_feed_item("db"),
+        create_feed_item("yad2", is_saved=True),
+        create_feed_item("both", is_saved=True),
+        create_feed_item("new"),
+        create_feed_item("db-missing"),
+    ]
+
+def test_reconcile_favorites(items, saved_items_repo):
+    client = Mock()
+    client.click_like_buttons.return_value = {"db": True, "db-missing": False}
+
+    result = reconcile_favorites(items, client, saved_items_repo)
+
+    assert result.both == ["both"]
+    assert result.db_only == ["db", "db-missing"]
+    assert result.yad2_only == ["yad2"]
+    assert result.failed_likes == ["db-missing"]
+    assert result.fixed == 2
+    client.click_like_buttons.assert_called_once_with(["db", "db-missing"])
+    assert list(saved_items_repo.add_items.call_args.args[0]) == [("yad2", items[1].url)]
+    # Everything saved on either side is skipped by processing, even if liking it failed
+    assert [item.item_id for item in items if not item.is_saved] == ["new"]
+
+def test_reconcile_favorites_reads_and_writes_the_db_once(items, saved_items_repo):
+    client = Mock()
+    client.click_like_buttons.side_effect = lambda item_ids: {item_id: True for item_id in item_ids}
+
+    reconcile_favorites(items, client, saved_items_repo)
+
+    # The saved state of the whole feed is read with one query, Yad2-only items stored with one write
+    saved_items_repo.saved_ids.assert_called_once()
+    saved_items_repo.is_saved.assert_not_called()
+    saved_items_repo.add_items.assert_called_once()
+    saved_items_repo.add_item.assert_not_called()
+    client.save_ad.assert_not_called()
+
+def test_reconcile_favorites_survives_failures(items, saved_items_repo):
+    client = Mock()
+    client.click_like_buttons.side_effect = Exception("browser gone")
+    saved_items_repo.add_items.side_effect = Exception("database locked")
+
+    result = reconcile_favorites(items, client, saved_items_repo)
+
+    assert result.failed_likes == ["db", "db-missing"]
+    assert result.fixed == 1
+
+def test_reconcile_favorites_without_db(items):
+    saved_items_repo = Mock()
+    saved_items_repo.saved_ids.side_effect = Exception("database locked")
+    client = Mock()
+
+    result = reconcile_favorites(items, client, saved_items_repo)
+
+    assert result.fixed == 0
+    client.click_like_buttons.assert_not_called()
+    assert [item.item_id for item in items if not item.is_saved] == ["db", "new", "db-missing"]
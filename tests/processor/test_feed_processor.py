@@ -2,8 +2,11 @@ from unittest.mock import Mock, call, patch
 
 import pytest
 
+from src.address import GeoCheck
 from src.address.matcher import StreetMatch
+from src.processor.feed_categorizer import categorize_feed_items
 from src.processor.feed_processor import process_feed_items
+from src.processor.triage import TriageRules
 from src.yad2.models import FeedItem, Location, PropertySpecs
 
 
@@ -19,6 +22,18 @@ def mock_format_hebrew():
         mock.side_effect = lambda x: x  # Just return the input
         yield mock
 
+def create_address_matcher(match: StreetMatch, location_check: GeoCheck = GeoCheck.UNKNOWN) -> Mock:
+    address_matcher = Mock()
+    address_matcher.is_street_allowed.return_value = match
+    address_matcher.match_streets.side_effect = lambda items: [match for _ in items]
+    address_matcher.check_location.return_value = location_check
+    address_matcher.neighborhoods_at.return_value = []
+    return address_matcher
+
+def saved_item_ids(client: Mock) -> list:
+    """IDs of the items passed to the batched save_ads, which also covers a failed batch."""
+    return [item.item_id for call in client.save_ads.call_args_list for item in call.args[0]]
+
 def create_test_item(item_id: str, street: str, is_saved: bool = False) -> FeedItem:
     return FeedItem(
         item_id=item_id,
@@ -30,112 +45,312 @@ def create_test_item(item_id: str, street: str, is_saved: bool = False) -> FeedI
         is_agency=False
     )
 
-def test_process_feed_items_handles_saved_states(mock_prompt_yes_no, mock_format_hebrew):
+def test_process_feed_items_skips_items_marked_saved(mock_prompt_yes_no, mock_format_hebrew):
     # Arrange
     items = [
-        create_test_item("1", "Street1", is_saved=True),  # Saved in Yad2
-        create_test_item("2", "Street2", is_saved=False), # Saved in DB
-        create_test_item("3", "Street3", is_saved=True),  # Saved in both
-        create_test_item("4", "Street4", is_saved=False), # Not saved anywhere
+        create_test_item("1", "Street1", is_saved=True),   # Marked saved by reconcile_favorites
+        create_test_item("2", "Street2", is_saved=False),
+        create_test_item("3", "Street3", is_saved=True),   # Marked saved by reconcile_favorites
+        create_test_item("4", "Street4", is_saved=False),
     ]
     
     # Mock dependencies
-    address_matcher = Mock()
-    address_matcher.is_street_allowed.return_value = StreetMatch(True)
+    address_matcher = create_address_matcher(StreetMatch(True))
     
     client = Mock()
-    saved_items_repo = Mock()
-    
-    # Setup saved_items_repo mock responses
-    saved_items_repo.is_saved.side_effect = lambda item_id: {
-        "1": False,   # Only in Yad2
-        "2": True,    # Only in DB
-        "3": True,    # In both
-        "4": False,   # Not saved anywhere
-    }[item_id]
 
     # Act
     with patch('src.processor.feed_processor.logging.info'), \
          patch('src.processor.feed_processor.logging.warning'), \
          patch('src.processor.feed_processor.logging.error'), \
          patch('builtins.print'):  # Suppress print statements
-        process_feed_items(items, address_matcher, client, saved_items_repo)
+        process_feed_items(items, address_matcher, client)
 
     # Assert
-    # Item 1 (Only in Yad2) - Should be saved to DB
-    assert saved_items_repo.add_item.call_args_list == [
-        call("1", "https://test.com/1")
-    ]
-
-    # Item 2 (Only in DB) - Should be saved to Yad2
-    assert any(call.args[0].item_id == "2" for call in client.save_ad.call_args_list)
+    # Favorites are reconciled when the feed is read (see test_favorites), not while processing it
+    client.click_like_buttons.assert_not_called()
 
-    # Item 3 (In both) - Should be skipped
-    assert not any(call.args[0].item_id == "3" for call in client.save_ad.call_args_list)
-    assert not any(call.args[0] == "3" for call in saved_items_repo.add_item.call_args_list)
+    # Items 1 and 3 are skipped, only items 2 and 4 are prompted for
+    assert mock_prompt_yes_no.call_args_list == [call("Do you approve to send?")] * 2
 
-    # Item 4 (Not saved anywhere) - Should be processed normally
-    assert any(call.args[0].item_id == "4" for call in client.save_ad.call_args_list)
+    # Items 2 and 4 are processed normally, then saved together; items 1 and 3 aren't saved again
+    assert sorted(saved_item_ids(client)) == ["2", "4"]
+    client.save_ads.assert_called_once()
 
 def test_process_feed_items_empty_list(mock_prompt_yes_no, mock_format_hebrew):
     # Arrange
     items = []
     address_matcher = Mock()
     client = Mock()
-    saved_items_repo = Mock()
 
     # Act
     with patch('src.processor.feed_processor.logging.warning'), \
          patch('builtins.print'):  # Suppress print statements
-        process_feed_items(items, address_matcher, client, saved_items_repo)
+        process_feed_items(items, address_matcher, client)
 
     # Assert
     client.save_ad.assert_not_called()
-    saved_items_repo.add_item.assert_not_called()
+    client.save_ads.assert_not_called()
 
 def test_process_feed_items_handles_exceptions(mock_prompt_yes_no, mock_format_hebrew):
     # Arrange
     items = [create_test_item("1", "Street1")]
     
-    address_matcher = Mock()
-    address_matcher.is_street_allowed.return_value = StreetMatch(True)
+    address_matcher = create_address_matcher(StreetMatch(True))
     
     client = Mock()
     client.save_ad.side_effect = Exception("Test error")
-    
-    saved_items_repo = Mock()
-    saved_items_repo.is_saved.return_value = False
-    saved_items_repo.add_item.side_effect = Exception("Test error")
+    client.save_ads.side_effect = Exception("Test error")
 
     # Act & Assert
     # Should not raise exception
     with patch('src.processor.feed_processor.logging.error'), \
          patch('src.processor.feed_processor.logging.info'), \
          patch('builtins.print'):  # Suppress print statements
-        process_feed_items(items, address_matcher, client, saved_items_repo)
+        process_feed_items(items, address_matcher, client)
 
 @pytest.mark.parametrize("constraint_exists", [True, False])
 def test_process_supported_items_with_constraints(mock_prompt_yes_no, mock_format_hebrew, constraint_exists):
     # Arrange
     items = [create_test_item("1", "Street1")]
     
-    address_matcher = Mock()
-    address_matcher.is_street_allowed.return_value = StreetMatch(
+    address_matcher = create_address_matcher(StreetMatch(
         True, 
         constraint="Some constraint" if constraint_exists else None,
         neighborhood="Test Neighborhood" if constraint_exists else None
-    )
+    ))
     
     client = Mock()
-    saved_items_repo = Mock()
-    saved_items_repo.is_saved.return_value = False
 
     # Act
     with patch('src.processor.feed_processor.logging.info'), \
          patch('builtins.print'):  # Suppress print statements
-        process_feed_items(items, address_matcher, client, saved_items_repo)
+        process_feed_items(items, address_matcher, client)
 
     # Assert
     if constraint_exists:
         assert mock_prompt_yes_no.call_args_list[0] == call("Street has constraints, proceed?")
-    client.save_ad.assert_called_once() 
\ No newline at end of file
+    assert saved_item_ids(client) == ["1"]
+
+def test_street_match_is_computed_once_per_item(mock_prompt_yes_no, mock_format_hebrew):
+    # Arrange
+    items = [create_test_item("1", "Street1"), create_test_item("2", "Street2")]
+    address_matcher = create_address_matcher(StreetMatch(True, constraint="Some constraint"))
+    client = Mock()
+
+    # Act
+    categorized = categorize_feed_items(items, address_matcher)
+    with patch('src.processor.feed_processor.logging.info'), \
+         patch('builtins.print'):  # Suppress print statements
+        process_feed_items(items, address_matcher, client)
+
+    # Assert
+    assert len(categorized.supported_items) == 2
+    assert all(item.street_match.constraint == "Some constraint" for item in items)
+    address_matcher.match_streets.assert_called_once()
+    address_matcher.is_street_allowed.assert_not_called()
+
+@pytest.mark.parametrize("location_check, processed", [(GeoCheck.INSIDE, True), (GeoCheck.OUTSIDE, False)])
+def test_constraint_resolved_by_location(mock_prompt_yes_no, mock_format_hebrew, location_check, processed):
+    # Arrange
+    items = [create_test_item("1", "Street1")]
+    address_matcher = create_address_matcher(StreetMatch(True, constraint="Some constraint"), location_check)
+    client = Mock()
+
+    # Act
+    with patch('src.processor.feed_processor.logging.info'), \
+         patch('builtins.print'), \
+         patch('src.processor.feed_processor.process_item') as mock_process_item:
+        process_feed_items(items, address_matcher, client)
+
+    # Assert
+    assert call("Street has constraints, proceed?") not in mock_prompt_yes_no.call_args_list
+    assert mock_process_item.called == processed
+    assert bool(saved_item_ids(client)) != processed
+
+@pytest.mark.parametrize("location_check, sent", [(GeoCheck.INSIDE, True), (GeoCheck.OUTSIDE, False)])
+def test_constraint_resolved_by_enriched_location(mock_prompt_yes_no, mock_format_hebrew, location_check, sent):
+    # Arrange
+    items = [create_test_item("1", "Street1")]
+    address_matcher = create_address_matcher(StreetMatch(True, constraint="Some constraint"))
+    # Only the listing page has the coordinates
+    address_matcher.check_location.side_effect = (
+        lambda item, match: GeoCheck.UNKNOWN if item.location.latitude is None else location_check
+    )
+    client = Mock()
+
+    def enrich(item):
+        item.location.latitude, item.location.longitude = 32.06, 34.77
+        return item
+    client.enrich_feed_item.side_effect = enrich
+    rules = TriageRules({"rules": [{"name": "Everything", "action": "approve", "when": {}}]})
+
+    # Act
+    with patch('src.processor.feed_processor.logging.info'), \
+         patch('builtins.print'):  # Suppress print statements
+        escalated = process_feed_items(items, address_matcher, client, rules=rules, auto=True)
+
+    # Assert
+    assert address_matcher.check_location.call_count == 2
+    assert client.send_feed_item.called == sent
+    assert escalated == []
+    assert saved_item_ids(client) == ["1"]
+
+def test_unsupported_item_outside_neighborhoods_is_skipped(mock_prompt_yes_no, mock_format_hebrew):
+    # Arrange
+    items = [create_test_item("1", "Street1")]
+    address_matcher = create_address_matcher(StreetMatch(False), GeoCheck.OUTSIDE)
+    client = Mock()
+
+    # Act
+    with patch('src.processor.feed_processor.logging.info'), \
+         patch('builtins.print'):  # Suppress print statements
+        process_feed_items(items, address_matcher, client)
+
+    # Assert
+    mock_prompt_yes_no.assert_not_called()
+    assert saved_item_ids(client) == ["1"]
+
+def test_auto_mode_never_prompts(mock_prompt_yes_no, mock_format_hebrew):
+    # Arrange
+    items = [create_test_item("1", "Street1"), create_test_item("2", "Street2"), create_test_item("3", "Street3")]
+    items[1].price = 5000000
+    address_matcher = create_address_matcher(StreetMatch(True, constraint="Some constraint"))
+    client = Mock()
+
+    def enrich(item):
+        item.specs.features.current_floor = 4 if item.item_id == "3" else 2
+        item.specs.features.total_floors = 4
+        return item
+    client.enrich_feed_item.side_effect = enrich
+    rules = TriageRules({"default": "escalate", "rules": [
+        {"name": "Over budget", "action": "reject", "when": {"price": {"min": 3000001}}},
+        {"name": "Last floor", "action": "reject", "when": {"floor": "last"}},
+    ]})
+
+    # Act
+    with patch('src.processor.feed_processor.logging.info'), \
+         patch('builtins.print'):  # Suppress print statements
+        escalated = process_feed_items(items, address_matcher, client, rules=rules, auto=True)
+
+    # Assert
+    mock_prompt_yes_no.assert_not_called()
+    # Item 2 is rejected without opening the listing, item 3 after enrichment
+    assert [call.args[0].item_id for call in client.enrich_feed_item.call_args_list] == ["1", "3"]
+    client.send_feed_item.assert_not_called()
+    # Item 1 is left for a manual run, so it isn't saved
+    assert escalated == [items[0]]
+    assert saved_item_ids(client) == ["2", "3"]
+
+def test_auto_mode_escalates_unsupported_items_without_enriching(mock_prompt_yes_no, mock_format_hebrew):
+    # Arrange
+    items = [create_test_item("1", "Street1"), create_test_item("2", "Street2")]
+    items[1].price = 5000000
+    address_matcher = create_address_matcher(StreetMatch(False))
+    client = Mock()
+    rules = TriageRules({"default": "escalate", "rules": [
+        {"name": "Over budget", "action": "reject", "when": {"price": {"min": 3000001}}},
+        {"name": "Last floor", "action": "reject", "when": {"floor": "last"}},
+    ]})
+
+    # Act
+    with patch('src.processor.feed_processor.logging.info'), \
+         patch('builtins.print'):  # Suppress print statements
+        escalated = process_feed_items(items, address_matcher, client, rules=rules, auto=True)
+
+    # Assert
+    # Item 1 can't be decided before enrichment, so it's left for manual review unopened
+    client.enrich_feed_item.assert_not_called()
+    assert escalated == [items[0]]
+    assert saved_item_ids(client) == ["2"]
+
+def test_approve_rule_sends_without_prompts(mock_prompt_yes_no, mock_format_hebrew):
+    # Arrange
+    items = [create_test_item("1", "Street1")]
+    address_matcher = create_address_matcher(StreetMatch(True))
+    client = Mock()
+    client.enrich_feed_item.side_effect = lambda item: item
+    rules = TriageRules({"rules": [{"name": "Everything", "action": "approve", "when": {}}]})
+
+    # Act
+    with patch('src.processor.feed_processor.logging.info'), \
+         patch('builtins.print'):  # Suppress print statements
+        process_feed_items(items, address_matcher, client, rules=rules)
+
+    # Assert
+    mock_prompt_yes_no.assert_not_called()
+    client.send_feed_item.assert_called_once_with(items[0])
+    assert saved_item_ids(client) == ["1"]
+
+def test_items_are_enriched_in_priority_order(mock_prompt_yes_no, mock_format_hebrew):
+    # Arrange
+    items = [create_test_item("1", "Street1"), create_test_item("2", "Street2"), create_test_item("3", "Street3")]
+    address_matcher = create_address_matcher(StreetMatch(True))
+    client = Mock()
+    client.enrich_feed_item.side_effect = lambda item: item
+    scorer = Mock()
+    scorer.score.side_effect = lambda item: {"1": 10, "2": 30, "3": 20}[item.item_id]
+    # Decided only after enrichment
+    rules = TriageRules({"rules": [{"name": "Last floor", "action": "reject", "when": {"floor": "last"}}]})
+
+    # Act
+    with patch('src.processor.feed_processor.logging.info'), \
+         patch('builtins.print'):  # Suppress print statements
+        process_feed_items(
+            items, address_matcher, client, rules=rules, auto=True, scorer=scorer
+        )
+
+    # Assert
+    assert [call.args[0].item_id for call in client.enrich_feed_item.call_args_list] == ["2", "3", "1"]
+
+def test_deferred_items_are_neither_saved_nor_escalated(mock_prompt_yes_no, mock_format_hebrew):
+    # Arrange
+    items = [create_test_item("1", "Street1"), create_test_item("2", "Street2")]
+    address_matcher = create_address_matcher(StreetMatch(True))
+    client = Mock()
+    rules = TriageRules({"rules": [{"name": "Last floor", "action": "reject", "when": {"floor": "last"}}]})
+
+    def enrich(item):
+        if item.item_id == "2":
+            return None
+        item.specs.features.current_floor = item.specs.features.total_floors = 4
+        return item
+
+    # Act
+    with patch('src.processor.feed_processor.logging.info'), \
+         patch('builtins.print'):  # Suppress print statements
+        escalated = process_feed_items(
+            items, address_matcher, client, rules=rules, auto=True, enrich=enrich
+        )
+
+    # Assert
+    client.enrich_feed_item.assert_not_called()
+    assert escalated == []
+    assert saved_item_ids(client) == ["1"]
+
+def test_stopped_processing_leaves_items_without_prompting(mock_prompt_yes_no, mock_format_hebrew):
+    # Arrange
+    items = [create_test_item("1", "Street1"), create_test_item("2", "Street2")]
+    address_matcher = create_address_matcher(StreetMatch(True))
+    client = Mock()
+    client.enrich_feed_item.side_effect = lambda item: item
+    stop = []
+
+    def approve_then_stop(question):
+        stop.append(True)
+        return True
+
+    mock_prompt_yes_no.side_effect = approve_then_stop
+
+    # Act
+    with patch('builtins.print'):  # Suppress print statements
+        escalated = process_feed_items(
+            items, address_matcher, client, stopped=lambda: bool(stop)
+        )
+
+    # Assert: no format prompt for the first item, and the second isn't reached
+    assert mock_prompt_yes_no.call_args_list == [call("Do you approve to send?")]
+    assert [call.args[0].item_id for call in client.enrich_feed_item.call_args_list] == ["1"]
+    client.send_feed_item.assert_not_called()
+    assert escalated == []
+    assert saved_item_ids(client) == []
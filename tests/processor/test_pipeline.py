@@ -0,0 +1,156 @@
+import threading
+import time
+
+import pytest
+
+from src.processor.pipeline import Handoff, Pipeline, Stage
+
+
+def test_items_flow_through_stages():
+    pipeline = Pipeline([
+        Stage('double', lambda item, emit: emit(item * 2)),
+        Stage('split', lambda item, emit: [emit(item), emit(item + 1)]),
+    ])
+
+    assert pipeline.run(range(3)) == [0, 1, 2, 3, 4, 5]
+    assert [(m.processed, m.emitted) for m in pipeline.metrics] == [(3, 3), (3, 6)]
+
+def test_stage_can_filter_items():
+    def evens(item, emit):
+        if item % 2 == 0:
+            emit(item)
+
+    assert Pipeline([Stage('evens', evens)]).run(range(5)) == [0, 2, 4]
+
+def test_requires_a_stage():
+    with pytest.raises(ValueError):
+        Pipeline([])
+
+def test_failed_items_are_dropped_and_counted():
+    dropped = []
+
+    def fail_on_two(item, emit):
+        if item == 2:
+            raise RuntimeError("boom")
+        emit(item)
+
+    pipeline = Pipeline([Stage('check', fail_on_two, on_drop=dropped.append)])
+
+    assert pipeline.run(range(4)) == [0, 1, 3]
+    assert pipeline.metrics[0].errors == 1
+    assert dropped == [2]
+
+def test_bounded_queue_applies_backpressure():
+    release = threading.Event()
+
+    def slow(item, emit):
+        release.wait(5)
+        emit(item)
+
+    pipeline = Pipeline([Stage('fast', lambda item, emit: emit(item)), Stage('slow', slow, queue_size=2)])
+    thread = threading.Thread(target=pipeline.run, args=(range(20),))
+    thread.start()
+    time.sleep(0.1)
+    # The slow stage holds one item, its queue two, and the fast stage is blocked on a third
+    assert pipeline.queue_depths()[1] == 2
+    assert pipeline.metrics[0].processed <= 4
+    release.set()
+    thread.join(5)
+
+    assert sorted(pipeline.results) == list(range(20))
+    assert pipeline.metrics[1].max_queue_depth == 2
+
+def test_workers_run_concurrently():
+    # Would time out unless all three workers are inside the handler at once
+    barrier = threading.Barrier(3, timeout=5)
+
+    def wait_for_all(item, emit):
+        barrier.wait()
+        emit(item)
+
+    pipeline = Pipeline([Stage('wait', wait_for_all, workers=3)])
+
+    assert sorted(pipeline.run(range(3))) == [0, 1, 2]
+    assert pipeline.metrics[0].errors == 0
+
+def test_stages_overlap():
+    def sleep_then_emit(item, emit):
+        time.sleep(0.05)
+        emit(item)
+
+    pipeline = Pipeline([Stage('a', sleep_then_emit), Stage('b', sleep_then_emit)])
+    pipeline.run(range(6))
+
+    # Sequential would take 12 sleeps, a pipeline of two equal stages about 7
+    assert pipeline.elapsed < 0.5
+    assert all(metrics.utilization(pipeline.elapsed) > 0.5 for metrics in pipeline.metrics)
+
+def test_stop_drops_queued_items():
+    dropped = []
+
+    def first_stops(item, emit):
+        pipeline.stop()
+        emit(item)
+
+    pipeline = Pipeline([Stage('stop', first_stops, on_drop=dropped.append)])
+    pipeline.run(range(3))
+
+    assert pipeline.results == [0]
+    # Items already queued are dropped, the rest are never fed
+    assert dropped == list(range(1, 1 + pipeline.metrics[0].dropped))
+
+def test_handoff_holds_resource_across_stages():
+    browser = Handoff()
+    in_use = []
+    log = []
+
+    def take(item, emit):
+        emit((item, browser.take()))
+
+    def use(entry, emit):
+        item, lease = entry
+        in_use.append(item)
+        log.append(len(in_use))
+        time.sleep(0.01)
+        in_use.remove(item)
+        lease.release()
+        lease.release()  # Releasing twice is harmless
+        emit(item)
+
+    pipeline = Pipeline([Stage('take', take), Stage('use', use, workers=2)])
+
+    assert sorted(pipeline.run(range(5))) == list(range(5))
+    assert max(log) == 1
+
+def test_stop_closes_handoffs():
+    browser = Handoff()
+    lease = browser.take()
+    taken = []
+    waiting = threading.Thread(target=lambda: taken.append(browser.take()))
+    waiting.start()
+
+    Pipeline([Stage('noop', lambda item, emit: None)], handoffs=[browser]).stop()
+    waiting.join(5)
+
+    # Whoever waited for the resource, or asks for it later, is told the pipeline stopped
+    assert taken == [None]
+    assert browser.closed and browser.take() is None
+    lease.release()
+
+def test_interrupt_waits_for_busy_workers_up_to_timeout():
+    never = threading.Event()
+
+    def interrupted_inputs():
+        yield 0
+        time.sleep(0.05)
+        raise KeyboardInterrupt
+
+    # A handler stuck e.g. waiting for input doesn't keep the pipeline from returning
+    pipeline = Pipeline([Stage('stuck', lambda item, emit: never.wait(5), queue_size=1)])
+    start = time.monotonic()
+    with pytest.raises(KeyboardInterrupt):
+        pipeline.run(interrupted_inputs(), timeout=0.1)
+
+    assert time.monotonic() - start < 1
+    assert pipeline.stopping
+    never.set()
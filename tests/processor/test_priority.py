@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.address import StreetMatch
+from src.processor.priority import (
+    CONSTRAINT_PENALTY,
+    FRESHNESS_SCORE,
+    PRICE_SCORE,
+    PRIVATE_SCORE,
+    STREET_SCORE,
+    ListingScorer,
+    PriorityQueue,
+)
+from src.yad2.models import FeedItem, PropertySpecs
+from tests.helpers import create_feed_item
+
+NOW = datetime(2024, 6, 1, 12, 0)
+MEDIANS = {("תל אביב", "פלורנטין"): 30000.0}
+SUPPORTED = StreetMatch(True)
+
+
+def create_item(item_id: str, price: int = 2700000, size_sqm: int = 90, is_agency: bool = False,
+                match: StreetMatch = SUPPORTED) -> FeedItem:
+    return create_feed_item(
+        item_id,
+        price=price,
+        city="תל אביב",
+        street="הרצל",
+        neighborhood="פלורנטין",
+        specs=PropertySpecs(rooms=4.0, size_sqm=size_sqm),
+        is_agency=is_agency,
+        street_match=match
+    )
+
+@pytest.fixture
+def scorer():
+    return ListingScorer(MEDIANS, {"old": NOW - timedelta(days=30), "half": NOW - timedelta(days=3.5)}, now=NOW)
+
+def test_score_of_a_new_private_listing_at_the_median(scorer):
+    assert scorer.score(create_item("new")) == STREET_SCORE + PRIVATE_SCORE + FRESHNESS_SCORE
+
+@pytest.mark.parametrize("match, expected", [
+    (StreetMatch(True), STREET_SCORE),
+    (StreetMatch(True, constraint="Odd numbers only"), STREET_SCORE - CONSTRAINT_PENALTY),
+    (StreetMatch(False), 0),
+    (None, 0),
+])
+def test_street_score(scorer, match, expected):
+    assert scorer.street_score(create_item("1", match=match)) == expected
+
+@pytest.mark.parametrize("price, expected", [
+    (2700000, 0),  # At the median
+    (2362500, PRICE_SCORE / 2),  # 12.5% below
+    (1000000, PRICE_SCORE),  # Capped
+    (4000000, -PRICE_SCORE),
+])
+def test_price_score_against_neighborhood_median(scorer, price, expected):
+    assert scorer.price_score(create_item("1", price=price)) == pytest.approx(expected)
+
+def test_price_score_without_data(scorer):
+    assert scorer.price_score(create_item("1", size_sqm=None)) == 0
+    item = create_item("1")
+    item.location.neighborhood = "Unknown"
+    assert scorer.price_score(item) == 0
+
+def test_freshness_decays_with_age(scorer):
+    assert scorer.freshness(create_item("new")) == FRESHNESS_SCORE
+    assert scorer.freshness(create_item("half")) == pytest.approx(FRESHNESS_SCORE / 2)
+    assert scorer.freshness(create_item("old")) == 0
+
+def test_agency_listings_score_lower(scorer):
+    assert scorer.score(create_item("1", is_agency=True)) == scorer.score(create_item("2")) - PRIVATE_SCORE
+
+def test_priority_queue_pops_highest_score_first_keeping_ties_in_order():
+    scores = {"a": 1, "b": 5, "c": 3, "d": 5}
+    queue = PriorityQueue(lambda item: scores[item.item_id], [create_item(item_id) for item_id in scores])
+
+    popped = [queue.pop() for _ in range(len(queue))]
+
+    assert [(item.item_id, score) for item, score in popped] == [("b", 5), ("d", 5), ("c", 3), ("a", 1)]
+    assert len(queue) == 0
@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+from src.address import AddressMatcher
+from src.db.database import Database
+from src.db.listings_repository import ListingsRepository
+from src.db.models import Listing
+from src.processor.recategorize import recategorize_listings, recategorize_stored_listings
+from src.yad2.models import FeedItem
+from tests.helpers import create_feed_item
+
+
+def write_streets(path, streets):
+    data = [{
+        "city": "תל אביב",
+        "neighborhoods": [{"neighborhood": "פלורנטין", "streets": [{"name": name} for name in streets]}]
+    }]
+    path.write_text(json.dumps(data), encoding='utf-8')
+
+def create_item(item_id: str, street: str) -> FeedItem:
+    return create_feed_item(item_id, price=2000000, city="תל אביב", street=street)
+
+@pytest.fixture
+def repository(db_session):
+    repository = ListingsRepository(db_session)
+    repository.upsert_items([
+        create_item("1", "הרצל 10"),
+        create_item("2", "פלורנטין 5"),
+        create_item("3", "אבולעפיה 3"),
+    ])
+    return repository
+
+def test_recategorize_reports_newly_supported_listings(tmp_path, repository, db_session):
+    streets_file = tmp_path / "streets.json"
+    write_streets(streets_file, ["הרצל"])
+    matcher = AddressMatcher(str(streets_file))
+
+    first = recategorize_listings(repository, matcher, chunk_size=2)
+    assert (first.scanned, first.changed) == (3, 3)
+    assert first.newly_supported == [] and first.newly_unsupported == []
+    assert db_session.get(Listing, "1").is_supported
+
+    # A street is added to the config, another one removed
+    write_streets(streets_file, ["פלורנטין"])
+    matcher = AddressMatcher(str(streets_file))
+
+    second = recategorize_listings(repository, matcher, chunk_size=2)
+
+    assert (second.scanned, second.changed) == (3, 2)
+    assert [item.item_id for item in second.newly_supported] == ["2"]
+    assert [item.item_id for item in second.newly_unsupported] == ["1"]
+    assert db_session.get(Listing, "2").matched_neighborhood == "פלורנטין"
+    assert db_session.get(Listing, "1").is_supported is False
+
+def test_recategorize_without_changes_writes_nothing(tmp_path, repository):
+    streets_file = tmp_path / "streets.json"
+    write_streets(streets_file, ["הרצל"])
+    matcher = AddressMatcher(str(streets_file))
+    recategorize_listings(repository, matcher)
+
+    result = recategorize_listings(repository, matcher)
+
+    assert (result.scanned, result.changed) == (3, 0)
+
+def test_recategorize_stored_listings_uses_its_own_database(tmp_path):
+    db = Database(db_path=str(tmp_path / "listings.db"))
+    db.create_tables()
+    with db.session_scope() as session:
+        ListingsRepository(session).upsert_item(create_item("1", "הרצל 10"))
+    streets_file = tmp_path / "streets.json"
+    write_streets(streets_file, ["הרצל"])
+
+    result = recategorize_stored_listings(AddressMatcher(str(streets_file)), db)
+
+    assert result.changed == 1
+    with db.session_scope() as session:
+        assert session.get(Listing, "1").is_supported
+    db.dispose()
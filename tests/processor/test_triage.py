@@ -0,0 +1,116 @@
+import json
+
+import pytest
+
+from src.address import StreetMatch
+from src.processor.triage import DEFAULT_RULES, TriageAction, TriageRules, load_rules
+from src.yad2.models import FeedItem, PropertySpecs
+from tests.helpers import create_feed_item
+
+
+def create_item(price=2500000, rooms=4.0, is_agency=False, tags=None, street_match=None) -> FeedItem:
+    return create_feed_item(
+        price=price,
+        street="Street1",
+        specs=PropertySpecs(rooms=rooms, floor=2, size_sqm=90),
+        is_agency=is_agency,
+        tags=tags or [],
+        street_match=street_match or StreetMatch(True)
+    )
+
+def enrich(item: FeedItem, current_floor: int, total_floors: int, **features) -> FeedItem:
+    item.specs.features.current_floor = current_floor
+    item.specs.features.total_floors = total_floors
+    for name, value in features.items():
+        setattr(item.specs.features, name, value)
+    return item
+
+@pytest.fixture
+def rules():
+    return TriageRules({
+        "default": "escalate",
+        "rules": [
+            {"name": "Unsupported", "action": "reject", "when": {"supported": False}},
+            {"name": "Over budget", "action": "reject", "when": {"price": {"min": 3000001}}},
+            {"name": "Last floor", "action": "reject", "when": {"floor": "last"}},
+            {"name": "Good fit", "action": "approve", "when": {
+                "rooms": {"min": 3.5, "max": 5},
+                "agency": False,
+                "features": {"has_elevator": True},
+                "constraint": False,
+                "tags": {"none": ["דרושה השקעה"]}
+            }},
+        ]
+    })
+
+def test_reject_before_enrichment(rules):
+    decision = rules.evaluate(create_item(price=3500000))
+    assert decision.action == TriageAction.REJECT
+    assert decision.rule == "Over budget"
+
+    assert rules.evaluate(create_item(street_match=StreetMatch(False))).rule == "Unsupported"
+
+def test_rule_needing_enrichment_blocks_later_rules(rules):
+    # "Last floor" can't be decided before enrichment, so "Good fit" mustn't approve yet
+    assert rules.evaluate(create_item()).action == TriageAction.ESCALATE
+
+def test_decisions_after_enrichment(rules):
+    assert rules.evaluate(enrich(create_item(), 4, 4)).rule == "Last floor"
+
+    decision = rules.evaluate(enrich(create_item(), 2, 4, has_elevator=True))
+    assert decision.action == TriageAction.APPROVE
+    assert decision.rule == "Good fit"
+
+    # No rule matches, the default decides
+    decision = rules.evaluate(enrich(create_item(is_agency=True), 2, 4, has_elevator=True))
+    assert decision.action == TriageAction.ESCALATE
+    assert decision.rule is None
+
+@pytest.mark.parametrize("item_args", [
+    {"rooms": 3.0},
+    {"tags": ["דרושה השקעה"]},
+    {"street_match": StreetMatch(True, constraint="זוגיים בלבד")},
+])
+def test_approve_rule_conditions(rules, item_args):
+    item = enrich(create_item(**item_args), 2, 4, has_elevator=True)
+    assert rules.evaluate(item).action == TriageAction.ESCALATE
+
+def test_floor_conditions():
+    rules = TriageRules({"default": "approve", "rules": [
+        {"name": "Ground", "action": "reject", "when": {"floor": "ground"}},
+        {"name": "High", "action": "reject", "when": {"floor": {"min": 10}}},
+    ]})
+    item = create_item()
+    item.specs.floor = 0
+    assert rules.evaluate(item).rule == "Ground"
+    assert rules.evaluate(enrich(create_item(), 12, 20)).rule == "High"
+    assert rules.evaluate(enrich(create_item(), 3, 20)).action == TriageAction.APPROVE
+
+def test_missing_price_is_undecided():
+    rules = TriageRules({"default": "approve", "rules": [
+        {"name": "Cheap", "action": "reject", "when": {"price": {"max": 100}}},
+    ]})
+    assert rules.evaluate(create_item(price=None)).action == TriageAction.ESCALATE
+
+@pytest.mark.parametrize("rule", [
+    {"name": "bad", "action": "maybe", "when": {}},
+    {"name": "bad", "action": "reject", "when": {"colour": "red"}},
+    {"name": "bad", "action": "reject", "when": {"price": {"above": 1}}},
+    {"name": "bad", "action": "reject", "when": {"floor": "top"}},
+    {"name": "bad", "action": "reject", "when": {"features": {"has_pool": True}}},
+    {"name": "bad", "when": {}},
+])
+def test_invalid_rules_fail_at_compile_time(rule):
+    with pytest.raises(ValueError, match="bad"):
+        TriageRules({"rules": [rule]})
+
+def test_load_rules(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({"rules": [{"name": "Any", "action": "reject", "when": {}}]}), encoding='utf-8')
+
+    assert load_rules(str(path)).evaluate(create_item()).rule == "Any"
+    assert len(load_rules(str(tmp_path / "missing.json")).rules) == len(DEFAULT_RULES["rules"])
+
+def test_example_rules_file_compiles():
+    with open("consts/triage_rules.json.example", encoding='utf-8') as f:
+        assert TriageRules(json.load(f)).rules
@@ -0,0 +1,41 @@
+from datetime import datetime
+
+import pytest
+
+from src.db.sync_state_repository import SyncStateRepository
+from src.processor import watermark as watermark_module
+from src.processor.watermark import CrawlWatermark, load_watermark, save_watermark
+from tests.helpers import create_feed_item
+
+
+@pytest.fixture
+def sync_state_repo(db_session):
+    return SyncStateRepository(db_session)
+
+def test_reaches():
+    watermark = CrawlWatermark(["1", "2", "3"])
+
+    assert watermark.reaches([create_feed_item("1"), create_feed_item("3")])
+    assert watermark.reaches([create_feed_item("4"), create_feed_item("1")])
+    assert not watermark.reaches([create_feed_item("4"), create_feed_item("5")])
+    assert not watermark.reaches([])
+    assert not CrawlWatermark().reaches([create_feed_item("1")])
+
+def test_advance_keeps_most_recent_ids(monkeypatch):
+    monkeypatch.setattr(watermark_module, 'WATERMARK_MAX_IDS', 4)
+    crawled_at = datetime(2024, 5, 1, 8, 30)
+
+    watermark = CrawlWatermark(["3", "2", "1"]).advance(["5", "4", "3"], crawled_at)
+
+    assert watermark.item_ids == ["5", "4", "3", "2"]
+    assert watermark.crawled_at == crawled_at
+
+def test_save_and_load(sync_state_repo):
+    url = "https://www.yad2.co.il/realestate/forsale?rooms=3-4"
+    assert load_watermark(sync_state_repo, url) == CrawlWatermark()
+
+    watermark = CrawlWatermark(["2", "1"], datetime(2024, 5, 1, 8, 30))
+    save_watermark(sync_state_repo, url, watermark)
+
+    assert load_watermark(sync_state_repo, url) == watermark
+    assert load_watermark(sync_state_repo, f"{url}&page=2") == CrawlWatermark()
@@ -2,9 +2,16 @@ from unittest.mock import MagicMock
 
 import pytest
 
-from src.address import AddressMatcher
+from src.address import AddressMatcher, StreetMatch
 from src.app import Yad2ScraperApp
+from src.db.work_queue_repository import TASK_URL
+from src.processor.budget import CrawlBudget
+from src.processor.pipeline import Handoff
+from src.processor.triage import TriageRules
+from src.processor.watermark import CrawlWatermark, load_watermark, save_watermark
 from src.yad2.client import Yad2Client
+from src.yad2.models import FeedItem, FeedPage, PropertySpecs
+from tests.helpers import create_feed_item as _create_feed_item
 
 
 @pytest.fixture
@@ -26,10 +33,16 @@ def mock_search_urls():
     }
 
 @pytest.fixture
-def app(mock_client, mock_address_matcher, mock_search_urls):
+def app(mock_client, mock_address_matcher, mock_search_urls, tmp_path, monkeypatch):
     """Create an instance of Yad2ScraperApp with mocked dependencies."""
+    monkeypatch.setattr('src.db.database.get_db_path', lambda: str(tmp_path / "test.db"))
     return Yad2ScraperApp(mock_client, mock_address_matcher, mock_search_urls)
 
+def create_feed_item(item_id: str) -> FeedItem:
+    return _create_feed_item(
+        item_id, price=2500000, specs=PropertySpecs(rooms=4.0, floor=2, size_sqm=90), street_match=StreetMatch(True)
+    )
+
 def test_handle_store_saved_items_success(app, capsys):
     """Test successful storing of saved items."""
     # Setup
@@ -59,4 +72,466 @@ def test_handle_store_saved_items_navigation_failed(app, capsys):
     # Verify
     captured = capsys.readouterr()
     assert "Failed to navigate to saved items page" in captured.out
-    app.client.get_saved_items.assert_not_called()
\ No newline at end of file
+    app.client.get_saved_items.assert_not_called()
+
+def test_go_to_all_urls_pipeline(app, mock_search_urls, capsys):
+    """Each search page's listings are handled before the browser leaves it, emails go out on their own."""
+    calls = []
+    feeds = iter([[create_feed_item("1"), create_feed_item("2")], [create_feed_item("3")]])
+    app.client.navigate_to_saved_items.return_value = False
+    app.client.navigate_to.side_effect = lambda url: calls.append("navigate")
+    app.client.get_feed_page.side_effect = lambda skip_ids: FeedPage(next(feeds))
+    app.client.enrich_feed_item.side_effect = lambda item: item
+    app.client.save_ads.side_effect = lambda items: calls.append(f"save {' '.join(i.item_id for i in items)}")
+    app.client.send_feed_item.side_effect = lambda item: calls.append(f"send {item.item_id}")
+    app.address_matcher.check_location.return_value = None
+    app.client.is_paged_url.side_effect = Yad2Client.is_paged_url
+    app.client.get_total_pages.return_value = 1
+    app.rules = TriageRules({"rules": [{"name": "All", "action": "approve", "when": {}}]})
+
+    app._handle_go_to_all_urls()
+
+    browser_calls = [call for call in calls if not call.startswith("send")]
+    assert browser_calls == ["navigate", "save 1 2", "navigate", "save 3"]
+    assert sorted(call for call in calls if call.startswith("send")) == ["send 1", "send 2", "send 3"]
+    assert "Sent 3 listings" in capsys.readouterr().out
+
+def test_saved_items_sync_skipped_when_favorites_unchanged(app, capsys):
+    # A full sync records the badge count and the saved items
+    app.client.get_favorites_count.return_value = 2
+    app.client.navigate_to_saved_items.return_value = True
+    app.client.get_saved_items.return_value = [
+        ("123", "https://www.yad2.co.il/item/123"),
+        ("456", "https://www.yad2.co.il/item/456")
+    ]
+    assert app._sync_saved_items()
+    assert app.client.navigate_to_saved_items.call_count == 1
+
+    # Same badge count and saved items, the favorites page isn't visited again
+    assert app._sync_saved_items()
+    assert app.client.navigate_to_saved_items.call_count == 1
+    assert "Favorites unchanged (2 saved items)" in capsys.readouterr().out
+
+    # A favorite added on Yad2 changes the count
+    app.client.get_favorites_count.return_value = 3
+    app._sync_saved_items()
+    assert app.client.navigate_to_saved_items.call_count == 2
+
+def test_saved_items_synced_when_db_changed(app):
+    app.client.get_favorites_count.return_value = 1
+    app.client.navigate_to_saved_items.return_value = True
+    app.client.get_saved_items.return_value = [("123", "https://www.yad2.co.il/item/123")]
+    app._sync_saved_items()
+
+    app.saved_items_repo.add_item("456", "https://www.yad2.co.il/item/456")
+    app._sync_saved_items()
+
+    assert app.client.navigate_to_saved_items.call_count == 2
+
+def test_saved_items_synced_when_badge_unknown(app):
+    app.client.get_favorites_count.return_value = None
+    app.client.navigate_to_saved_items.return_value = True
+    app.client.get_saved_items.return_value = [("123", "https://www.yad2.co.il/item/123")]
+
+    app._sync_saved_items()
+    app._sync_saved_items()
+
+    assert app.client.navigate_to_saved_items.call_count == 2
+    assert app.sync_state_repo.get("favorites") is None
+
+def test_go_to_all_urls_stops_at_handled_listings(app):
+    """Search results are paginated until a page has a listing handled in an earlier run."""
+    url = "https://www.yad2.co.il/realestate/forsale?rooms=3-4"
+    app.search_urls = {"search": url}
+    pages = {
+        url: ["1", "2"],
+        f"{url}&page=2": ["3", "4"],
+        f"{url}&page=3": ["5"],
+    }
+    navigated = []
+    app.client.navigate_to_saved_items.return_value = False
+    app.client.navigate_to.side_effect = navigated.append
+    app.client.get_feed_page.side_effect = lambda skip_ids: FeedPage(
+        [create_feed_item(item_id) for item_id in pages[navigated[-1]]]
+    )
+    app.client.is_paged_url.side_effect = Yad2Client.is_paged_url
+    app.client.page_url.side_effect = Yad2Client.page_url
+    app.client.get_total_pages.return_value = 3
+    app.address_matcher.check_location.return_value = None
+    app.rules = TriageRules({"rules": [{"name": "None", "action": "reject", "when": {}}]})
+
+    # The first crawl only seeds the watermark from the first page
+    app._handle_go_to_all_urls()
+    assert navigated == [url]
+    app.client.get_total_pages.assert_not_called()
+
+    # New listings on the first two pages, the third reaches the handled ones
+    pages[url] = ["7", "6"]
+    pages[f"{url}&page=2"] = ["5", "3"]
+    pages[f"{url}&page=3"] = ["2", "1"]
+    navigated.clear()
+    app._handle_go_to_all_urls()
+    assert navigated == list(pages)
+
+    # Nothing new, only the first page is loaded
+    navigated.clear()
+    app._handle_go_to_all_urls()
+    assert navigated == [url]
+    app.client.get_total_pages.assert_called_once()
+
+    # A new listing on the first page, followed by handled ones
+    pages[url] = ["8", "7"]
+    pages[f"{url}&page=2"] = ["6", "5"]
+    navigated.clear()
+    app._handle_go_to_all_urls()
+    assert navigated == [url]
+
+    # New listings run onto the second page, which also reaches a handled one
+    pages[url] = ["11", "10"]
+    pages[f"{url}&page=2"] = ["9", "8"]
+    pages[f"{url}&page=3"] = ["7", "6"]
+    navigated.clear()
+    app._handle_go_to_all_urls()
+    assert navigated == [url, f"{url}&page=2"]
+
+def test_go_to_all_urls_skips_listings_seen_under_another_url(app, capsys):
+    """Overlapping search URLs don't parse or process the same listing twice in a run."""
+    pages = {
+        "https://www.yad2.co.il/realestate/forsale?area=1&page=1": ["1", "2"],
+        "https://www.yad2.co.il/realestate/forsale?area=2&page=1": ["2", "3"],
+        "https://www.yad2.co.il/realestate/forsale?area=3&page=1": ["3", "4"],
+    }
+    app.search_urls = {f"area {i}": url for i, url in enumerate(pages, 1)}
+    navigated = []
+
+    def get_feed_page(skip_ids):
+        item_ids = pages[navigated[-1]]
+        if navigated[-1].endswith("area=3&page=1"):
+            # Reading the card links failed, everything on the page was parsed
+            return FeedPage([create_feed_item(item_id) for item_id in item_ids])
+        return FeedPage(
+            [create_feed_item(item_id) for item_id in item_ids if item_id not in skip_ids],
+            [item_id for item_id in item_ids if item_id in skip_ids]
+        )
+
+    app.client.navigate_to_saved_items.return_value = False
+    app.client.navigate_to.side_effect = navigated.append
+    app.client.get_feed_page.side_effect = get_feed_page
+    app.client.is_paged_url.side_effect = Yad2Client.is_paged_url
+    app.client.enrich_feed_item.side_effect = lambda item: item
+    app.address_matcher.check_location.return_value = None
+    app.rules = TriageRules({"rules": [{"name": "All", "action": "approve", "when": {}}]})
+
+    app._handle_go_to_all_urls()
+
+    enriched = [call.args[0].item_id for call in app.client.enrich_feed_item.call_args_list]
+    assert enriched == ["1", "2", "3", "4"]
+    output = capsys.readouterr().out
+    assert "2 listings appeared under more than one search URL" in output
+    assert "1 not parsed again" in output
+    assert "1 not processed again" in output
+
+def test_go_to_all_urls_in_tabs(app):
+    """With parallel tabs, a group of search URLs loads side by side and is handled as one batch."""
+    pages = {
+        "https://www.yad2.co.il/realestate/forsale?area=1": ["1", "2"],
+        "https://www.yad2.co.il/realestate/forsale?area=2": ["2", "3"],
+        "https://www.yad2.co.il/realestate/forsale?area=3": ["4"],
+    }
+    app.search_urls = {f"area {i}": url for i, url in enumerate(pages, 1)}
+    app.parallel_tabs = 2
+    tabs = {}
+    current = []
+
+    def open_tabs(urls):
+        handles = [f"tab-{len(tabs) + i}" for i in range(len(urls))]
+        tabs.update(zip(handles, urls))
+        return handles
+
+    app.client.navigate_to_saved_items.return_value = False
+    app.client.open_tabs.side_effect = open_tabs
+    app.client.switch_to_tab.side_effect = current.append
+    app.client.get_feed_page.side_effect = lambda skip_ids: FeedPage(
+        [create_feed_item(item_id) for item_id in pages[tabs[current[-1]]]]
+    )
+    app.client.is_paged_url.side_effect = Yad2Client.is_paged_url
+    app.client.get_total_pages.return_value = 1
+    app.client.enrich_feed_item.side_effect = lambda item: item
+    app.address_matcher.check_location.return_value = None
+    app.rules = TriageRules({"rules": [{"name": "All", "action": "approve", "when": {}}]})
+
+    app._handle_go_to_all_urls()
+
+    assert [call.args[0] for call in app.client.open_tabs.call_args_list] == [list(pages)[:2], list(pages)[2:]]
+    app.client.navigate_to.assert_not_called()
+    # The first group's shared listing is handled once, in one batch
+    saved = [[item.item_id for item in call.args[0]] for call in app.client.save_ads.call_args_list]
+    assert saved == [["1", "2", "3"], ["4"]]
+    assert [call.args[0] for call in app.client.close_tabs.call_args_list] == [["tab-0", "tab-1"], ["tab-2"]]
+
+def test_resume_continues_an_interrupted_run(app, capsys):
+    """A resumed run sends what wasn't sent and crawls what wasn't crawled, without handling listings again."""
+    pages = {
+        "https://www.yad2.co.il/realestate/forsale?area=1&page=1": ["1", "2"],
+        "https://www.yad2.co.il/realestate/forsale?area=2&page=1": ["2", "3"],
+    }
+    first_url, second_url = pages
+    app.search_urls = {"area 1": first_url, "area 2": second_url}
+    navigated = []
+    failing = {second_url, "1"}
+
+    def navigate_to(url):
+        if url in failing:
+            raise Exception("Timed out")
+        navigated.append(url)
+
+    def send_feed_item(item):
+        if item.item_id in failing:
+            raise Exception("SMTP server unavailable")
+
+    app.client.navigate_to_saved_items.return_value = False
+    app.client.navigate_to.side_effect = navigate_to
+    app.client.get_feed_page.side_effect = lambda skip_ids: FeedPage(
+        [create_feed_item(item_id) for item_id in pages[navigated[-1]] if item_id not in skip_ids],
+        [item_id for item_id in pages[navigated[-1]] if item_id in skip_ids]
+    )
+    app.client.is_paged_url.side_effect = Yad2Client.is_paged_url
+    app.client.enrich_feed_item.side_effect = lambda item: item
+    app.client.send_feed_item.side_effect = send_feed_item
+    app.address_matcher.check_location.return_value = None
+    app.rules = TriageRules({"rules": [{"name": "All", "action": "approve", "when": {}}]})
+
+    app._handle_go_to_all_urls()
+    assert "start with --resume to continue them" in capsys.readouterr().out
+
+    failing.clear()
+    navigated.clear()
+    app.client.enrich_feed_item.reset_mock()
+    app.client.send_feed_item.reset_mock()
+    app._handle_go_to_all_urls(resume=True)
+
+    assert navigated == [second_url]
+    assert [call.args[0].item_id for call in app.client.enrich_feed_item.call_args_list] == ["3"]
+    assert [call.args[0].item_id for call in app.client.send_feed_item.call_args_list] == ["1", "3"]
+    app.db_writer.flush()
+    assert not app.work_queue.has_pending()
+
+    app._handle_go_to_all_urls(resume=True)
+    assert "No interrupted run to resume" in capsys.readouterr().out
+
+def test_run_returns_to_the_menu_after_a_failed_resume(app, monkeypatch, capsys):
+    """An error while resuming is handled like one in any menu action, instead of ending the app."""
+    monkeypatch.setattr(app, '_handle_go_to_all_urls', MagicMock(side_effect=Exception("Timed out")))
+    monkeypatch.setattr('src.app.prompt_yes_no', lambda question: True)
+    monkeypatch.setattr('builtins.input', lambda prompt: "8")
+
+    app.run(resume=True)
+
+    out = capsys.readouterr().out
+    assert "Error: Timed out" in out
+    assert "Goodbye!" in out
+
+def test_go_to_all_urls_defers_search_urls_over_budget(app, capsys):
+    """Search URLs out of budget are left in the work queue where they stopped, and reported."""
+    url = "https://www.yad2.co.il/realestate/forsale?rooms=3-4"
+    pages = {url: ["1", "2"], f"{url}&page=2": ["3", "4"], f"{url}&page=3": ["5"]}
+    app.search_urls = {"search": url}
+    app.budget = CrawlBudget(max_pages=2, max_enrichments=3)
+    # Crawled before, so its pages are paginated
+    save_watermark(app.sync_state_repo, url, CrawlWatermark().advance(["0"]))
+    app.db_writer.flush()
+    navigated = []
+    app.client.navigate_to_saved_items.return_value = False
+    app.client.navigate_to.side_effect = navigated.append
+    app.client.get_feed_page.side_effect = lambda skip_ids: FeedPage(
+        [create_feed_item(item_id) for item_id in pages[navigated[-1]] if item_id not in skip_ids]
+    )
+    app.client.is_paged_url.side_effect = Yad2Client.is_paged_url
+    app.client.page_url.side_effect = Yad2Client.page_url
+    app.client.get_total_pages.return_value = 3
+    app.client.enrich_feed_item.side_effect = lambda item: item
+    app.address_matcher.check_location.return_value = None
+    app.rules = TriageRules({"rules": [{"name": "All", "action": "approve", "when": {}}]})
+
+    app._handle_go_to_all_urls()
+
+    assert navigated == [url, f"{url}&page=2"]
+    assert len(app.client.enrich_feed_item.call_args_list) == 3
+    output = capsys.readouterr().out
+    assert "search from page 2: enriched 3 listings, 1 listings not enriched" in output
+    app.db_writer.flush()
+    assert app.work_queue.pending(TASK_URL) == [{"name": "search", "url": url, "page": 2}]
+
+    # Resuming reads the unfinished page again, with a new budget
+    navigated.clear()
+    app.client.enrich_feed_item.reset_mock()
+    app._handle_go_to_all_urls(resume=True)
+
+    assert navigated == [f"{url}&page=2", f"{url}&page=3"]
+    assert [call.args[0].item_id for call in app.client.enrich_feed_item.call_args_list] == ["4", "5"]
+
+def test_go_to_all_urls_defers_a_search_url_out_of_enrichments(app):
+    """A crawl deferred by triage while the next page waits for the browser doesn't read that page."""
+    url = "https://www.yad2.co.il/realestate/forsale?rooms=3-4"
+    pages = {url: ["1", "2"], f"{url}&page=2": ["3", "4"], f"{url}&page=3": ["5"]}
+    app.search_urls = {"search": url}
+    app.budget = CrawlBudget(max_enrichments=3)
+    save_watermark(app.sync_state_repo, url, CrawlWatermark().advance(["0"]))
+    app.db_writer.flush()
+    navigated = []
+    app.client.navigate_to_saved_items.return_value = False
+    app.client.navigate_to.side_effect = navigated.append
+    app.client.get_feed_page.side_effect = lambda skip_ids: FeedPage(
+        [create_feed_item(item_id) for item_id in pages[navigated[-1]] if item_id not in skip_ids]
+    )
+    app.client.is_paged_url.side_effect = Yad2Client.is_paged_url
+    app.client.page_url.side_effect = Yad2Client.page_url
+    app.client.get_total_pages.return_value = 3
+    app.client.enrich_feed_item.side_effect = lambda item: item
+    app.address_matcher.check_location.return_value = None
+    app.rules = TriageRules({"rules": [{"name": "All", "action": "approve", "when": {}}]})
+
+    app._handle_go_to_all_urls()
+
+    assert navigated == [url, f"{url}&page=2"]
+    app.db_writer.flush()
+    assert app.work_queue.pending(TASK_URL) == [{"name": "search", "url": url, "page": 2}]
+
+    navigated.clear()
+    app.client.enrich_feed_item.reset_mock()
+    app._handle_go_to_all_urls(resume=True)
+
+    assert [call.args[0].item_id for call in app.client.enrich_feed_item.call_args_list] == ["4", "5"]
+
+def test_go_to_all_urls_defers_everything_after_the_deadline(app, capsys):
+    app.deadline_seconds = 0
+    app.client.navigate_to_saved_items.return_value = False
+    app.client.is_paged_url.side_effect = Yad2Client.is_paged_url
+
+    app._handle_go_to_all_urls()
+
+    app.client.navigate_to.assert_not_called()
+    assert "2 search URLs were left unfinished" in capsys.readouterr().out
+    app.db_writer.flush()
+    assert len(app.work_queue.pending(TASK_URL)) == 2
+
+def test_deadline_makes_only_the_go_to_all_urls_run_unattended(app):
+    """The rest of the session, e.g. syncing favorites from the menu, still waits for CAPTCHAs."""
+    app.deadline_seconds = 600
+    app.client.unattended = False
+    unattended = []
+    app.client.navigate_to_saved_items.side_effect = lambda: unattended.append(app.client.unattended)
+    app.client.get_feed_page.return_value = FeedPage([])
+    app.client.is_paged_url.side_effect = Yad2Client.is_paged_url
+
+    app._handle_go_to_all_urls()
+    assert unattended and all(unattended)
+    assert not app.client.unattended
+
+    unattended.clear()
+    app._handle_store_saved_items()
+    assert unattended == [False]
+
+def test_go_to_all_urls_loads_medians_once(app, monkeypatch):
+    """Every batch of a run is scored against the medians loaded at its start."""
+    feeds = iter([[create_feed_item("1")], [create_feed_item("2")]])
+    app.client.navigate_to_saved_items.return_value = False
+    app.client.get_feed_page.side_effect = lambda skip_ids: FeedPage(next(feeds))
+    app.client.is_paged_url.side_effect = Yad2Client.is_paged_url
+    app.client.get_total_pages.return_value = 1
+    app.address_matcher.check_location.return_value = None
+    app.rules = TriageRules({"rules": [{"name": "None", "action": "reject", "when": {}}]})
+    medians = MagicMock(return_value={})
+    monkeypatch.setattr(app.listings_repo, 'price_per_sqm_medians', medians)
+
+    app._handle_go_to_all_urls()
+
+    assert app.client.get_feed_page.call_count == 2
+    medians.assert_called_once()
+
+def test_unattended_run_defers_search_urls_showing_a_captcha(app, capsys):
+    """A CAPTCHA nobody is there to solve defers its search URL instead of waiting for input."""
+    url = "https://www.yad2.co.il/realestate/forsale?rooms=3-4"
+    app.search_urls = {"search": url}
+    app.client.navigate_to_saved_items.return_value = False
+    app.client.unattended = False
+    unattended = []
+
+    def get_feed_page(skip_ids):
+        unattended.append(app.client.unattended)
+        return FeedPage([], captcha=True)
+    app.client.get_feed_page.side_effect = get_feed_page
+    app.client.is_paged_url.side_effect = Yad2Client.is_paged_url
+
+    app.run_auto()
+
+    assert unattended == [True]
+    assert not app.client.unattended
+    assert "search from page 1: captcha" in capsys.readouterr().out
+    assert app.work_queue.pending(TASK_URL) == [{"name": "search", "url": url, "page": 1}]
+
+def test_go_to_all_urls_reads_watermarks_while_holding_the_browser(app, monkeypatch):
+    """Watermarks are read through the session triage uses, so never while a batch holds the browser."""
+    held = []
+
+    class TrackedHandoff(Handoff):
+        def take(self):
+            lease = super().take()
+            held.append(lease)
+            return lease
+
+    def load(sync_state_repo, url):
+        assert held and not held[-1]._released
+        return load_watermark(sync_state_repo, url)
+
+    monkeypatch.setattr('src.app.Handoff', TrackedHandoff)
+    monkeypatch.setattr('src.app.load_watermark', load)
+    app.client.navigate_to_saved_items.return_value = False
+    app.client.get_feed_page.return_value = FeedPage([])
+    app.client.is_paged_url.side_effect = Yad2Client.is_paged_url
+
+    app._handle_go_to_all_urls()
+
+    assert app.client.get_feed_page.call_count == 2
+
+def test_go_to_all_urls_stops_reading_pages_once_interrupted(app, monkeypatch):
+    """An interrupted run leaves the browser alone: no more pages, likes or listings handled."""
+    handoffs = []
+
+    class TrackedHandoff(Handoff):
+        def __init__(self):
+            super().__init__()
+            handoffs.append(self)
+
+    def get_feed_page(skip_ids):
+        # As if the run was interrupted while the page was being read
+        handoffs[0].close()
+        return FeedPage([create_feed_item("1")])
+
+    monkeypatch.setattr('src.app.Handoff', TrackedHandoff)
+    app.client.navigate_to_saved_items.return_value = False
+    app.client.get_feed_page.side_effect = get_feed_page
+    app.client.is_paged_url.side_effect = Yad2Client.is_paged_url
+
+    app._handle_go_to_all_urls()
+
+    app.client.navigate_to.assert_called_once()
+    app.client.click_like_buttons.assert_not_called()
+    app.client.save_ads.assert_not_called()
+    app.db_writer.flush()
+    assert [task["page"] for task in app.work_queue.pending(TASK_URL)] == [1, 1]
+
+def test_go_to_all_urls_reconciles_each_page_once(app, monkeypatch):
+    app.search_urls = {"search": "https://www.yad2.co.il/realestate/forsale?rooms=3-4"}
+    app.client.navigate_to_saved_items.return_value = False
+    app.client.get_feed_page.return_value = FeedPage([create_feed_item("1"), create_feed_item("2")])
+    app.client.is_paged_url.side_effect = Yad2Client.is_paged_url
+    app.address_matcher.check_location.return_value = None
+    app.rules = TriageRules({"rules": [{"name": "None", "action": "reject", "when": {}}]})
+    saved_ids = MagicMock(return_value=set())
+    monkeypatch.setattr(app.saved_items_repo, 'saved_ids', saved_ids)
+
+    app._handle_go_to_all_urls()
+
+    saved_ids.assert_called_once()
+    app.client.save_ads.assert_called_once()
@@ -1,5 +1,6 @@
 import logging
 import time
+from unittest.mock import Mock
 
 from selenium.webdriver.common.by import By
 
@@ -64,4 +65,16 @@ def test_browser_quit():
     assert browser.driver is not None
     browser.quit()
     assert browser.driver is None
-    logger.info("Browser quit test completed")
\ No newline at end of file
+    logger.info("Browser quit test completed")
+
+
+def test_solve_captcha_unattended(monkeypatch):
+    browser = Browser()
+    browser.driver = Mock(current_url="https://validate.perfdrive.com/challenge")
+    monkeypatch.setattr('builtins.input', Mock(side_effect=AssertionError("prompted for the CAPTCHA")))
+
+    browser.unattended = True
+    assert not browser.solve_captcha()
+
+    browser.driver.current_url = "https://www.yad2.co.il/realestate/forsale"
+    assert browser.solve_captcha()
@@ -0,0 +1,34 @@
+from unittest.mock import MagicMock
+
+from src import main
+from src.address import AddressMatcher, StreetMatch
+from src.processor.feed_processor import process_item
+from src.processor.triage import TriageAction
+from src.yad2.client import Yad2Client
+from src.yad2.models import FeedItem, PropertySpecs
+from tests.helpers import create_feed_item
+
+
+def create_last_floor_item() -> FeedItem:
+    item = create_feed_item(
+        price=2500000, specs=PropertySpecs(rooms=4.0, floor=4, size_sqm=90), street_match=StreetMatch(True)
+    )
+    item.specs.features.current_floor = 4
+    item.specs.features.total_floors = 4
+    return item
+
+def test_main_uses_the_app_package_classes():
+    # Classes imported through another package root are different classes, and their enums never compare equal
+    assert main.AddressMatcher is AddressMatcher
+    assert main.Yad2Client is Yad2Client
+
+def test_rules_loaded_by_main_reject_in_process_item(tmp_path):
+    rules = main.load_rules(str(tmp_path / "missing_rules.json"))
+    item = create_last_floor_item()
+    assert rules.evaluate(item).action == TriageAction.REJECT
+
+    client = MagicMock(spec=Yad2Client)
+    assert process_item(item, client, rules=rules, auto=True)
+    client.send_feed_item.assert_not_called()
+    client.enrich_feed_item.assert_not_called()
+    client.save_ad.assert_called_once_with(item)
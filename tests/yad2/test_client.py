@@ -0,0 +1,91 @@
+import logging
+from unittest.mock import Mock
+
+import pytest
+
+from src.yad2.client import Yad2Client
+from tests.helpers import create_feed_item
+
+
+@pytest.fixture
+def client():
+    # Skip __init__, which starts a browser and logs in
+    client = Yad2Client.__new__(Yad2Client)
+    client.browser = Mock()
+    client.logger = logging.getLogger(__name__)
+    client._saved_items_repo = Mock()
+    client._main_window = None
+    client._current_tab = None
+    client._item_tabs = {}
+    return client
+
+def test_save_ads_in_one_script(client):
+    client.browser.driver.execute_script.return_value = {"1": True, "2": True}
+
+    results = client.save_ads([create_feed_item("1"), create_feed_item("2"), create_feed_item("1")])
+
+    assert results == {"1": True, "2": True}
+    client.browser.driver.execute_script.assert_called_once()
+    assert client.browser.driver.execute_script.call_args.args[1] == ["1", "2"]
+    client.saved_items_repo.add_items.assert_called_once()
+    assert [item_id for item_id, _ in client.saved_items_repo.add_items.call_args.args[0]] == ["1", "2"]
+
+def test_save_ads_retries_failures_one_by_one(client):
+    # The batch misses item 2; the retry finds it
+    client.browser.driver.execute_script.side_effect = [{"1": True, "2": False}, True]
+
+    results = client.save_ads([create_feed_item("1"), create_feed_item("2")])
+
+    assert results == {"1": True, "2": True}
+    assert client.browser.driver.execute_script.call_args.args[1] == "2"
+    client.saved_items_repo.add_item.assert_called_once_with("2", "https://www.yad2.co.il/realestate/item/2")
+
+def test_save_ads_retries_only_listings_the_batch_did_not_save(client):
+    # The batch script failed on item 2 part way; items 1 and 3 were clicked and mustn't be clicked again
+    client.browser.driver.execute_script.side_effect = [{"1": True, "2": False, "3": True}, True]
+
+    results = client.save_ads([create_feed_item("1"), create_feed_item("2"), create_feed_item("3")])
+
+    assert results == {"1": True, "2": True, "3": True}
+    assert [c.args[1] for c in client.browser.driver.execute_script.call_args_list] == [["1", "2", "3"], "2"]
+
+def test_save_ads_retry_after_failed_batch_skips_saved_listings(client):
+    # Nothing tells which listings the failed batch clicked, so the retry checks each button first
+    client.browser.driver.execute_script.side_effect = [Exception("script timeout"), True, True]
+
+    assert client.save_ads([create_feed_item("1"), create_feed_item("2")]) == {"1": True, "2": True}
+    for retry in client.browser.driver.execute_script.call_args_list[1:]:
+        assert "if (!isLiked(likeButton))" in retry.args[0]
+
+def test_save_ads_reports_database_failure_without_clicking_again(client):
+    client.browser.driver.execute_script.return_value = {"1": True}
+    client.saved_items_repo.add_items.side_effect = Exception("database locked")
+
+    assert client.save_ads([create_feed_item("1")]) == {"1": False}
+    client.browser.driver.execute_script.assert_called_once()
+
+def test_save_ads_clicks_each_item_in_its_tab(client):
+    driver = client.browser.driver
+    driver.current_window_handle = "main"
+    driver.execute_script.side_effect = lambda script, ids: {item_id: True for item_id in ids}
+    client._item_tabs = {"1": "tab-a", "2": "tab-b"}
+
+    results = client.save_ads([create_feed_item("1"), create_feed_item("2"), create_feed_item("3")])
+
+    assert results == {"1": True, "2": True, "3": True}
+    assert [c.args[0] for c in driver.switch_to.window.call_args_list] == ["tab-a", "tab-b", "main", "main"]
+    assert [c.args[1] for c in driver.execute_script.call_args_list] == [["1"], ["2"], ["3"]]
+
+def test_click_like_buttons_survives_script_errors(client):
+    client.browser.driver.execute_script.side_effect = Exception("no such window")
+
+    assert client.click_like_buttons(["1", "2"]) == {"1": False, "2": False}
+    assert client.click_like_buttons([]) == {}
+
+def test_page_url():
+    url = "https://www.yad2.co.il/realestate/forsale?multiNeighborhood=2001002%2C763&rooms=3-4"
+
+    assert Yad2Client.page_url(url, 3) == f"{url}&page=3"
+    assert Yad2Client.page_url(f"{url}&page=2", 1) == url
+    assert Yad2Client.is_paged_url(f"{url}&page=2")
+    assert not Yad2Client.is_paged_url(url)
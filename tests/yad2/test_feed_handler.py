@@ -1,4 +1,5 @@
 import logging
+from unittest.mock import Mock
 
 import pytest
 
@@ -48,6 +49,75 @@ def test_get_saved_items(browser, handler, sample_saved_feed_html):
     
     logger.info("Saved items retrieval test completed successfully")
 
+def test_get_saved_items_in_one_script():
+    browser = Mock()
+    browser.check_for_captcha.return_value = False
+    browser.driver.execute_async_script.return_value = [
+        "https://www.yad2.co.il/realestate/item/123?opened-from=favorites",
+        "https://www.yad2.co.il/realestate/item/456",
+        "https://www.yad2.co.il/realestate/item/123",
+        "https://www.yad2.co.il/realestate/forsale",
+    ]
+    handler = FeedHandler(browser, FeedParser())
+
+    items = handler.get_saved_items()
+
+    assert items == [
+        ("123", "https://www.yad2.co.il/realestate/item/123"),
+        ("456", "https://www.yad2.co.il/realestate/item/456"),
+    ]
+    browser.driver.execute_async_script.assert_called_once()
+    browser.driver.find_elements.assert_not_called()
+
+def test_get_saved_items_restores_the_script_timeout():
+    browser = Mock()
+    browser.check_for_captcha.return_value = False
+    browser.driver.timeouts.script = 30
+    browser.driver.execute_async_script.side_effect = Exception("script timeout")
+    handler = FeedHandler(browser, FeedParser())
+
+    assert handler.get_saved_items() == []
+    assert browser.driver.set_script_timeout.call_args_list[-1].args == (30,)
+
+def test_get_feed_page_skips_known_cards():
+    browser = Mock()
+    browser.check_for_captcha.return_value = False
+    cards = [Mock(get_attribute=Mock(return_value=None)) for _ in range(3)]
+    browser.wait_for_element.return_value.find_elements.return_value = cards
+    browser.driver.execute_script.side_effect = [
+        [
+            "https://www.yad2.co.il/realestate/item/1?opened-from=feed",
+            "https://www.yad2.co.il/realestate/item/2",
+            "https://www.yad2.co.il/realestate/item/3",
+        ],
+        None,  # No page state for coordinates
+    ]
+    parser = Mock()
+    parser.parse_item.side_effect = lambda card: f"parsed {cards.index(card) + 1}"
+    handler = FeedHandler(browser, parser)
+
+    page = handler.get_feed_page(skip_ids={"1", "3"})
+
+    assert page.items == ["parsed 2"]
+    assert page.skipped_ids == ["1", "3"]
+    parser.parse_item.assert_called_once_with(cards[1])
+
+@pytest.mark.parametrize("hrefs", [None, ["https://www.yad2.co.il/realestate/item/1"]])
+def test_get_feed_page_parses_every_card_without_a_link_per_card(hrefs):
+    browser = Mock()
+    browser.check_for_captcha.return_value = False
+    cards = [Mock(get_attribute=Mock(return_value=None)) for _ in range(2)]
+    browser.wait_for_element.return_value.find_elements.return_value = cards
+    browser.driver.execute_script.side_effect = [hrefs, None]
+    parser = Mock()
+    parser.parse_item.side_effect = lambda card: f"parsed {cards.index(card) + 1}"
+    handler = FeedHandler(browser, parser)
+
+    page = handler.get_feed_page(skip_ids={"1"})
+
+    assert page.items == ["parsed 1", "parsed 2"]
+    assert page.skipped_ids == []
+
 @pytest.fixture
 def sample_feed_html():
     return """
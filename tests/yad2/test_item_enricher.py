@@ -1,5 +1,6 @@
 import logging
 from pathlib import Path
+from unittest.mock import Mock
 
 import pytest
 from selenium import webdriver
@@ -130,6 +131,21 @@ def test_extract_contact_info(browser, sample_listing_html, sample_feed_item):
     
     logger.info("Contact info extraction test completed successfully")
 
+def test_extract_coordinates_ignores_other_coordinates(monkeypatch, sample_feed_item):
+    state = {
+        "map": {"center": {"lat": 32.0, "lng": 34.7}},
+        "similar": [{"token": "456", "address": {"coords": {"lat": 32.2, "lon": 34.9}}}],
+    }
+    monkeypatch.setattr('src.yad2.item_enricher.read_next_data', lambda driver: state)
+    enricher = ItemEnricher(Mock())
+
+    enricher._extract_coordinates(sample_feed_item)
+    assert sample_feed_item.location.latitude is None
+
+    state["item"] = {"token": "123", "address": {"coords": {"lat": 32.1, "lon": 34.8}}}
+    enricher._extract_coordinates(sample_feed_item)
+    assert (sample_feed_item.location.latitude, sample_feed_item.location.longitude) == (32.1, 34.8)
+
 
 
 def main():
@@ -113,4 +113,30 @@ def test_navigation_error_logging(navigation, mock_browser, caplog):
     navigation.navigate_to("https://www.yad2.co.il/invalid-page")
     
     # Verify
-    assert "Failed to navigate to URL" in caplog.text 
\ No newline at end of file
+    assert "Failed to navigate to URL" in caplog.text 
+
+@pytest.mark.parametrize("badges, expected", [
+    ([MagicMock(get_attribute=lambda _: " 12 ")], 12),
+    ([MagicMock(get_attribute=lambda _: "99+")], None),
+    ([], None),
+])
+def test_read_favorites_count(navigation, mock_browser, badges, expected):
+    mock_browser.driver.find_elements.return_value = badges
+
+    assert navigation.read_favorites_count() == expected
+
+def test_open_tabs_without_waiting_for_them(navigation, mock_browser):
+    """Tabs are opened by script, so the next one opens while the previous one still loads."""
+    driver = mock_browser.driver
+    windows = ["main"]
+    driver.window_handles = windows
+    driver.execute_script.side_effect = lambda script, url: windows.append(f"tab-{len(windows)}")
+
+    handles = navigation.open_tabs(["https://example.com/1", "https://example.com/2"])
+
+    assert handles == ["tab-1", "tab-2"]
+    assert [call.args[1] for call in driver.execute_script.call_args_list] == [
+        "https://example.com/1", "https://example.com/2"
+    ]
+    driver.get.assert_not_called()
+    driver.switch_to.window.assert_not_called()
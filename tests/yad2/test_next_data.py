@@ -0,0 +1,25 @@
+from src.yad2.next_data import extract_listing_coordinates, find_coordinates
+
+FEED_STATE = {
+    "props": {"pageProps": {"dehydratedState": {"queries": [{"state": {"data": {
+        "private": [
+            {"token": "abc123", "address": {"coords": {"lat": 32.11, "lon": 34.79}, "city": {"text": "תל אביב"}}},
+            {"token": "def456", "address": {"city": {"text": "תל אביב"}}}
+        ],
+        "agency": [
+            {"token": "ghi789", "address": {"coords": {"latitude": 32.05, "longitude": 34.77}}}
+        ]
+    }}}]}}}
+}
+
+def test_extract_listing_coordinates():
+    assert extract_listing_coordinates(FEED_STATE) == {
+        "abc123": (32.11, 34.79),
+        "ghi789": (32.05, 34.77),
+    }
+
+def test_find_coordinates():
+    assert find_coordinates({"map": {"center": [{"lat": 31.5, "lng": 34.9}]}}) == (31.5, 34.9)
+    assert find_coordinates({"coords": {"lat": 0, "lon": 0}}) is None
+    assert find_coordinates({"lat": "32.1", "lon": "34.8"}) is None
+    assert find_coordinates([]) is None